@@ -0,0 +1,163 @@
+"""
+Benchmark dello scoring BM25 dell'indice locale.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Genera posting list sintetiche (frequenze dei termini con distribuzione Zipf,
+lunghezze dei campi variabili) per corpus da 10k a 1M documenti e misura la
+latenza p50/p99 di query sintetiche: scoring vettorizzato NumPy + top-k con
+argpartition, confrontato con lo scoring documento per documento in Python.
+
+Uso:
+    python benchmarks/bm25_benchmark.py
+    python benchmarks/bm25_benchmark.py --sizes 10000 100000 --queries 500
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search.local_index import Bm25Scorer, BM25_K1, BM25_B, top_k
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+VOCABULARY_SIZE = 50_000
+FIELDS = {"title": 3.0, "abstract": 2.0, "full_text": 1.0}
+MEAN_LENGTHS = {"title": 10, "abstract": 150, "full_text": 2000}
+TOP_K = 20
+
+
+class SyntheticIndex(Bm25Scorer):
+    """Indice con posting list generate al primo accesso (stessa interfaccia di MmapIndex)."""
+
+    def __init__(self, n_docs: int, seed: int = 42):
+        self.name = f"synthetic_{n_docs}"
+        self.field_boosts = dict(FIELDS)
+        self.n_docs = n_docs
+        self.rng = np.random.default_rng(seed)
+        self.lengths = {
+            field: np.maximum(1, self.rng.poisson(mean, n_docs)).astype(np.uint32)
+            for field, mean in MEAN_LENGTHS.items()
+        }
+        self.postings: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self):
+        return self.n_docs
+
+    def document_frequency(self, field: str, rank: int) -> int:
+        """Zipf: il termine di rango r compare in circa n_docs * p / r documenti."""
+        coverage = min(0.5, MEAN_LENGTHS[field] / 200 / rank)
+        return max(1, int(self.n_docs * coverage))
+
+    def postings_for(self, field, term):
+        key = (field, term)
+        if key not in self.postings:
+            df = self.document_frequency(field, int(term[1:]))
+            docs = np.sort(self.rng.choice(self.n_docs, size=df, replace=False)).astype(np.uint32)
+            tfs = (1 + self.rng.poisson(0.5, df)).astype(np.uint16)
+            self.postings[key] = (docs, tfs)
+        return self.postings[key]
+
+    def field_lengths(self, field):
+        return self.lengths[field]
+
+    def average_length(self, field):
+        return float(self.lengths[field].mean())
+
+
+def python_scores(index: Bm25Scorer, terms: List[str]) -> Dict[int, float]:
+    """Riferimento: BM25 best_fields calcolato un documento alla volta."""
+    n_docs = len(index)
+    best: Dict[int, float] = {}
+    for field, boost in index.field_boosts.items():
+        lengths = index.field_lengths(field)
+        avg_length = index.average_length(field)
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            docs, tfs = index.postings_for(field, term)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_num, tf in zip(docs.tolist(), tfs.tolist()):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_num] / avg_length)
+                scores[doc_num] = scores.get(doc_num, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        for doc_num, value in scores.items():
+            value *= boost
+            if value > best.get(doc_num, 0.0):
+                best[doc_num] = value
+    return best
+
+
+def synthetic_queries(n_queries: int, seed: int = 7) -> List[List[str]]:
+    """Query da 1-4 termini estratti con distribuzione Zipf sul vocabolario."""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(n_queries):
+        ranks = np.minimum(rng.zipf(1.3, rng.integers(1, 5)), VOCABULARY_SIZE) + 20
+        queries.append([f"t{r}" for r in ranks])
+    return queries
+
+
+def measure(run, queries: List[List[str]]) -> Dict[str, float]:
+    """Latenze in millisecondi (p50, p99, media)."""
+    timings = []
+    for terms in queries:
+        start = time.perf_counter()
+        run(terms)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    return {
+        "p50": float(np.percentile(timings, 50)),
+        "p99": float(np.percentile(timings, 99)),
+        "mean": float(timings.mean())
+    }
+
+
+def run_benchmark(sizes: List[int], n_queries: int, python_limit: int):
+    queries = synthetic_queries(n_queries)
+
+    print(f"{'documenti':>10} | {'metodo':<10} | {'p50 ms':>8} | {'p99 ms':>8} | {'media ms':>8}")
+    print("-" * 56)
+
+    for n_docs in sizes:
+        index = SyntheticIndex(n_docs)
+        # Riscaldamento: genera tutte le posting list prima di misurare
+        for terms in queries:
+            index.score_arrays(terms)
+
+        def vectorized(terms):
+            return top_k(*index.score_arrays(terms), TOP_K)
+
+        def scalar(terms):
+            scores = python_scores(index, terms)
+            return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:TOP_K]
+
+        methods = [("numpy", vectorized)]
+        if n_docs <= python_limit:
+            methods.append(("python", scalar))
+
+        for label, run in methods:
+            stats = measure(run, queries)
+            print(f"{n_docs:>10} | {label:<10} | {stats['p50']:>8.2f} | {stats['p99']:>8.2f} | {stats['mean']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 dell'indice locale")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Numero di documenti dei corpus sintetici")
+    parser.add_argument('--queries', type=int, default=200, help="Query per corpus")
+    parser.add_argument('--python-limit', type=int, default=100_000,
+                        help="Corpus massimo per il confronto con lo scoring in Python")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BM25 Benchmark - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+    run_benchmark(args.sizes, args.queries, args.python_limit)
+
+
+if __name__ == "__main__":
+    main()
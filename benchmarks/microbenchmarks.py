@@ -0,0 +1,354 @@
+"""
+Microbenchmark dei percorsi caldi, su corpus sintetico.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Misura, sui documenti di benchmarks/synthetic_corpus.py (deterministici a
+parità di seed e parametri):
+
+    extract.*   TableExtractor/FigureExtractor.extract_from_html (arXiv e JATS)
+    paragraphs  ParagraphStore.from_html su alberi già parsati
+    mentions.*  _find_mentions per ogni tabella/figura del documento
+    context.*   _find_context_paragraphs (store nuovi a ogni ripetizione:
+                comprende il calcolo del buffer minuscolo)
+    prepare.*   prepare_document degli indexer (il testo completo degli
+                articoli è letto da un FullTextStore temporaneo)
+    query.*     costruzione delle query di web/app.py (facet, predicati sulle
+                tabelle, multi_match e ricerca booleana), senza eseguirle
+
+Per ogni benchmark si riportano tempo minimo e mediano di REPEAT esecuzioni
+sull'intero corpus e il tempo per elemento. I risultati vanno in JSON con
+commit e versione di Python, per confrontare due commit.
+
+Uso:
+    python benchmarks/microbenchmarks.py
+    python benchmarks/microbenchmarks.py --arxiv 50 --pubmed 50 --repeat 7 --output base.json
+    python benchmarks/microbenchmarks.py --only extract mentions --compare base.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# La costruzione delle query non deve cercare Elasticsearch né aprire l'indice locale
+os.environ.setdefault('SEARCH_BACKEND', 'elasticsearch')
+
+from werkzeug.datastructures import MultiDict
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR, PAPER_FIELDS, TABLE_FIELDS
+from extractors.paragraph_store import ParagraphStore
+from extractors.table_extractor import TableExtractor
+from extractors.figure_extractor import FigureExtractor
+from indexers.table_indexer import TableIndexer
+from indexers.figure_indexer import FigureIndexer
+from indexers.paper_indexer import PaperIndexer
+from search.backends import ElasticsearchBackend
+from search.table_query import table_query_filters
+from storage.raw_archive import parse_document
+from storage.text_store import FullTextStore
+from web.app import build_facet_filters, parse_boolean_query, PAPER_FACETS, TABLE_FACETS
+from benchmarks.synthetic_corpus import synthetic_corpus, article_record, DEFAULT_SEED
+
+REPEAT = 5
+RESULTS_DIR = DATA_DIR / "benchmarks"
+
+# Richieste di ricerca tipiche: (tipo, parametri URL)
+SAMPLE_REQUESTS = [
+    ('papers', {'q': 'query optimizer cardinality estimation'}),
+    ('papers', {'q': 'vector index', 'source': 'arxiv', 'year': ['2024', '2023'], 'has_tables': '1'}),
+    ('papers', {'q': 'latency AND throughput NOT memory', 'search_type': 'boolean', 'category': 'cs.DB'}),
+    ('tables', {'q': 'accuracy >= 90% latency < 5 ms'}),
+    ('tables', {'q': 'throughput > 1000 ops/s OR recall', 'search_type': 'boolean', 'paper': '2401.00001'}),
+    ('tables', {'q': 'dose between 10 and 50 mg', 'source': 'pubmed'}),
+]
+
+
+def measure(func: Callable, setup: Optional[Callable] = None, repeat: int = REPEAT) -> Dict[str, float]:
+    """
+    Tempi di func(setup()) in ms: minimo e mediana di `repeat` esecuzioni.
+    func restituisce il numero di elementi elaborati; setup è fuori dalla misura.
+    """
+    times = []
+    items = 0
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        items = func(arg)
+        times.append((time.perf_counter() - start) * 1000)
+    best = min(times)
+    return {
+        'min_ms': best,
+        'median_ms': statistics.median(times),
+        'items': items,
+        'us_per_item': best * 1000 / items if items else 0.0,
+    }
+
+
+class Workload:
+    """Corpus sintetico e dati derivati condivisi dai benchmark."""
+
+    def __init__(self, n_arxiv: int, n_pubmed: int, seed: int, text_root: str, **options):
+        self.docs = synthetic_corpus(n_arxiv, n_pubmed, seed, **options)
+        self.table_extractor = TableExtractor()
+        self.figure_extractor = FigureExtractor()
+
+        self.trees = [parse_document(content) for source, _, content in self.docs if source == 'arxiv']
+        self.tables, self.figures = [], []
+        for source, paper_id, content in self.docs:
+            self.tables.extend(self.table_extractor.extract_from_html(content, paper_id, source))
+            self.figures.extend(self.figure_extractor.extract_from_html(content, paper_id, source,
+                                                                        _base_url(source, paper_id)))
+        # Termini informativi di ogni tabella/figura, raggruppati per documento arXiv
+        arxiv_ids = [paper_id for source, paper_id, _ in self.docs if source == 'arxiv']
+        self.table_terms = {paper_id: [] for paper_id in arxiv_ids}
+        self.figure_terms = {paper_id: [] for paper_id in arxiv_ids}
+        for table in self.tables:
+            if table.paper_id in self.table_terms:
+                terms = self.table_extractor._extract_informative_terms(table.body, table.caption)
+                self.table_terms[table.paper_id].append((terms, table.mentions))
+        for figure in self.figures:
+            if figure.paper_id in self.figure_terms:
+                terms = self.figure_extractor._extract_informative_terms(figure.caption)
+                self.figure_terms[figure.paper_id].append((terms, figure.mentions))
+
+        # Articoli con il testo completo nel blob store, come dopo lo scraping
+        self.text_store = FullTextStore(text_root)
+        self.articles = [self.text_store.store_article_text(article_record(source, paper_id, seed))
+                         for source, paper_id, _ in self.docs]
+
+    def stores(self) -> List[ParagraphStore]:
+        return [ParagraphStore.from_html(tree) for tree in self.trees]
+
+
+def _base_url(source: str, paper_id: str) -> str:
+    if source == 'arxiv':
+        return f"https://arxiv.org/html/{paper_id}/"
+    return f"https://www.ncbi.nlm.nih.gov/pmc/articles/{paper_id}/"
+
+
+# ---------- benchmark ----------
+
+def bench_extract(work: Workload, source: str, kind: str) -> Callable:
+    docs = [(paper_id, content) for doc_source, paper_id, content in work.docs if doc_source == source]
+
+    def run(_):
+        if kind == 'tables':
+            for paper_id, content in docs:
+                work.table_extractor.extract_from_html(content, paper_id, source)
+        else:
+            for paper_id, content in docs:
+                work.figure_extractor.extract_from_html(content, paper_id, source, _base_url(source, paper_id))
+        return len(docs)
+    return run
+
+
+def bench_paragraphs(work: Workload) -> Callable:
+    def run(_):
+        for tree in work.trees:
+            ParagraphStore.from_html(tree)
+        return len(work.trees)
+    return run
+
+
+def bench_mentions(work: Workload, kind: str) -> Callable:
+    stores = work.stores()
+    records = work.tables if kind == 'tables' else work.figures
+    # Posizioni distinte per documento (i pannelli di una figura condividono la posizione)
+    positions = {paper_id: sorted({r.position for r in records if r.paper_id == paper_id})
+                 for paper_id in work.table_terms}
+    label = "Table" if kind == 'tables' else "Figure"
+    extractor = work.table_extractor if kind == 'tables' else work.figure_extractor
+
+    def run(_):
+        calls = 0
+        for store, doc_positions in zip(stores, positions.values()):
+            for position in doc_positions:
+                extractor._find_mentions(store, f"{label} {position}", position)
+                calls += 1
+        return calls
+    return run
+
+
+def bench_context(work: Workload, kind: str) -> Callable:
+    terms_by_doc = list((work.table_terms if kind == 'tables' else work.figure_terms).values())
+    extractor = work.table_extractor if kind == 'tables' else work.figure_extractor
+
+    def run(stores):
+        calls = 0
+        for store, items in zip(stores, terms_by_doc):
+            for terms, mentions in items:
+                extractor._find_context_paragraphs(store, terms, mentions)
+                calls += 1
+        return calls
+    return run
+
+
+def bench_prepare(work: Workload, kind: str) -> Callable:
+    if kind == 'tables':
+        indexer, items = TableIndexer(connect=False), work.tables
+        prepare = indexer.prepare_document
+    elif kind == 'figures':
+        indexer, items = FigureIndexer(connect=False), work.figures
+        prepare = indexer.prepare_document
+    else:
+        indexer, items = PaperIndexer(connect=False, text_store=work.text_store), work.articles
+        indexer.set_asset_counts(work.tables, work.figures)
+
+        def prepare(article):
+            if article.get('source') == 'arxiv':
+                return indexer.prepare_arxiv_document(article)
+            return indexer.prepare_pubmed_document(article)
+
+    def run(_):
+        for item in items:
+            prepare(item)
+        return len(items)
+    return run
+
+
+def build_request_query(es: ElasticsearchBackend, doc_type: str, args: MultiDict) -> Dict:
+    """Stessi passi di web/app.py search() fino al corpo della richiesta."""
+    query = args.get('q', '').strip()
+    if doc_type == 'tables':
+        fields, facets = TABLE_FIELDS, TABLE_FACETS
+    else:
+        fields, facets = PAPER_FIELDS, PAPER_FACETS
+    filters, _ = build_facet_filters(args, facets)
+    text_query = query
+    if doc_type == 'tables':
+        text_query, _, numeric_filters = table_query_filters(query)
+        filters.extend(numeric_filters)
+    if args.get('search_type') == 'boolean' and text_query:
+        must_terms, should_terms, must_not_terms = parse_boolean_query(text_query)
+        return es.build_boolean_body(must_terms, should_terms, must_not_terms, 20, filters=filters, aggs=facets)
+    return es.build_search_body(text_query, fields, 20, filters=filters, aggs=facets)
+
+
+def bench_queries(rounds: int = 200) -> Callable:
+    es = ElasticsearchBackend()
+    requests = [(doc_type, MultiDict([(k, v) for k, values in params.items()
+                                      for v in (values if isinstance(values, list) else [values])]))
+                for doc_type, params in SAMPLE_REQUESTS]
+
+    def run(_):
+        for _ in range(rounds):
+            for doc_type, args in requests:
+                build_request_query(es, doc_type, args)
+        return rounds * len(requests)
+    return run
+
+
+def run_benchmarks(work: Workload, repeat: int, only: Optional[List[str]] = None) -> Dict[str, Dict]:
+    suite = [
+        ('extract.tables.arxiv', lambda: bench_extract(work, 'arxiv', 'tables'), None),
+        ('extract.figures.arxiv', lambda: bench_extract(work, 'arxiv', 'figures'), None),
+        ('extract.tables.pubmed', lambda: bench_extract(work, 'pubmed', 'tables'), None),
+        ('extract.figures.pubmed', lambda: bench_extract(work, 'pubmed', 'figures'), None),
+        ('paragraphs', lambda: bench_paragraphs(work), None),
+        ('mentions.tables', lambda: bench_mentions(work, 'tables'), None),
+        ('mentions.figures', lambda: bench_mentions(work, 'figures'), None),
+        ('context.tables', lambda: bench_context(work, 'tables'), work.stores),
+        ('context.figures', lambda: bench_context(work, 'figures'), work.stores),
+        ('prepare.tables', lambda: bench_prepare(work, 'tables'), None),
+        ('prepare.figures', lambda: bench_prepare(work, 'figures'), None),
+        ('prepare.papers', lambda: bench_prepare(work, 'papers'), None),
+        ('query.build', lambda: bench_queries(), None),
+    ]
+    results = {}
+    print(f"{'benchmark':<24} | {'min ms':>9} | {'mediana ms':>10} | {'elementi':>8} | {'us/elem':>9}")
+    print("-" * 72)
+    for name, make, setup in suite:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        stats = measure(make(), setup, repeat)
+        results[name] = stats
+        print(f"{name:<24} | {stats['min_ms']:>9.2f} | {stats['median_ms']:>10.2f} | "
+              f"{stats['items']:>8} | {stats['us_per_item']:>9.1f}")
+    return results
+
+
+def git_commit() -> str:
+    """Commit corrente (con "-dirty" se ci sono modifiche), o "unknown" fuori da git."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def compare(results: Dict[str, Dict], baseline_path: str):
+    """Confronta i tempi minimi con un file di risultati precedente."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('config') and baseline['config'] != results.get('config'):
+        print("[WARN] Configurazione del corpus diversa dal riferimento: confronto non omogeneo")
+    print(f"[STATS] Confronto con {baseline.get('commit', '?')} ({baseline_path}):")
+    for name, stats in results['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or not before['min_ms']:
+            print(f"   {name:<24} nuovo")
+            continue
+        ratio = stats['min_ms'] / before['min_ms']
+        print(f"   {name:<24} {before['min_ms']:>9.2f} -> {stats['min_ms']:>9.2f} ms  ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark di estrazione, indicizzazione e query")
+    parser.add_argument('--arxiv', type=int, default=20, help="Articoli arXiv sintetici")
+    parser.add_argument('--pubmed', type=int, default=20, help="Articoli PubMed sintetici")
+    parser.add_argument('--paragraphs', type=int, default=60, help="Paragrafi per articolo")
+    parser.add_argument('--tables', type=int, default=4, help="Tabelle per articolo")
+    parser.add_argument('--figures', type=int, default=5, help="Figure per articolo")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="Ripetizioni di ogni benchmark")
+    parser.add_argument('--only', nargs='+', default=None, help="Solo i benchmark con questi prefissi")
+    parser.add_argument('--output', default=None, help="File JSON dei risultati "
+                                                       "(default data/benchmarks/microbenchmarks_<commit>.json)")
+    parser.add_argument('--compare', default=None, help="File JSON di un'esecuzione precedente")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Microbenchmarks - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+    config = {'arxiv': args.arxiv, 'pubmed': args.pubmed, 'paragraphs': args.paragraphs,
+              'tables': args.tables, 'figures': args.figures, 'seed': args.seed}
+    print(f"[INFO] Corpus sintetico: {args.arxiv} arXiv, {args.pubmed} PubMed, {args.paragraphs} paragrafi, "
+          f"{args.tables} tabelle e {args.figures} figure per articolo")
+
+    with tempfile.TemporaryDirectory() as text_root:
+        work = Workload(args.arxiv, args.pubmed, args.seed, text_root, paragraphs=args.paragraphs,
+                        tables=args.tables, figures=args.figures)
+        print(f"[INFO] {len(work.tables)} tabelle e {len(work.figures)} figure estratte")
+        results = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'repeat': args.repeat,
+            'config': config,
+            'results': run_benchmarks(work, args.repeat, args.only),
+        }
+
+    output = args.output or RESULTS_DIR / f"microbenchmarks_{results['commit']}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"[OK] Risultati salvati in {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
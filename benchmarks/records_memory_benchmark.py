@@ -0,0 +1,169 @@
+"""
+Benchmark di memoria: dizionari contro record con __slots__.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Genera un corpus sintetico (articoli, paragrafi, tabelle, figure) due volte:
+una con i dizionari usati prima dalla pipeline, una con i record di
+models/records.py. Per ciascuna misura con tracemalloc la memoria allocata
+(le stringhe sono condivise tra le due versioni, quindi la differenza è solo
+nei contenitori), il tempo di una raccolta completa del garbage collector e
+il tempo di serializzazione JSON (migliore di REPEAT esecuzioni).
+
+Nota sul garbage collector: CPython smette di tracciare i dizionari che
+contengono solo valori atomici (come i vecchi paragrafi {index, text,
+text_lower}), mentre gli oggetti con __slots__ restano tracciati; la raccolta
+completa può quindi essere più lenta con i record anche se la memoria scende.
+
+Uso:
+    python benchmarks/records_memory_benchmark.py
+    python benchmarks/records_memory_benchmark.py --articles 5000 --paragraphs 80
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.records import Paragraph, TableRecord, FigureRecord, ArticleRecord, json_default
+
+TABLES_PER_ARTICLE = 3
+FIGURES_PER_ARTICLE = 5
+REPEAT = 5
+
+
+def synthetic_strings(n_articles: int, n_paragraphs: int) -> List[Dict]:
+    """Testi del corpus, creati una volta e condivisi dalle due rappresentazioni."""
+    corpus = []
+    for a in range(n_articles):
+        paragraphs = [f"Paragraph {p} of paper {a} discusses query latency and Table {p % 3 + 1}."
+                      for p in range(n_paragraphs)]
+        corpus.append({
+            'arxiv_id': f"2401.{a:05d}",
+            'title': f"Paper {a} on vectorized query execution",
+            'authors': [f"Author {a}-{i}" for i in range(4)],
+            'abstract': f"Abstract of paper {a}.",
+            'paragraphs': paragraphs,
+            'paragraphs_lower': [p.lower() for p in paragraphs],
+        })
+    return corpus
+
+
+def build_dicts(corpus: List[Dict]) -> Tuple[List, List, List, List]:
+    """Strutture come le costruivano scraper ed extractor prima dei record."""
+    articles, paragraphs, tables, figures = [], [], [], []
+    for doc in corpus:
+        articles.append({
+            'arxiv_id': doc['arxiv_id'], 'title': doc['title'], 'authors': doc['authors'],
+            'abstract': doc['abstract'], 'date': '2024-01-01', 'updated': '2024-01-02',
+            'categories': ['cs.DB'], 'html_url': '', 'pdf_url': '', 'abs_url': '', 'source': 'arxiv'
+        })
+        for idx, (text, lower) in enumerate(zip(doc['paragraphs'], doc['paragraphs_lower'])):
+            paragraphs.append({'index': idx, 'text': text, 'text_lower': lower})
+        for t in range(TABLES_PER_ARTICLE):
+            tables.append({
+                'table_id': f"{doc['arxiv_id']}_table_{t}", 'paper_id': doc['arxiv_id'], 'source': 'arxiv',
+                'caption': doc['title'], 'body': doc['abstract'], 'structure': None,
+                'mentions': doc['paragraphs'][:2], 'context_paragraphs': doc['paragraphs'][2:4],
+                'position': t, 'terms': []
+            })
+        for f in range(FIGURES_PER_ARTICLE):
+            figures.append({
+                'figure_id': f"{doc['arxiv_id']}_fig_{f}", 'paper_id': doc['arxiv_id'], 'source': 'arxiv',
+                'url': doc['title'], 'caption': doc['title'], 'mentions': doc['paragraphs'][:2],
+                'context_paragraphs': doc['paragraphs'][2:4], 'position': f
+            })
+    return articles, paragraphs, tables, figures
+
+
+def build_records(corpus: List[Dict]) -> Tuple[List, List, List, List]:
+    """Stesse strutture con i record di models/records.py."""
+    articles, paragraphs, tables, figures = [], [], [], []
+    for doc in corpus:
+        articles.append(ArticleRecord(
+            arxiv_id=doc['arxiv_id'], title=doc['title'], authors=doc['authors'],
+            abstract=doc['abstract'], date='2024-01-01', updated='2024-01-02',
+            categories=['cs.DB'], html_url='', pdf_url='', abs_url='', source='arxiv'
+        ))
+        for idx, text in enumerate(doc['paragraphs']):
+            paragraphs.append(Paragraph(idx, text))
+        for t in range(TABLES_PER_ARTICLE):
+            tables.append(TableRecord(
+                table_id=f"{doc['arxiv_id']}_table_{t}", paper_id=doc['arxiv_id'], source='arxiv',
+                caption=doc['title'], body=doc['abstract'], structure=None,
+                mentions=doc['paragraphs'][:2], context_paragraphs=doc['paragraphs'][2:4],
+                position=t, terms=[]
+            ))
+        for f in range(FIGURES_PER_ARTICLE):
+            figures.append(FigureRecord(
+                figure_id=f"{doc['arxiv_id']}_fig_{f}", paper_id=doc['arxiv_id'], source='arxiv',
+                url=doc['title'], caption=doc['title'], mentions=doc['paragraphs'][:2],
+                context_paragraphs=doc['paragraphs'][2:4], position=f
+            ))
+    return articles, paragraphs, tables, figures
+
+
+def measure(build: Callable, corpus: List[Dict]) -> Dict[str, float]:
+    """Memoria allocata (MB), tempo di gc.collect() e di json.dumps (ms)."""
+    gc.collect()
+    tracemalloc.start()
+    data = build(corpus)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    articles, _, tables, figures = data
+    gc_ms = json_ms = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        gc.collect()
+        gc_ms = min(gc_ms, (time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        json.dumps([articles, tables, figures], default=json_default)
+        json_ms = min(json_ms, (time.perf_counter() - start) * 1000)
+
+    return {
+        'objects': sum(len(part) for part in data),
+        'mb': allocated / 1024 / 1024,
+        'gc_ms': gc_ms,
+        'json_ms': json_ms
+    }
+
+
+def run_benchmark(n_articles: int, n_paragraphs: int):
+    corpus = synthetic_strings(n_articles, n_paragraphs)
+    print(f"[INFO] Corpus sintetico: {n_articles} articoli, {n_paragraphs} paragrafi per articolo, "
+          f"{TABLES_PER_ARTICLE} tabelle e {FIGURES_PER_ARTICLE} figure per articolo")
+
+    results = {}
+    print(f"{'struttura':<10} | {'oggetti':>9} | {'memoria MB':>10} | {'gc ms':>8} | {'json ms':>8}")
+    print("-" * 56)
+    for name, build in (("dict", build_dicts), ("record", build_records)):
+        stats = measure(build, corpus)
+        results[name] = stats
+        print(f"{name:<10} | {stats['objects']:>9} | {stats['mb']:>10.1f} | "
+              f"{stats['gc_ms']:>8.1f} | {stats['json_ms']:>8.1f}")
+
+    saving = 1 - results['record']['mb'] / results['dict']['mb']
+    print(f"[STATS] Record: {saving:.0%} di memoria in meno rispetto ai dizionari")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark di memoria dei record della pipeline")
+    parser.add_argument('--articles', type=int, default=2000, help="Articoli sintetici")
+    parser.add_argument('--paragraphs', type=int, default=60, help="Paragrafi per articolo")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Records Memory Benchmark - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+    run_benchmark(args.articles, args.paragraphs)
+
+
+if __name__ == "__main__":
+    main()
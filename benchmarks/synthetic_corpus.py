@@ -0,0 +1,292 @@
+"""
+Corpus sintetico e deterministico per i benchmark.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Genera documenti con la struttura di quelli scaricati dalla pipeline, senza
+accesso alla rete:
+
+- arXiv: HTML come quello prodotto da LaTeXML (ltx_page_content, sezioni,
+  paragrafi ltx_para/ltx_p con formule MathML, tabelle in figure.ltx_table con
+  ltx_tabular, valori numerici e unità, figure ltx_figure con sotto-figure a
+  pannelli e citazioni "Table N"/"Figure N"/"Fig. N" nel testo);
+- PubMed Central: XML JATS come da efetch (<sec>, <p> con
+  <xref ref-type="table|fig|bibr">, <table-wrap>, <fig> con <graphic xlink:href>).
+
+A parità di seed e parametri il contenuto è identico byte per byte: i
+risultati dei benchmark sono confrontabili tra commit diversi.
+
+Uso:
+    python benchmarks/synthetic_corpus.py --out data/synthetic --arxiv 50 --pubmed 50
+    (<out>/arxiv e <out>/pubmed hanno la struttura di data/arxiv e data/pubmed)
+"""
+
+import os
+import sys
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.records import ArticleRecord
+
+DEFAULT_SEED = 42
+
+# Vocabolario dei testi (termini informativi ripetuti tra caption e paragrafi)
+VOCABULARY = (
+    "query latency throughput index join optimizer buffer cache vector scan hash "
+    "table cardinality estimation selectivity predicate partition shard replica "
+    "transaction isolation snapshot compaction column store compression encoding "
+    "benchmark workload skew memory bandwidth parallel operator pipeline cost model "
+    "patients cohort treatment dosage clinical outcome protein expression sample "
+    "significant baseline accuracy precision recall dataset training inference"
+).split()
+FILLER = "the of and in with for on to a is are by that this we from as".split()
+METRICS = (("Latency", "ms"), ("Throughput", "ops/s"), ("Accuracy", "%"), ("Memory", "MB"),
+           ("Time", "s"), ("Dose", "mg"), ("Recall", "%"))
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    tokens = [rng.choice(VOCABULARY) if rng.random() < 0.45 else rng.choice(FILLER) for _ in range(words)]
+    return ' '.join(tokens).capitalize() + '.'
+
+
+def _text(rng: random.Random, sentences: int) -> str:
+    return ' '.join(_sentence(rng, rng.randint(8, 22)) for _ in range(sentences))
+
+
+def _caption_terms(rng: random.Random) -> str:
+    return ' '.join(rng.sample(VOCABULARY, 6))
+
+
+def _table_rows(rng: random.Random, rows: int, cols: int) -> Tuple[List[str], List[List[str]]]:
+    metrics = [METRICS[(i + rng.randrange(len(METRICS))) % len(METRICS)] for i in range(cols - 1)]
+    header = ["Method"] + [f"{name} ({unit})" for name, unit in metrics]
+    body = []
+    for r in range(rows):
+        cells = [f"{rng.choice(VOCABULARY)}-{r}"]
+        for _, unit in metrics:
+            value = rng.uniform(0.5, 1000.0)
+            cells.append(f"{value:.1f}" if unit != '%' else f"{value % 100:.1f}%")
+        body.append(cells)
+    return header, body
+
+
+def _interleave(rng: random.Random, blocks: List[str], floats: List[str]) -> List[str]:
+    """Inserisce tabelle e figure tra i paragrafi in punti casuali, nell'ordine di numerazione."""
+    slots = sorted(rng.randrange(len(blocks) + 1) for _ in floats)
+    result, previous = [], 0
+    for slot, block in zip(slots, floats):
+        result.extend(blocks[previous:slot])
+        result.append(block)
+        previous = slot
+    result.extend(blocks[previous:])
+    return result
+
+
+def _math(rng: random.Random) -> str:
+    return (f'<math class="ltx_Math" alttext="x_{{{rng.randint(1, 9)}}}"><semantics><mrow>'
+            f'<msub><mi>x</mi><mn>{rng.randint(1, 9)}</mn></msub><mo>=</mo><mn>{rng.randint(1, 99)}</mn>'
+            f'</mrow></semantics></math>')
+
+
+def _arxiv_paragraph(rng: random.Random, n_tables: int, n_figures: int) -> str:
+    parts = [_text(rng, rng.randint(2, 5))]
+    if n_tables and rng.random() < 0.25:
+        t = rng.randint(1, n_tables)
+        parts.append(f'As reported in <a class="ltx_ref" href="#S1.T{t}">Table {t}</a>, '
+                     f'{_sentence(rng, 10).lower()}')
+    if n_figures and rng.random() < 0.25:
+        ref = rng.choice(("Figure", "Fig."))
+        parts.append(f'{ref} {rng.randint(1, n_figures)} shows {_sentence(rng, 9).lower()}')
+    if rng.random() < 0.3:
+        parts.append(f'We set {_math(rng)} in all runs.')
+    return f'<div class="ltx_para"><p class="ltx_p">{" ".join(parts)}</p></div>'
+
+
+def _arxiv_table(rng: random.Random, number: int, rows: int) -> str:
+    header, body = _table_rows(rng, rows, rng.randint(3, 6))
+    head = ''.join(f'<th class="ltx_td ltx_th">{cell}</th>' for cell in header)
+    rows_html = ''.join('<tr class="ltx_tr">' + ''.join(f'<td class="ltx_td">{c}</td>' for c in cells) + '</tr>'
+                        for cells in body)
+    return (f'<figure class="ltx_table" id="S1.T{number}">'
+            f'<figcaption class="ltx_caption"><span class="ltx_tag">Table {number}: </span>'
+            f'{_caption_terms(rng)}</figcaption><div class="ltx_inline-block">'
+            f'<table class="ltx_tabular"><thead><tr class="ltx_tr">{head}</tr></thead>'
+            f'<tbody>{rows_html}</tbody></table></div></figure>')
+
+
+def _arxiv_figure(rng: random.Random, number: int, panels: int) -> str:
+    caption = (f'<figcaption class="ltx_caption"><span class="ltx_tag">Figure {number}: </span>'
+               f'{_caption_terms(rng)}</figcaption>')
+    if panels <= 1:
+        return (f'<figure class="ltx_figure" id="S2.F{number}"><img class="ltx_graphics" '
+                f'src="x{number}.png" width="600" height="400" alt=""/>{caption}</figure>')
+    cells = []
+    for p in range(1, panels + 1):
+        letter = chr(ord('a') + p - 1)
+        # Un pannello su tre è un SVG incluso con <object>
+        media = (f'<object data="x{number}{letter}.svg" type="image/svg+xml"></object>' if p % 3 == 0
+                 else f'<img class="ltx_graphics" src="x{number}{letter}.png" width="300" height="200" alt=""/>')
+        cells.append(f'<div class="ltx_flex_cell"><figure class="ltx_figure ltx_figure_panel" '
+                     f'id="S2.F{number}.sf{p}">{media}<figcaption class="ltx_caption">({letter}) '
+                     f'{_caption_terms(rng)}</figcaption></figure></div>')
+    return (f'<figure class="ltx_figure" id="S2.F{number}"><div class="ltx_flex_figure">'
+            f'{"".join(cells)}</div>{caption}</figure>')
+
+
+def arxiv_html(paper_id: str, paragraphs: int = 60, tables: int = 4, figures: int = 5,
+               panels: int = 3, rows: int = 12, seed: int = DEFAULT_SEED) -> bytes:
+    """
+    Pagina HTML LaTeXML sintetica di un articolo arXiv.
+
+    Args:
+        panels: pannelli delle figure con sotto-figure (una figura su due)
+        rows: righe di ogni tabella
+    """
+    rng = random.Random(f"{seed}:{paper_id}")
+    blocks = [_arxiv_paragraph(rng, tables, figures) for _ in range(paragraphs)]
+    # Tabelle e figure distribuite nel testo
+    blocks = _interleave(rng, blocks, [_arxiv_table(rng, n, rows) for n in range(1, tables + 1)])
+    blocks = _interleave(rng, blocks, [_arxiv_figure(rng, n, panels if n % 2 == 0 else 1)
+                                       for n in range(1, figures + 1)])
+
+    per_section = max(1, len(blocks) // 6)
+    sections = ''.join(
+        f'<section class="ltx_section" id="S{s + 1}"><h2 class="ltx_title">{s + 1} '
+        f'{_caption_terms(rng).title()}</h2>{"".join(blocks[start:start + per_section])}</section>'
+        for s, start in enumerate(range(0, len(blocks), per_section))
+    )
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"/><title>{paper_id}</title>'
+            f'<link rel="stylesheet" href="ltx-article.css"/><script>var paper = "{paper_id}";</script>'
+            f'</head><body><nav class="ltx_page_navbar">arXiv</nav><div class="ltx_page_main">'
+            f'<div class="ltx_page_content"><article class="ltx_document">'
+            f'<h1 class="ltx_title ltx_title_document">{_caption_terms(rng).title()}</h1>'
+            f'<div class="ltx_abstract"><p class="ltx_p">{_text(rng, 4)}</p></div>{sections}'
+            f'</article></div></div><footer class="ltx_page_footer">footer</footer></body></html>'
+            ).encode('utf-8')
+
+
+def _jats_paragraph(rng: random.Random, n_tables: int, n_figures: int) -> str:
+    parts = [_text(rng, rng.randint(2, 5))]
+    if rng.random() < 0.4:
+        parts.append(f'<xref ref-type="bibr" rid="B{rng.randint(1, 30)}">{rng.randint(1, 30)}</xref>.')
+    if n_tables and rng.random() < 0.25:
+        t = rng.randint(1, n_tables)
+        parts.append(f'Results are in <xref ref-type="table" rid="T{t}">Table {t}</xref>.')
+    if n_figures and rng.random() < 0.25:
+        f = rng.randint(1, n_figures)
+        parts.append(f'See <xref ref-type="fig" rid="F{f}">Figure {f}</xref>.')
+    return f'<p>{" ".join(parts)}</p>'
+
+
+def _jats_table(rng: random.Random, number: int, rows: int) -> str:
+    header, body = _table_rows(rng, rows, rng.randint(3, 6))
+    head = ''.join(f'<th>{cell}</th>' for cell in header)
+    rows_xml = ''.join('<tr>' + ''.join(f'<td>{c}</td>' for c in cells) + '</tr>' for cells in body)
+    return (f'<table-wrap id="T{number}" position="float"><label>Table {number}</label>'
+            f'<caption><p>{_caption_terms(rng)}</p></caption><table frame="hsides">'
+            f'<thead><tr>{head}</tr></thead><tbody>{rows_xml}</tbody></table></table-wrap>')
+
+
+def _jats_figure(rng: random.Random, pmc_id: str, number: int) -> str:
+    return (f'<fig id="F{number}" position="float"><label>Figure {number}</label>'
+            f'<caption><title>{_caption_terms(rng)}</title><p>{_sentence(rng, 12)}</p></caption>'
+            f'<graphic xlink:href="{pmc_id.lower()}-g{number:03d}"/></fig>')
+
+
+def jats_xml(pmc_id: str, paragraphs: int = 60, tables: int = 4, figures: int = 5,
+             rows: int = 12, seed: int = DEFAULT_SEED) -> bytes:
+    """XML JATS sintetico di un articolo PubMed Central (come restituito da efetch)."""
+    rng = random.Random(f"{seed}:{pmc_id}")
+    blocks = [_jats_paragraph(rng, tables, figures) for _ in range(paragraphs)]
+    blocks = _interleave(rng, blocks, [_jats_table(rng, n, rows) for n in range(1, tables + 1)])
+    blocks = _interleave(rng, blocks, [_jats_figure(rng, pmc_id, n) for n in range(1, figures + 1)])
+
+    per_section = max(1, len(blocks) // 5)
+    sections = ''.join(
+        f'<sec id="s{s + 1}"><title>{_caption_terms(rng).title()}</title>'
+        f'{"".join(blocks[start:start + per_section])}</sec>'
+        for s, start in enumerate(range(0, len(blocks), per_section))
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><pmc-articleset><article '
+            f'xmlns:xlink="http://www.w3.org/1999/xlink" article-type="research-article"><front>'
+            f'<article-meta><article-id pub-id-type="pmc">{pmc_id}</article-id><title-group>'
+            f'<article-title>{_caption_terms(rng).title()}</article-title></title-group>'
+            f'<contrib-group><contrib contrib-type="author"><name><surname>Rossi</surname>'
+            f'<given-names>Anna</given-names></name></contrib></contrib-group>'
+            f'<abstract><p>{_text(rng, 4)}</p></abstract></article-meta></front>'
+            f'<body>{sections}</body><back><ref-list>'
+            + ''.join(f'<ref id="B{i}"><mixed-citation>Ref {i}</mixed-citation></ref>' for i in range(1, 31))
+            + '</ref-list></back></article></pmc-articleset>').encode('utf-8')
+
+
+def article_record(source: str, paper_id: str, seed: int = DEFAULT_SEED) -> ArticleRecord:
+    """Metadati sintetici di un articolo, con i campi degli scraper arXiv o PubMed."""
+    rng = random.Random(f"{seed}:meta:{paper_id}")
+    record = ArticleRecord(
+        source=source, title=_caption_terms(rng).title(),
+        authors=[f"Author {rng.randint(1, 500)}" for _ in range(rng.randint(1, 6))],
+        abstract=_text(rng, 5), full_text=_text(rng, 200)
+    )
+    if source == 'arxiv':
+        record.arxiv_id = paper_id
+        record.date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        record.categories = rng.sample(['cs.DB', 'cs.IR', 'cs.DS', 'cs.LG'], 2)
+        record.abs_url = f"https://arxiv.org/abs/{paper_id}"
+        record.html_url = f"https://arxiv.org/html/{paper_id}"
+        record.html_available = True
+    else:
+        record.pmc_id = paper_id
+        record.date = f"2023 Jan {rng.randint(1, 28)}"
+        record.url = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{paper_id}/"
+    return record
+
+
+def synthetic_corpus(n_arxiv: int = 20, n_pubmed: int = 20, seed: int = DEFAULT_SEED,
+                     **options) -> List[Tuple[str, str, bytes]]:
+    """
+    Documenti sintetici come (fonte, id, contenuto).
+    options: paragraphs, tables, figures, rows (e panels per arXiv).
+    """
+    jats_options = {k: v for k, v in options.items() if k != 'panels'}
+    docs = [('arxiv', f"2401.{i:05d}", arxiv_html(f"2401.{i:05d}", seed=seed, **options))
+            for i in range(n_arxiv)]
+    docs += [('pubmed', f"PMC{9000000 + i}", jats_xml(f"PMC{9000000 + i}", seed=seed, **jats_options))
+             for i in range(n_pubmed)]
+    return docs
+
+
+def write_corpus(directory, n_arxiv: int = 20, n_pubmed: int = 20, seed: int = DEFAULT_SEED,
+                 **options) -> Dict[str, int]:
+    """Scrive il corpus come i file scaricati: <dir>/arxiv/<id>.html e <dir>/pubmed/<id>.xml."""
+    directory = Path(directory)
+    counts = {'arxiv': 0, 'pubmed': 0}
+    for source, paper_id, content in synthetic_corpus(n_arxiv, n_pubmed, seed, **options):
+        extension = '.html' if source == 'arxiv' else '.xml'
+        path = directory / source / f"{paper_id}{extension}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        counts[source] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un corpus sintetico arXiv/PubMed")
+    parser.add_argument('--out', required=True, help="Directory di destinazione")
+    parser.add_argument('--arxiv', type=int, default=20, help="Articoli arXiv (HTML LaTeXML)")
+    parser.add_argument('--pubmed', type=int, default=20, help="Articoli PubMed (XML JATS)")
+    parser.add_argument('--paragraphs', type=int, default=60, help="Paragrafi per articolo")
+    parser.add_argument('--tables', type=int, default=4, help="Tabelle per articolo")
+    parser.add_argument('--figures', type=int, default=5, help="Figure per articolo")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    counts = write_corpus(args.out, args.arxiv, args.pubmed, args.seed, paragraphs=args.paragraphs,
+                          tables=args.tables, figures=args.figures)
+    print(f"[OK] Corpus sintetico in {args.out}: {counts['arxiv']} arXiv, {counts['pubmed']} PubMed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark dell'estrazione del testo completo: lxml contro BeautifulSoup.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Usa i documenti già scaricati (data/arxiv/*.html*, data/pubmed/*.xml*); se
+non ce ne sono genera pagine sintetiche con la struttura LaTeXML/JATS.
+Per ogni documento misura il percorso precedente degli scraper
+(BeautifulSoup 'lxml' / 'lxml-xml' + get_text) e quello attuale
+(extractors/text_extractor.py) e verifica che il testo estratto coincida.
+
+Uso:
+    python benchmarks/text_extraction_benchmark.py
+    python benchmarks/text_extraction_benchmark.py --limit 50 --repeat 5
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import warnings
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ARXIV_DATA_DIR, PUBMED_DATA_DIR
+from storage.raw_archive import list_raw, read_raw
+from extractors.text_extractor import arxiv_full_text, jats_document
+
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+SYNTHETIC_DOCUMENTS = 20
+
+
+# ---------- percorso BeautifulSoup (come negli scraper prima di lxml) ----------
+
+def soup_arxiv_text(content: bytes):
+    soup = BeautifulSoup(content.decode('utf-8', errors='replace'), 'lxml')
+    if not (soup.find('div', class_='ltx_page_content') or soup.find('article')):
+        return None
+    for element in soup(['script', 'style', 'nav', 'header', 'footer']):
+        element.decompose()
+    main_content = soup.find('div', class_='ltx_page_content') or soup.find('article') or soup.find('body')
+    if not main_content:
+        return ""
+    return re.sub(r'\s+', ' ', main_content.get_text(separator=' ', strip=True))
+
+
+def soup_pubmed_text(content: bytes):
+    soup = BeautifulSoup(content, 'lxml-xml')
+    body = soup.find('body')
+    if not body:
+        return None
+    return re.sub(r'\s+', ' ', body.get_text(separator=' ', strip=True))
+
+
+def lxml_pubmed_text(content: bytes):
+    return jats_document(content)['full_text']
+
+
+# ---------- documenti ----------
+
+def synthetic_arxiv(n: int) -> bytes:
+    sections = []
+    for s in range(30):
+        paragraphs = ''.join(
+            f'<div class="ltx_para"><p class="ltx_p">Paragraph {s}.{p} on <em>query</em> '
+            f'optimization with <math><mi>x</mi><mo>=</mo><mn>{p}</mn></math> cost.</p></div>'
+            for p in range(8)
+        )
+        sections.append(f'<section class="ltx_section"><h2>Section {s}</h2>{paragraphs}'
+                        f'<script>var s{s} = {s};</script></section>')
+    return (f'<html><head><style>p {{ margin: 0 }}</style></head><body><header>arXiv</header>'
+            f'<nav>menu</nav><div class="ltx_page_content"><article class="ltx_document">'
+            f'<h1>Paper {n}</h1>{"".join(sections)}</article></div><footer>footer</footer>'
+            f'</body></html>').encode('utf-8')
+
+
+def synthetic_pubmed(n: int) -> bytes:
+    sections = ''.join(
+        f'<sec id="s{s}"><title>Section {s}</title>'
+        + ''.join(f'<p>Paragraph {s}.{p} cites <xref ref-type="bibr" rid="r{p}">{p}</xref> '
+                  f'and <xref ref-type="table" rid="t{s}">Table {s}</xref>.</p>' for p in range(8))
+        + '</sec>'
+        for s in range(30)
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><pmc-articleset><article '
+            f'xmlns:xlink="http://www.w3.org/1999/xlink"><front><article-meta><contrib-group>'
+            f'<contrib contrib-type="author"><name><surname>Rossi</surname><given-names>Anna'
+            f'</given-names></name></contrib></contrib-group><abstract><p>Abstract {n}</p>'
+            f'</abstract></article-meta></front><body>{sections}</body></article>'
+            f'</pmc-articleset>').encode('utf-8')
+
+
+def load_documents(directory, make_synthetic: Callable[[int], bytes],
+                   limit: int) -> Tuple[List[bytes], str]:
+    """Documenti salvati (fino a `limit`), o sintetici se la directory è vuota."""
+    documents = [read_raw(path) for _, path in list_raw(directory)[:limit]]
+    if documents:
+        return documents, "salvati"
+    return [make_synthetic(n) for n in range(min(limit, SYNTHETIC_DOCUMENTS))], "sintetici"
+
+
+def measure(extract, documents: List[bytes], repeat: int) -> Tuple[Dict[str, float], List]:
+    """Tempi per documento in millisecondi (migliore di `repeat` esecuzioni) e risultati."""
+    timings = []
+    results = []
+    for content in documents:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = extract(content)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best * 1000)
+        results.append(result)
+    timings = np.array(timings)
+    return {
+        "p50": float(np.percentile(timings, 50)),
+        "mean": float(timings.mean()),
+        "total": float(timings.sum())
+    }, results
+
+
+def run_benchmark(limit: int, repeat: int):
+    sources = [
+        ("arxiv", ARXIV_DATA_DIR, synthetic_arxiv, soup_arxiv_text, arxiv_full_text),
+        ("pubmed", PUBMED_DATA_DIR, synthetic_pubmed, soup_pubmed_text, lxml_pubmed_text),
+    ]
+
+    print(f"{'fonte':<7} | {'documenti':<14} | {'metodo':<6} | {'p50 ms':>8} | {'media ms':>8} | {'totale ms':>9}")
+    print("-" * 68)
+
+    for source, directory, make_synthetic, soup_extract, lxml_extract in sources:
+        documents, origin = load_documents(directory, make_synthetic, limit)
+        soup_stats, soup_results = measure(soup_extract, documents, repeat)
+        lxml_stats, lxml_results = measure(lxml_extract, documents, repeat)
+        label = f"{len(documents)} {origin}"
+        for method, stats in (("bs4", soup_stats), ("lxml", lxml_stats)):
+            print(f"{source:<7} | {label:<14} | {method:<6} | {stats['p50']:>8.2f} | "
+                  f"{stats['mean']:>8.2f} | {stats['total']:>9.1f}")
+
+        same = sum(a == b for a, b in zip(soup_results, lxml_results))
+        speedup = soup_stats['total'] / lxml_stats['total'] if lxml_stats['total'] else float('inf')
+        print(f"[STATS] {source}: lxml {speedup:.1f}x più veloce, "
+              f"testo identico in {same}/{len(documents)} documenti")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dell'estrazione del testo completo")
+    parser.add_argument('--limit', type=int, default=200, help="Documenti massimi per fonte")
+    parser.add_argument('--repeat', type=int, default=3, help="Ripetizioni per documento")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Text Extraction Benchmark - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+    run_benchmark(args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
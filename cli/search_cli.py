@@ -4,7 +4,7 @@ Ingegneria dei Dati 2025/2026 - Homework 5
 
 Funzionalità:
 - Ricerca articoli (titolo, autori, abstract, full-text)
-- Ricerca tabelle (caption, body, mentions, context)
+- Ricerca tabelle (caption, body, mentions, context, predicati numerici sulle celle)
 - Ricerca figure (caption, mentions, context)
 - Ricerca booleana e full-text
 - Visualizzazione risultati formattata
@@ -15,7 +15,6 @@ import sys
 import cmd
 from typing import Dict, List, Optional
 
-from elasticsearch import Elasticsearch
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -25,17 +24,24 @@ from rich.syntax import Syntax
 # Aggiungi il path principale al PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
-    ELASTICSEARCH_URL, INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES
+    ELASTICSEARCH_URL, INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES,
+    PAPER_FIELDS, TABLE_FIELDS, FIGURE_FIELDS
 )
+from search.backends import get_search_backend
+from search.table_query import table_query_filters
 
 
 class SearchEngine:
     """Motore di ricerca per articoli, tabelle e figure."""
     
     def __init__(self):
-        self.es = Elasticsearch(ELASTICSEARCH_URL)
-        if not self.es.ping():
-            raise ConnectionError(f"Impossibile connettersi a Elasticsearch: {ELASTICSEARCH_URL}")
+        # Elasticsearch se raggiungibile, altrimenti indice locale BM25
+        self.backend = get_search_backend()
+        if not self.backend.is_available():
+            raise ConnectionError(
+                f"Nessun backend disponibile: Elasticsearch ({ELASTICSEARCH_URL}) "
+                f"non raggiungibile e indice locale vuoto"
+            )
     
     def search_papers(
         self,
@@ -54,39 +60,10 @@ class SearchEngine:
             source_filter: "arxiv" o "pubmed" per filtrare
         """
         if fields is None:
-            fields = ["title^3", "abstract^2", "full_text", "authors"]
-        
-        body = {
-            "query": {
-                "bool": {
-                    "must": [
-                        {
-                            "multi_match": {
-                                "query": query,
-                                "fields": fields,
-                                "type": "best_fields",
-                                "fuzziness": "AUTO"
-                            }
-                        }
-                    ]
-                }
-            },
-            "size": size,
-            "highlight": {
-                "fields": {
-                    "title": {},
-                    "abstract": {"fragment_size": 200},
-                    "full_text": {"fragment_size": 200}
-                }
-            }
-        }
-        
-        if source_filter:
-            body["query"]["bool"]["filter"] = [
-                {"term": {"source": source_filter}}
-            ]
+            fields = PAPER_FIELDS
         
-        return self.es.search(index=INDEX_PAPERS, body=body)
+        filters = [{"term": {"source": source_filter}}] if source_filter else None
+        return self.backend.search(INDEX_PAPERS, query, fields, size, filters=filters)
     
     def search_tables(
         self,
@@ -98,33 +75,16 @@ class SearchEngine:
         Cerca nelle tabelle.
         
         Args:
-            query: Stringa di ricerca
+            query: Stringa di ricerca, anche con predicati numerici (es. "speedup > 2x join")
             fields: Campi su cui cercare
             size: Numero massimo di risultati
         """
         if fields is None:
-            fields = ["caption^3", "body^2", "mentions", "context_paragraphs"]
-        
-        body = {
-            "query": {
-                "multi_match": {
-                    "query": query,
-                    "fields": fields,
-                    "type": "best_fields",
-                    "fuzziness": "AUTO"
-                }
-            },
-            "size": size,
-            "highlight": {
-                "fields": {
-                    "caption": {},
-                    "body": {"fragment_size": 200},
-                    "mentions": {"fragment_size": 200}
-                }
-            }
-        }
+            fields = TABLE_FIELDS
         
-        return self.es.search(index=INDEX_TABLES, body=body)
+        # Predicati numerici ("latency < 10 ms") come filtri nested, il resto come testo
+        text_query, _, filters = table_query_filters(query)
+        return self.backend.search(INDEX_TABLES, text_query, fields, size, filters=filters)
     
     def search_figures(
         self,
@@ -141,27 +101,9 @@ class SearchEngine:
             size: Numero massimo di risultati
         """
         if fields is None:
-            fields = ["caption^3", "mentions^2", "context_paragraphs"]
-        
-        body = {
-            "query": {
-                "multi_match": {
-                    "query": query,
-                    "fields": fields,
-                    "type": "best_fields",
-                    "fuzziness": "AUTO"
-                }
-            },
-            "size": size,
-            "highlight": {
-                "fields": {
-                    "caption": {},
-                    "mentions": {"fragment_size": 200}
-                }
-            }
-        }
+            fields = FIGURE_FIELDS
         
-        return self.es.search(index=INDEX_FIGURES, body=body)
+        return self.backend.search(INDEX_FIGURES, query, fields, size)
     
     def boolean_search(
         self,
@@ -181,47 +123,20 @@ class SearchEngine:
             index: Indice su cui cercare
             size: Numero massimo di risultati
         """
-        bool_query = {"bool": {}}
-        
-        if must_terms:
-            bool_query["bool"]["must"] = [
-                {"match": {"_all": term}} if index == INDEX_PAPERS 
-                else {"multi_match": {"query": term, "fields": ["*"]}}
-                for term in must_terms
-            ]
-        
-        if should_terms:
-            bool_query["bool"]["should"] = [
-                {"match": {"_all": term}} if index == INDEX_PAPERS 
-                else {"multi_match": {"query": term, "fields": ["*"]}}
-                for term in should_terms
-            ]
-            bool_query["bool"]["minimum_should_match"] = 1
-        
-        if must_not_terms:
-            bool_query["bool"]["must_not"] = [
-                {"match": {"_all": term}} if index == INDEX_PAPERS 
-                else {"multi_match": {"query": term, "fields": ["*"]}}
-                for term in must_not_terms
-            ]
-        
-        body = {
-            "query": bool_query,
-            "size": size
-        }
-        
-        return self.es.search(index=index, body=body)
+        return self.backend.boolean_search(
+            index, must_terms or [], should_terms or [], must_not_terms or [], size
+        )
     
     def get_stats(self) -> Dict:
         """Restituisce statistiche sugli indici."""
         stats = {}
         for index in [INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES]:
             try:
-                if self.es.indices.exists(index=index):
-                    stats[index] = self.es.count(index=index)['count']
+                if self.backend.index_exists(index):
+                    stats[index] = self.backend.count(index)
                 else:
                     stats[index] = 0
-            except:
+            except Exception:
                 stats[index] = 0
         return stats
 
@@ -229,15 +144,15 @@ class SearchEngine:
 class SearchCLI(cmd.Cmd):
     """Interfaccia a riga di comando per il sistema di ricerca."""
     
-        intro = """
+    intro = """
 ==================================================================
-    Sistema di Ricerca Articoli Scientifici - Homework 5
-    Ingegneria dei Dati 2025/2026
+  Sistema di Ricerca Articoli Scientifici - Homework 5
+  Ingegneria dei Dati 2025/2026
 ==================================================================
 
 Comandi disponibili:
-    papers <query>    - Cerca negli articoli
-    tables <query>    - Cerca nelle tabelle
+  papers <query>    - Cerca negli articoli
+  tables <query>    - Cerca nelle tabelle
   figures <query>   - Cerca nelle figure
   bool <query>      - Ricerca booleana (usa AND, OR, NOT)
   stats             - Mostra statistiche
@@ -247,6 +162,7 @@ Comandi disponibili:
 Esempi:
   papers query optimization
   tables performance results
+  tables latency < 10 ms hash join
   figures neural network architecture
   bool query AND optimization NOT distributed
 """
@@ -257,7 +173,7 @@ Esempi:
         self.console = Console()
         try:
             self.engine = SearchEngine()
-            self.console.print("[green]Connesso a Elasticsearch[/green]")
+            self.console.print(f"[green]Backend di ricerca: {self.engine.backend.name}[/green]")
         except ConnectionError as e:
             self.console.print(f"[red]Errore: {e}[/red]")
             self.engine = None
@@ -269,7 +185,7 @@ Esempi:
             return
         
         if not self.engine:
-            self.console.print("[red]Elasticsearch non disponibile[/red]")
+            self.console.print("[red]Backend di ricerca non disponibile[/red]")
             return
         
         try:
@@ -285,7 +201,7 @@ Esempi:
             return
         
         if not self.engine:
-            self.console.print("[red]Elasticsearch non disponibile[/red]")
+            self.console.print("[red]Backend di ricerca non disponibile[/red]")
             return
         
         try:
@@ -301,7 +217,7 @@ Esempi:
             return
         
         if not self.engine:
-            self.console.print("[red]Elasticsearch non disponibile[/red]")
+            self.console.print("[red]Backend di ricerca non disponibile[/red]")
             return
         
         try:
@@ -317,7 +233,7 @@ Esempi:
             return
         
         if not self.engine:
-            self.console.print("[red]Elasticsearch non disponibile[/red]")
+            self.console.print("[red]Backend di ricerca non disponibile[/red]")
             return
         
         # Parse della query booleana
@@ -359,7 +275,7 @@ Esempi:
     def do_stats(self, arg: str):
         """Mostra statistiche degli indici"""
         if not self.engine:
-            self.console.print("[red]Elasticsearch non disponibile[/red]")
+            self.console.print("[red]Backend di ricerca non disponibile[/red]")
             return
         
         try:
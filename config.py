@@ -53,6 +53,24 @@ REQUEST_DELAY = 1.5  # Delay tra richieste (secondi) per rispettare rate limits
 REQUEST_TIMEOUT = 15  # Timeout per richieste HTTP (ridotto per evitare blocchi)
 MAX_RETRIES = 3  # Numero massimo di tentativi per richiesta
 
+# Intervallo minimo (secondi) tra richieste allo stesso host, condiviso da tutti i thread
+HOST_MIN_INTERVALS = {
+    "export.arxiv.org": 3.0,  # API arXiv: una richiesta ogni 3 secondi
+    "eutils.ncbi.nlm.nih.gov": 0.34,  # E-utilities: 3 richieste/s senza API key
+}
+SEARCH_WORKERS = 4  # Ricerche per keyword eseguite in parallelo
+# arXiv elenca un articolo giorni dopo la sottomissione: il mark incrementale arretra
+# di tanti giorni rispetto alla sottomissione più recente vista (i doppioni sono scartati)
+ARXIV_LISTING_LAG_DAYS = 3
+
+# Client HTTP condiviso: backoff, circuit breaker e concorrenza adattiva per host
+BACKOFF_BASE = 1.0  # Primo backoff (secondi), raddoppia a ogni tentativo (con jitter)
+BACKOFF_MAX = 60.0  # Backoff massimo, anche per Retry-After
+CIRCUIT_FAILURE_THRESHOLD = 5  # Errori consecutivi che aprono il circuito di un host
+CIRCUIT_COOLDOWN = 60.0  # Secondi di circuito aperto prima di una richiesta di prova
+HOST_INITIAL_CONCURRENCY = 4  # Richieste contemporanee iniziali per host
+HOST_MAX_CONCURRENCY = 8  # Limite massimo (AIMD: +1 per successi, /2 su 429/503)
+
 # Headers per le richieste HTTP
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -61,6 +79,12 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.5",
 }
 
+# ============== PIPELINE STREAMING ==============
+PIPELINE_QUEUE_SIZE = 32  # Elementi massimi in coda tra due fasi (backpressure)
+EXTRACT_WORKERS = 2  # Thread di estrazione tabelle/figure
+BULK_CHUNK_SIZE = 100  # Documenti per richiesta bulk a Elasticsearch
+CHECKPOINT_CHUNK_SIZE = 20  # Articoli per blocco: dopo ogni blocco dati e checkpoint vanno su disco
+
 # ============== DATA DIRECTORIES ==============
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
@@ -74,6 +98,26 @@ FIGURES_DIR = DATA_DIR / "figures"
 for directory in [DATA_DIR, PAPERS_DIR, ARXIV_DATA_DIR, PUBMED_DATA_DIR, TABLES_DIR, FIGURES_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
+# Archivio SQLite dei metadati articoli (sostituisce arxiv_metadata.json / pubmed_metadata.json)
+ARTICLE_STORE_PATH = DATA_DIR / "articles.db"
+# Testi completi compressi (zstd/gzip), uno per articolo, referenziati dall'hash
+FULL_TEXT_DIR = DATA_DIR / "full_texts"
+# Immagini delle figure scaricate (opzionale, --fetch-figures), referenziate dall'hash
+FIGURE_ASSETS_DIR = DATA_DIR / "figure_assets"
+FIGURE_FETCH_WORKERS = 8  # Download di immagini in parallelo (rate limit per host condiviso)
+PHASH_MAX_DISTANCE = 6  # Bit diversi (su 64) entro cui due figure sono considerate la stessa
+
+# ============== SEARCH BACKEND ==============
+# "auto": Elasticsearch se raggiungibile, altrimenti indice locale BM25
+# "elasticsearch" / "local": forza il backend
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+LOCAL_INDEX_DIR = DATA_DIR / "local_index"
+
+# Campi di ricerca con boost (condivisi da Elasticsearch e indice locale)
+PAPER_FIELDS = ["title^3", "abstract^2", "full_text", "authors"]
+TABLE_FIELDS = ["caption^3", "body^2", "mentions", "context_paragraphs", "informative_terms^2"]
+FIGURE_FIELDS = ["caption^3", "mentions^2", "context_paragraphs", "informative_terms"]
+
 # ============== STOPWORDS (termini non informativi) ==============
 STOPWORDS_IT = {
     "il", "lo", "la", "i", "gli", "le", "un", "uno", "una", 
@@ -97,6 +141,12 @@ STOPWORDS_EN = {
 
 STOPWORDS = STOPWORDS_IT.union(STOPWORDS_EN)
 
+# ============== AUTOCOMPLETAMENTO ==============
+SUGGEST_MIN_PREFIX = 2  # Lunghezza minima del prefisso per i suggerimenti
+SUGGEST_MAX_RESULTS = 8  # Suggerimenti restituiti per tipo
+SUGGEST_CACHE_SIZE = 1024  # Prefissi mantenuti nella cache in-process
+SUGGEST_CACHE_TTL = 300  # Validità di un prefisso in cache (secondi)
+
 # ============== FLASK CONFIG ==============
 FLASK_HOST = "0.0.0.0"
 FLASK_PORT = 5000
@@ -7,16 +7,22 @@ Per ogni figura estrae:
 - Caption
 - Paragrafi che citano la figura
 - Paragrafi con termini presenti nella caption
+
+Nelle pagine LaTeXML di arXiv una figura può contenere sotto-figure
+(figure.ltx_figure annidate, con la propria figcaption) e immagini come
+<img>, <object>/<embed> (spesso SVG) o <svg> inline. Ogni <figure> di primo
+livello è visitata una volta: ogni immagine diventa un pannello, con la
+didascalia della sotto-figura che la contiene (subcaption). Una figura con una
+sola immagine resta un record senza campi del pannello, come prima.
 """
 
 import os
 import sys
 import json
 import re
-from typing import Dict, List, Optional, Set
+from typing import List, Optional, Set, Tuple, Union
 from urllib.parse import urljoin
 
-from lxml import html as lxml_html
 from lxml import etree
 from tqdm import tqdm
 import warnings
@@ -25,12 +31,25 @@ warnings.filterwarnings("ignore")
 # Costanti
 HTML_EXTENSION = '.html'
 
+# XPath precompilati (valutati una volta per figura)
+_top_figures = etree.XPath('//figure[not(ancestor::figure)]')
+_media = etree.XPath('.//img | .//object | .//embed | .//svg')
+_figcaptions = etree.XPath('.//figcaption')
+_caption_elements = etree.XPath('.//*[contains(@class, "caption")]')
+_text_blocks = etree.XPath('.//p | .//span | .//div')
+# Attributo con l'URL e media_type del record per ogni elemento immagine
+_MEDIA_SOURCES = {'img': ('src', None), 'object': ('data', 'object'), 'embed': ('src', 'object')}
+
 # Aggiungi il path principale al PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
     ARXIV_DATA_DIR, PUBMED_DATA_DIR, FIGURES_DIR, STOPWORDS,
     ARXIV_BASE_URL, PUBMED_BASE_URL
 )
+from storage.raw_archive import list_raw, read_raw, parse_document
+from extractors.jats_extractor import JatsDocument, is_jats
+from models.records import FigureRecord, json_default
+from extractors.paragraph_store import ParagraphStore
 
 
 class FigureExtractor:
@@ -39,21 +58,21 @@ class FigureExtractor:
     """
     
     def __init__(self):
-        self.figures: List[Dict] = []
+        self.figures: List[FigureRecord] = []
         self.figures_file = os.path.join(FIGURES_DIR, "figures_metadata.json")
     
     def extract_from_html(
         self, 
-        html_content: str, 
+        html_content: Union[bytes, str], 
         paper_id: str, 
         source: str,
         base_url: str
-    ) -> List[Dict]:
+    ) -> List[FigureRecord]:
         """
         Estrae tutte le figure da un documento HTML.
         
         Args:
-            html_content: Contenuto HTML dell'articolo
+            html_content: Contenuto HTML/XML dell'articolo (bytes o stringa)
             paper_id: ID dell'articolo
             source: "arxiv" o "pubmed"
             base_url: URL base per risolvere URL relativi
@@ -61,25 +80,48 @@ class FigureExtractor:
         Returns:
             Lista di figure estratte con contesto
         """
-        # Usa lxml per compatibilità con Python 3.14
+        # XML JATS (PubMed Central): percorso dedicato su lxml.etree
+        if is_jats(html_content):
+            try:
+                return self.extract_from_jats(JatsDocument(html_content), paper_id, source, base_url)
+            except Exception:
+                return []
+        
+        # Usa lxml per compatibilità con Python 3.14 (bytes dall'archivio o stringa)
         try:
-            doc = lxml_html.fromstring(html_content)
+            doc = parse_document(html_content)
         except Exception:
             return []
+        return self.extract_from_tree(doc, paper_id, source, base_url)
+    
+    def extract_from_tree(
+        self,
+        doc,
+        paper_id: str,
+        source: str,
+        base_url: str,
+        paragraphs: Optional[ParagraphStore] = None
+    ) -> List[FigureRecord]:
+        """
+        Estrae le figure da un documento HTML già parsato.
+        `paragraphs` permette di condividere i paragrafi con TableExtractor.
+        """
         figures = []
         
         # Estrai tutti i paragrafi per il contesto
-        paragraphs = self._extract_paragraphs(doc)
-        
-        # Metodo 1: Cerca elementi <figure>
-        figure_elements = doc.xpath('//figure')
+        if paragraphs is None:
+            paragraphs = self._extract_paragraphs(doc)
         
-        for idx, fig_elem in enumerate(figure_elements, 1):
-            figure_data = self._extract_figure_data(
-                fig_elem, paper_id, source, idx, paragraphs, base_url
-            )
-            if figure_data:
-                figures.append(figure_data)
+        # Metodo 1: Cerca elementi <figure> (le sotto-figure sono pannelli della figura esterna)
+        position = 0
+        for fig_elem in _top_figures(doc):
+            panels = self._find_panels(fig_elem, base_url)
+            if not panels:
+                continue
+            position += 1
+            figures.extend(self._extract_figure_data(
+                fig_elem, panels, paper_id, source, position, paragraphs
+            ))
         
         # Metodo 2: Cerca immagini con caption (se non abbiamo trovato figure)
         if not figures:
@@ -89,88 +131,156 @@ class FigureExtractor:
         
         return figures
     
-    def _extract_paragraphs(self, doc) -> List[Dict]:
+    def extract_from_jats(
+        self,
+        document: JatsDocument,
+        paper_id: str,
+        source: str,
+        base_url: str
+    ) -> List[FigureRecord]:
+        """
+        Estrae le figure (<fig> con <graphic xlink:href>) da un articolo JATS già parsato.
+        Le menzioni sono i paragrafi con <xref ref-type="fig" rid="id figura">.
+        """
+        figures = []
+        
+        position = 0
+        for fig in document.figures:
+            img_url = document.graphic_url(fig, base_url)
+            if not img_url:
+                continue
+            position += 1
+            
+            caption = document.caption(fig)
+            mentions = document.mentions_of(fig)
+            if not mentions:
+                # Articoli senza xref: citazioni testuali come per l'HTML
+                fig_ref = document.label(fig) or f"Figure {position}"
+                mentions = self._find_mentions(document.paragraphs, fig_ref, position)
+            
+            terms = self._extract_informative_terms(caption)
+            context_paragraphs = self._find_context_paragraphs(document.paragraphs, terms, mentions)
+            
+            figures.append(FigureRecord(
+                figure_id=f"{paper_id}_fig_{position}",
+                paper_id=paper_id,
+                source=source,
+                url=img_url,
+                caption=caption,
+                mentions=mentions[:10],
+                context_paragraphs=context_paragraphs,
+                position=position
+            ))
+        
+        return figures
+    
+    def _extract_paragraphs(self, doc) -> ParagraphStore:
         """Estrae tutti i paragrafi dal documento."""
-        paragraphs = []
-        
-        p_elements = doc.xpath('//p[contains(@class, "para")] | //div[contains(@class, "para")]')
-        if not p_elements:
-            p_elements = doc.xpath('//p')
-        
-        for idx, p in enumerate(p_elements):
-            text = ' '.join(p.text_content().split())
-            if len(text) > 20:
-                paragraphs.append({
-                    'index': idx,
-                    'text': text,
-                    'text_lower': text.lower()
-                })
-        
-        return paragraphs
+        return ParagraphStore.from_html(doc)
+    
+    def _find_panels(self, fig_elem, base_url: str) -> List[Tuple[str, Optional[str], object]]:
+        """
+        Immagini della figura in ordine di documento, in una passata.
+        
+        Returns:
+            Lista di (URL, media_type, figura che la contiene); media_type è None
+            per <img>, "object" per <object>/<embed>, "svg" per un <svg> inline
+            (l'URL è allora l'ancora della figura nella pagina)
+        """
+        panels = []
+        for media in _media(fig_elem):
+            # Contenuto alternativo di <object> o immagini dentro un SVG: già contati
+            if next(media.iterancestors('object', 'embed', 'svg'), None) is not None:
+                continue
+            holder = next(media.iterancestors('figure'))
+            
+            if media.tag == 'svg':
+                anchor = holder.get('id') or fig_elem.get('id')
+                url = f"{base_url}#{anchor}" if anchor else base_url
+                panels.append((url, 'svg', holder))
+                continue
+            
+            attribute, media_type = _MEDIA_SOURCES[media.tag]
+            url = media.get(attribute, '') or media.get('data-src', '')
+            if not url:
+                continue
+            # Risolvi URL relativi
+            if not url.startswith(('http://', 'https://')):
+                url = urljoin(base_url, url)
+            panels.append((url, media_type, holder))
+        return panels
     
     def _extract_figure_data(
         self,
         fig_elem,
+        panels: List[Tuple[str, Optional[str], object]],
         paper_id: str,
         source: str,
         position: int,
-        paragraphs: List[Dict],
-        base_url: str
-    ) -> Optional[Dict]:
-        """Estrae i dati di una singola figura."""
-        
-        # Trova l'immagine
-        img_list = fig_elem.xpath('.//img')
-        img = img_list[0] if img_list else None
-        if not img:
-            # Prova a cercare un'immagine in un link
-            link_list = fig_elem.xpath('.//a//img')
-            img = link_list[0] if link_list else None
-        
-        if img is None:
-            return None
-        
-        # Estrai l'URL dell'immagine
-        img_url = img.get('src', '') or img.get('data-src', '')
-        if not img_url:
-            return None
-        
-        # Risolvi URL relativi
-        if not img_url.startswith(('http://', 'https://')):
-            img_url = urljoin(base_url, img_url)
-        
-        # Estrai la caption
+        paragraphs: ParagraphStore
+    ) -> List[FigureRecord]:
+        """Estrae i record di una figura: uno per pannello (uno solo se non ci sono sotto-figure)."""
+        
+        # Estrai la caption (una volta, usata anche per il riferimento)
         caption = self._extract_caption(fig_elem)
         
         # Trova il riferimento della figura
-        fig_ref = self._find_figure_reference(fig_elem, position)
+        fig_ref = self._find_figure_reference(fig_elem, position, caption)
         
-        # Trova i paragrafi che citano la figura
+        # Trova i paragrafi che citano la figura (comuni a tutti i pannelli)
         mentions = self._find_mentions(paragraphs, fig_ref, position)
         
-        # Trova i paragrafi con termini della caption
-        terms = self._extract_informative_terms(caption)
-        context_paragraphs = self._find_context_paragraphs(paragraphs, terms, mentions)
-        
-        return {
-            'figure_id': f"{paper_id}_fig_{position}",
-            'paper_id': paper_id,
-            'source': source,
-            'url': img_url,
-            'caption': caption,
-            'mentions': mentions,
-            'context_paragraphs': context_paragraphs,
-            'position': position
-        }
+        # Figura semplice: un'immagine, nessuna sotto-figura
+        if len(panels) == 1 and panels[0][2] is fig_elem:
+            url, media_type, _ = panels[0]
+            terms = self._extract_informative_terms(caption)
+            return [FigureRecord(
+                figure_id=f"{paper_id}_fig_{position}",
+                paper_id=paper_id,
+                source=source,
+                url=url,
+                caption=caption,
+                mentions=mentions,
+                context_paragraphs=self._find_context_paragraphs(paragraphs, terms, mentions),
+                position=position,
+                media_type=media_type
+            )]
+        
+        records = []
+        subcaptions = {}
+        for panel, (url, media_type, holder) in enumerate(panels, 1):
+            if holder is fig_elem:
+                subcaption = ""
+            else:
+                if holder not in subcaptions:
+                    subcaptions[holder] = self._extract_caption(holder)
+                subcaption = subcaptions[holder]
+            
+            # Trova i paragrafi con termini della caption e della sotto-caption
+            terms = self._extract_informative_terms(f"{caption} {subcaption}")
+            records.append(FigureRecord(
+                figure_id=f"{paper_id}_fig_{position}_{panel}",
+                paper_id=paper_id,
+                source=source,
+                url=url,
+                caption=caption,
+                mentions=mentions,
+                context_paragraphs=self._find_context_paragraphs(paragraphs, terms, mentions),
+                position=position,
+                panel=panel,
+                subcaption=subcaption or None,
+                media_type=media_type
+            ))
+        return records
     
     def _extract_from_images(
         self,
         doc,
         paper_id: str,
         source: str,
-        paragraphs: List[Dict],
+        paragraphs: ParagraphStore,
         base_url: str
-    ) -> List[Dict]:
+    ) -> List[FigureRecord]:
         """Estrae figure cercando direttamente le immagini."""
         figures = []
         
@@ -211,45 +321,48 @@ class FigureExtractor:
             terms = self._extract_informative_terms(caption)
             context_paragraphs = self._find_context_paragraphs(paragraphs, terms, mentions)
             
-            figures.append({
-                'figure_id': f"{paper_id}_fig_{position}",
-                'paper_id': paper_id,
-                'source': source,
-                'url': src,
-                'caption': caption,
-                'mentions': mentions,
-                'context_paragraphs': context_paragraphs,
-                'position': position
-            })
+            figures.append(FigureRecord(
+                figure_id=f"{paper_id}_fig_{position}",
+                paper_id=paper_id,
+                source=source,
+                url=src,
+                caption=caption,
+                mentions=mentions,
+                context_paragraphs=context_paragraphs,
+                position=position
+            ))
         
         return figures
     
     def _extract_caption(self, fig_elem) -> str:
-        """Estrae la caption della figura."""
+        """
+        Estrae la caption della figura.
+        Considera solo gli elementi della figura stessa, non quelli delle sotto-figure.
+        """
         # Cerca figcaption
-        figcaption = fig_elem.xpath('.//figcaption')
+        figcaption = self._own_elements(fig_elem, _figcaptions)
         if figcaption:
             return ' '.join(figcaption[0].text_content().split())
         
         # Cerca elementi con classe caption
-        caption_elem = fig_elem.xpath('.//*[contains(@class, "caption")]')
+        caption_elem = self._own_elements(fig_elem, _caption_elements)
         if caption_elem:
             return ' '.join(caption_elem[0].text_content().split())
         
         # Cerca testo dopo l'immagine
-        img_list = fig_elem.xpath('.//img')
-        if img_list:
-            try:
-                next_text = fig_elem.xpath('.//p | .//span | .//div')
-                for elem in next_text:
-                    text = ' '.join(elem.text_content().split())
-                    if re.match(r'^(Figure|Fig\.?)\s*\d+', text, re.IGNORECASE):
-                        return text
-            except Exception:
-                pass
+        for elem in self._own_elements(fig_elem, _text_blocks):
+            text = ' '.join(elem.text_content().split())
+            if re.match(r'^(Figure|Fig\.?)\s*\d+', text, re.IGNORECASE):
+                return text
         
         return ""
     
+    @staticmethod
+    def _own_elements(fig_elem, xpath) -> List:
+        """Risultati dell'XPath che appartengono a fig_elem e non a una sotto-figura."""
+        return [elem for elem in xpath(fig_elem)
+                if next(elem.iterancestors('figure'), None) is fig_elem]
+    
     def _find_image_caption(self, img) -> str:
         """Cerca la caption di un'immagine standalone."""
         # Cerca nel parent
@@ -269,13 +382,17 @@ class FigureExtractor:
         
         return ""
     
-    def _find_figure_reference(self, fig_elem, position: int) -> str:
-        """Trova il riferimento usato per citare la figura."""
+    def _find_figure_reference(self, fig_elem, position: int, caption: str) -> str:
+        """Trova il riferimento usato per citare la figura (caption già estratta)."""
         fig_id = fig_elem.get('id', '')
         if fig_id:
             return fig_id
         
-        caption = self._extract_caption(fig_elem)
+        # Tabelle pubblicate come immagine (figure.ltx_table): "Table 2: ..."
+        match = re.match(r'Table\s*(\d+)', caption, re.IGNORECASE)
+        if match:
+            return f"Table {match.group(1)}"
+        
         match = re.search(r'(Figure|Fig\.?)\s*(\d+)', caption, re.IGNORECASE)
         if match:
             return f"Figure {match.group(2)}"
@@ -284,27 +401,19 @@ class FigureExtractor:
     
     def _find_mentions(
         self,
-        paragraphs: List[Dict],
+        paragraphs: ParagraphStore,
         fig_ref: str,
         position: int
     ) -> List[str]:
         """Trova i paragrafi che citano esplicitamente la figura."""
-        mentions = []
-        
-        patterns = [
-            rf'\b{re.escape(fig_ref)}\b',
-            rf'\bFigure\s*{position}\b',
-            rf'\bFig\.\s*{position}\b',
-        ]
-        
-        for para in paragraphs:
-            text = para['text']
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    mentions.append(text)
-                    break
-        
-        return mentions[:10]
+        pattern = re.compile(
+            rf'\b{re.escape(fig_ref)}\b'
+            rf'|\bFigure\s*{position}\b'
+            rf'|\bFig\.\s*{position}\b',
+            re.IGNORECASE
+        )
+        
+        return paragraphs.texts(paragraphs.search(pattern, limit=10))
     
     def _extract_informative_terms(self, caption: str) -> Set[str]:
         """Estrae termini informativi dalla caption."""
@@ -319,28 +428,17 @@ class FigureExtractor:
     
     def _find_context_paragraphs(
         self,
-        paragraphs: List[Dict],
+        paragraphs: ParagraphStore,
         terms: Set[str],
         exclude_mentions: List[str]
     ) -> List[str]:
         """Trova paragrafi contenenti termini della caption."""
-        context = []
-        exclude_set = set(exclude_mentions)
-        
-        for para in paragraphs:
-            if para['text'] in exclude_set:
-                continue
-            
-            term_count = sum(1 for term in terms if term in para['text_lower'])
-            
-            if term_count >= 2:  # Almeno 2 termini
-                context.append(para['text'])
-        
-        return context[:10]
+        # Almeno 2 termini
+        return paragraphs.matching(terms, min_terms=2, exclude=exclude_mentions, limit=10)
     
     def process_arxiv_articles(self) -> int:
         """Processa tutti gli articoli arXiv."""
-        html_files = [f for f in os.listdir(ARXIV_DATA_DIR) if f.endswith(HTML_EXTENSION)]
+        html_files = list_raw(ARXIV_DATA_DIR, (HTML_EXTENSION,))
         
         if not html_files:
             print("[WARN] Nessun file HTML trovato in arXiv")
@@ -349,13 +447,9 @@ class FigureExtractor:
         count = 0
         print(f"\n[INFO] Elaborazione {len(html_files)} articoli arXiv...")
         
-        for filename in tqdm(html_files, desc="Estrazione figure arXiv"):
-            filepath = os.path.join(ARXIV_DATA_DIR, filename)
-            paper_id = filename.replace(HTML_EXTENSION, '')
-            
+        for paper_id, filepath in tqdm(html_files, desc="Estrazione figure arXiv"):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
+                html_content = read_raw(filepath)
                 
                 base_url = f"{ARXIV_BASE_URL}/html/{paper_id}/"
                 figures = self.extract_from_html(html_content, paper_id, "arxiv", base_url)
@@ -370,8 +464,7 @@ class FigureExtractor:
     def process_pubmed_articles(self) -> int:
         """Processa tutti gli articoli PubMed (HTML o XML)."""
         # Cerca sia file HTML che XML
-        all_files = [f for f in os.listdir(PUBMED_DATA_DIR) 
-                     if f.endswith('.html') or f.endswith('.xml')]
+        all_files = list_raw(PUBMED_DATA_DIR)
         
         if not all_files:
             print("[WARN] Nessun file HTML/XML trovato in PubMed")
@@ -380,13 +473,9 @@ class FigureExtractor:
         count = 0
         print(f"\n[INFO] Elaborazione {len(all_files)} articoli PubMed...")
         
-        for filename in tqdm(all_files, desc="Estrazione figure PubMed"):
-            filepath = os.path.join(PUBMED_DATA_DIR, filename)
-            paper_id = filename.replace(HTML_EXTENSION, '').replace('.xml', '')
-            
+        for paper_id, filepath in tqdm(all_files, desc="Estrazione figure PubMed"):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = read_raw(filepath)
                 
                 base_url = f"{PUBMED_BASE_URL}/articles/{paper_id}/"
                 figures = self.extract_from_html(content, paper_id, "pubmed", base_url)
@@ -410,7 +499,7 @@ class FigureExtractor:
         # Salva i risultati
         print(f"\n[INFO] Salvataggio {len(self.figures)} figure...")
         with open(self.figures_file, 'w', encoding='utf-8') as f:
-            json.dump(self.figures, f, indent=2, ensure_ascii=False)
+            json.dump(self.figures, f, indent=2, ensure_ascii=False, default=json_default)
         
         # Statistiche
         print("\n" + "=" * 60)
@@ -0,0 +1,177 @@
+"""
+Hash percettivo delle immagini delle figure.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+pHash a 64 bit calcolato con NumPy: immagine in scala di grigi ridotta a
+32x32 (media per blocchi), DCT-II 2D, coefficienti 8x8 a bassa frequenza
+confrontati con la loro mediana. Immagini quasi identiche (ricompresse,
+ridimensionate, con piccole differenze) hanno hash a distanza di Hamming
+piccola; la distanza tra hash è il numero di bit diversi.
+
+Decodifica: Pillow se installato; altrimenti i PNG con un decoder Python/NumPy
+(zlib + filtri di riga) e gli altri formati (JPEG, GIF...) restano senza pHash:
+per loro vale solo la deduplicazione esatta per contenuto.
+"""
+
+import struct
+import zlib
+from io import BytesIO
+from typing import Optional
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:  # dipendenza opzionale: senza, solo PNG
+    Image = None
+
+HASH_SIZE = 8
+SAMPLE_SIZE = 32
+# Oltre questa dimensione il decoder PNG in Python è troppo lento (serve Pillow)
+MAX_PYTHON_PIXELS = 2_000_000
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Canali per tipo di colore PNG (0 grigio, 2 RGB, 3 palette, 4 grigio+alpha, 6 RGBA)
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Matrice della DCT-II ortonormale n x n."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(SAMPLE_SIZE)
+
+
+def _unfilter_png(raw: bytes, width: int, height: int, bpp: int) -> np.ndarray:
+    """Annulla i filtri di riga PNG (None, Sub, Up, Average, Paeth)."""
+    stride = width * bpp
+    data = np.frombuffer(raw, dtype=np.uint8)
+    if len(data) < height * (stride + 1):
+        raise ValueError("PNG troncato")
+    rows = data[:height * (stride + 1)].reshape(height, stride + 1)
+    out = np.zeros((height, stride), dtype=np.uint8)
+    previous = np.zeros(stride, dtype=np.int32)
+
+    for y in range(height):
+        kind = rows[y, 0]
+        line = rows[y, 1:].astype(np.int32)
+        if kind == 0:
+            current = line
+        elif kind == 2:
+            current = (line + previous) & 0xFF
+        elif kind == 1:
+            # Sub: somma cumulativa per canale lungo la riga
+            current = np.cumsum(line.reshape(width, bpp), axis=0).reshape(stride) & 0xFF
+        elif kind in (3, 4):
+            # Average/Paeth dipendono dal byte a sinistra già ricostruito: ciclo su
+            # interi Python, più rapido di operazioni NumPy su vettori di bpp elementi
+            line = rows[y, 1:].tolist()
+            up = previous.tolist()
+            values = [0] * stride
+            for i in range(stride):
+                a = values[i - bpp] if i >= bpp else 0
+                b = up[i]
+                if kind == 3:
+                    predictor = (a + b) >> 1
+                else:
+                    c = up[i - bpp] if i >= bpp else 0
+                    pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - 2 * c)
+                    predictor = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                values[i] = (line[i] + predictor) & 0xFF
+            current = np.array(values, dtype=np.int32)
+        else:
+            raise ValueError(f"filtro PNG non valido: {kind}")
+        out[y] = current
+        previous = current
+    return out
+
+
+def decode_png(data: bytes) -> Optional[np.ndarray]:
+    """PNG 8 bit non interlacciato -> array in scala di grigi (float), o None se non supportato."""
+    if not data.startswith(PNG_SIGNATURE):
+        return None
+    offset = len(PNG_SIGNATURE)
+    header = None
+    palette = None
+    chunks = []
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        body = data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'PLTE':
+            palette = np.frombuffer(body, dtype=np.uint8).reshape(-1, 3)
+        elif kind == b'IDAT':
+            chunks.append(body)
+        elif kind == b'IEND':
+            break
+    if header is None:
+        return None
+    width, height, depth, color, _, _, interlace = header
+    if depth != 8 or interlace or color not in _PNG_CHANNELS or width * height > MAX_PYTHON_PIXELS:
+        return None
+
+    channels = _PNG_CHANNELS[color]
+    pixels = _unfilter_png(zlib.decompress(b''.join(chunks)), width, height, channels)
+    pixels = pixels.reshape(height, width, channels).astype(np.float64)
+    if color == 3:
+        if palette is None:
+            return None
+        pixels = palette[pixels[..., 0].astype(np.intp).clip(0, len(palette) - 1)].astype(np.float64)
+    elif color in (4, 6):
+        pixels = pixels[..., :-1]  # alpha ignorato
+    if pixels.shape[-1] == 3:
+        return pixels @ np.array([0.299, 0.587, 0.114])
+    return pixels[..., 0]
+
+
+def decode_image(data: bytes) -> Optional[np.ndarray]:
+    """Immagine in scala di grigi, o None se il formato non è decodificabile."""
+    if Image is not None:
+        try:
+            with Image.open(BytesIO(data)) as image:
+                return np.asarray(image.convert('L'), dtype=np.float64)
+        except Exception:
+            return None
+    try:
+        return decode_png(data)
+    except (ValueError, zlib.error, struct.error):
+        return None
+
+
+def _downsample(gray: np.ndarray, size: int) -> np.ndarray:
+    """Media per blocchi a size x size (le immagini piccole vengono replicate)."""
+    height, width = gray.shape
+    rows = np.linspace(0, height, size + 1).astype(int)
+    cols = np.linspace(0, width, size + 1).astype(int)
+    rows = np.minimum(rows, height - 1)[:-1]
+    cols = np.minimum(cols, width - 1)[:-1]
+    row_sums = np.add.reduceat(gray, rows, axis=0)
+    row_counts = np.diff(np.append(rows, height))[:, None]
+    blocks = np.add.reduceat(row_sums / np.maximum(row_counts, 1), cols, axis=1)
+    col_counts = np.diff(np.append(cols, width))[None, :]
+    return blocks / np.maximum(col_counts, 1)
+
+
+def phash(data: bytes) -> Optional[str]:
+    """pHash a 64 bit come stringa esadecimale (16 caratteri), o None."""
+    gray = decode_image(data)
+    if gray is None or gray.size == 0 or min(gray.shape) < 2:
+        return None
+    sample = _downsample(gray, SAMPLE_SIZE)
+    coefficients = (_DCT @ sample @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    # La mediana esclude la componente continua (luminosità media)
+    median = np.median(coefficients.ravel()[1:])
+    bits = (coefficients.ravel() > median).astype(np.uint8)
+    return f"{int(''.join(map(str, bits)), 2):016x}"
+
+
+def hamming(first: str, second: str) -> int:
+    """Bit diversi tra due pHash esadecimali."""
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
@@ -0,0 +1,160 @@
+"""
+Paragrafi di un documento in un unico buffer di testo.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Menzioni e contesto di tabelle e figure si cercano nei paragrafi del
+documento. Prima ogni extractor costruiva la propria lista di paragrafi, ognuno
+con il testo e una copia minuscola (text_lower): quattro copie del testo per
+documento HTML. ParagraphStore tiene invece:
+
+- un solo buffer con i paragrafi separati da SEPARATOR e gli offset di inizio;
+- la versione minuscola del buffer, calcolata solo alla prima ricerca di termini;
+- la ricerca delle menzioni con una regex compilata, in una passata sul buffer;
+- la ricerca dei termini con str.find sul buffer minuscolo, un termine alla volta.
+
+Il testo di un paragrafo (store[i]) è una slice creata solo quando serve,
+cioè per i paragrafi che finiscono nei record. Lo stesso store è condiviso da
+TableExtractor e FigureExtractor (pipeline/streaming.py, JatsDocument).
+
+Nota: una stringa Python usa per tutti i caratteri la larghezza del più
+"largo"; un solo carattere non Latin-1 (es. lettere greche) raddoppia quindi
+il buffer intero. Il risparmio resta, ma è minore sui documenti con formule.
+"""
+
+import os
+import sys
+from bisect import bisect_right
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple
+
+from lxml import etree
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.records import Paragraph
+
+# Paragrafi più corti sono ignorati (didascalie brevi, numeri, frammenti)
+MIN_PARAGRAPH_LENGTH = 20
+# Non è spazio per \s e non è un carattere di parola per \b: nessuna regex
+# attraversa due paragrafi, e \b ai bordi vale come a inizio/fine stringa
+SEPARATOR = '\x00'
+
+_html_paragraphs = etree.XPath('//p[contains(@class, "para")] | //div[contains(@class, "para")]')
+_all_paragraphs = etree.XPath('//p')
+
+
+class ParagraphStore:
+    """Paragrafi di un documento: buffer unico, offset e ricerche in una passata."""
+
+    def __init__(self, paragraphs: Iterable[Tuple[int, str]] = ()):
+        """
+        Args:
+            paragraphs: coppie (indice nel documento, testo), già filtrate
+        """
+        indices: List[int] = []
+        texts: List[str] = []
+        for index, text in paragraphs:
+            indices.append(index)
+            texts.append(text)
+        self.indices = indices
+        self.text = SEPARATOR.join(texts)
+        # starts[i]: inizio del paragrafo i nel buffer; l'ultimo valore è la fine + 1
+        starts = [0]
+        for text in texts:
+            starts.append(starts[-1] + len(text) + 1)
+        self.starts = starts
+        self._lower: Optional[str] = None
+        self._lower_starts: Optional[List[int]] = None
+
+    @classmethod
+    def from_html(cls, doc) -> 'ParagraphStore':
+        """Paragrafi di un documento HTML (classi LaTeXML "para", altrimenti tutti i <p>)."""
+        elements = _html_paragraphs(doc) or _all_paragraphs(doc)
+        texts = ((idx, ' '.join(p.text_content().split())) for idx, p in enumerate(elements))
+        return cls((idx, text) for idx, text in texts if len(text) > MIN_PARAGRAPH_LENGTH)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i: int) -> str:
+        return self.text[self.starts[i]:self.starts[i + 1] - 1]
+
+    def __iter__(self) -> Iterator[Paragraph]:
+        for i, index in enumerate(self.indices):
+            yield Paragraph(index, self[i])
+
+    def texts(self, ids: Iterable[int]) -> List[str]:
+        """Testi dei paragrafi indicati."""
+        return [self[i] for i in ids]
+
+    def paragraph_at(self, offset: int) -> int:
+        """Paragrafo che contiene la posizione del buffer."""
+        return bisect_right(self.starts, offset) - 1
+
+    @property
+    def lower(self) -> str:
+        """Buffer minuscolo, calcolato alla prima richiesta."""
+        if self._lower is None:
+            lower = self.text.lower()
+            if len(lower) == len(self.text):
+                self._lower_starts = self.starts
+            else:
+                # Alcuni caratteri Unicode cambiano lunghezza in minuscolo (es. 'İ')
+                lowered = [self[i].lower() for i in range(len(self))]
+                lower = SEPARATOR.join(lowered)
+                starts = [0]
+                for text in lowered:
+                    starts.append(starts[-1] + len(text) + 1)
+                self._lower_starts = starts
+            self._lower = lower
+        return self._lower
+
+    def search(self, pattern: Pattern, limit: Optional[int] = None) -> List[int]:
+        """
+        Paragrafi in cui la regex trova almeno una corrispondenza, in ordine.
+        Dopo una corrispondenza la ricerca riprende dal paragrafo successivo.
+        """
+        found = []
+        position = 0
+        end = len(self.text)
+        while position <= end and (limit is None or len(found) < limit):
+            match = pattern.search(self.text, position)
+            if match is None:
+                break
+            i = self.paragraph_at(match.start())
+            found.append(i)
+            position = self.starts[i + 1]
+        return found
+
+    def term_counts(self, terms: Iterable[str]) -> Counter:
+        """Numero di termini (minuscoli) distinti contenuti in ogni paragrafo."""
+        lower = self.lower
+        starts = self._lower_starts
+        counts: Counter = Counter()
+        for term in terms:
+            if not term:
+                continue
+            position = lower.find(term)
+            while position != -1:
+                i = bisect_right(starts, position) - 1
+                counts[i] += 1
+                position = lower.find(term, starts[i + 1])
+        return counts
+
+    def matching(self, terms: Iterable[str], min_terms: int, exclude: Iterable[str] = (),
+                 limit: Optional[int] = None) -> List[str]:
+        """
+        Testi dei paragrafi con almeno min_terms termini, in ordine, esclusi
+        quelli con testo in `exclude` (es. le menzioni).
+        """
+        excluded = set(exclude)
+        counts = self.term_counts(terms)
+        result = []
+        for i in sorted(i for i, count in counts.items() if count >= min_terms):
+            text = self[i]
+            if text in excluded:
+                continue
+            result.append(text)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
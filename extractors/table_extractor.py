@@ -4,19 +4,27 @@ Ingegneria dei Dati 2025/2026 - Homework 5
 
 Per ogni tabella estrae:
 - Corpo della tabella
+- Struttura colonnare (intestazioni, colonne tipizzate, valori numerici e unità)
 - Caption
 - Paragrafi che citano la tabella
 - Paragrafi con termini presenti nella tabella/caption
+
+Le caption sono risolte una volta per documento (_resolve_captions): ogni
+tabella riceve la didascalia delle <figure> che la contengono (con LaTeXML
+anche se la tabella è dentro un ltx_inline-block; per una sotto-tabella la
+didascalia esterna seguita da quella del pannello), oppure quella del
+suo wrapper più vicina nell'ordine del documento, così in un wrapper con più
+tabelle ognuna ha la propria. Gli XPath sono precompilati a livello di modulo.
 """
 
 import os
 import sys
 import json
 import re
-from typing import Dict, List, Optional, Set
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple, Union
 from collections import defaultdict
 
-from lxml import html as lxml_html
 from lxml import etree
 from tqdm import tqdm
 import warnings
@@ -27,6 +35,21 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
     ARXIV_DATA_DIR, PUBMED_DATA_DIR, TABLES_DIR, STOPWORDS
 )
+from storage.raw_archive import list_raw, read_raw, parse_document
+from extractors.jats_extractor import JatsDocument, is_jats
+from models.records import TableRecord, json_default
+from extractors.paragraph_store import ParagraphStore
+from extractors.table_model import columnar_table
+
+# XPath precompilati
+_tables = etree.XPath('//table')
+_rows = etree.XPath('.//tr')
+_cells = etree.XPath('.//th | .//td')
+_own_caption = etree.XPath('.//caption')
+_figcaptions = etree.XPath('.//figcaption')
+_caption_elements = etree.XPath('.//*[contains(@class, "caption")]')
+_previous_block = etree.XPath('preceding-sibling::*[self::p or self::div or self::span][1]')
+_TABLE_LABEL = re.compile(r'^Table\s+\d+', re.IGNORECASE)
 
 
 class TableExtractor:
@@ -35,33 +58,55 @@ class TableExtractor:
     """
     
     def __init__(self):
-        self.tables: List[Dict] = []
+        self.tables: List[TableRecord] = []
         self.tables_file = os.path.join(TABLES_DIR, "tables_metadata.json")
     
-    def extract_from_html(self, html_content: str, paper_id: str, source: str) -> List[Dict]:
+    def extract_from_html(self, html_content: Union[bytes, str], paper_id: str, source: str) -> List[TableRecord]:
         """
         Estrae tutte le tabelle da un documento HTML.
         
         Args:
-            html_content: Contenuto HTML dell'articolo
+            html_content: Contenuto HTML/XML dell'articolo (bytes o stringa)
             paper_id: ID dell'articolo
             source: "arxiv" o "pubmed"
             
         Returns:
             Lista di tabelle estratte con contesto
         """
-        # Usa lxml per compatibilità con Python 3.14
+        # XML JATS (PubMed Central): percorso dedicato su lxml.etree
+        if is_jats(html_content):
+            try:
+                return self.extract_from_jats(JatsDocument(html_content), paper_id, source)
+            except Exception:
+                return []
+        
+        # Usa lxml per compatibilità con Python 3.14 (bytes dall'archivio o stringa)
         try:
-            doc = lxml_html.fromstring(html_content)
+            doc = parse_document(html_content)
         except Exception:
             return []
+        return self.extract_from_tree(doc, paper_id, source)
+    
+    def extract_from_tree(
+        self,
+        doc,
+        paper_id: str,
+        source: str,
+        paragraphs: Optional[ParagraphStore] = None
+    ) -> List[TableRecord]:
+        """
+        Estrae le tabelle da un documento HTML già parsato.
+        `paragraphs` permette di condividere i paragrafi con FigureExtractor.
+        """
         tables = []
         
         # Estrai tutti i paragrafi per il contesto
-        paragraphs = self._extract_paragraphs(doc)
+        if paragraphs is None:
+            paragraphs = self._extract_paragraphs(doc)
         
-        # Trova tutte le tabelle
-        table_elements = doc.xpath('//table')
+        # Trova tutte le tabelle e risolvi le caption in una passata
+        table_elements = _tables(doc)
+        captions = self._resolve_captions(table_elements)
         
         for idx, table_elem in enumerate(table_elements, 1):
             table_data = self._extract_table_data(
@@ -69,32 +114,54 @@ class TableExtractor:
                 paper_id, 
                 source, 
                 idx, 
-                paragraphs
+                paragraphs,
+                captions[table_elem]
             )
             if table_data:
                 tables.append(table_data)
         
         return tables
     
-    def _extract_paragraphs(self, doc) -> List[Dict]:
+    def extract_from_jats(self, document: JatsDocument, paper_id: str, source: str) -> List[TableRecord]:
+        """
+        Estrae le tabelle (<table-wrap>) da un articolo JATS già parsato.
+        Le menzioni sono i paragrafi con <xref ref-type="table" rid="id tabella">.
+        """
+        tables = []
+        
+        for idx, wrap in enumerate(document.tables, 1):
+            body = document.table_body(wrap)
+            if not body or len(body) < 10:
+                continue
+            
+            caption = document.caption(wrap)
+            mentions = document.mentions_of(wrap)
+            if not mentions:
+                # Articoli senza xref: citazioni testuali come per l'HTML
+                table_ref = document.label(wrap) or f"Table {idx}"
+                mentions = self._find_mentions(document.paragraphs, table_ref, idx)
+            
+            terms = self._extract_informative_terms(body, caption)
+            context_paragraphs = self._find_context_paragraphs(document.paragraphs, terms, mentions)
+            
+            tables.append(TableRecord(
+                table_id=f"{paper_id}_table_{idx}",
+                paper_id=paper_id,
+                source=source,
+                caption=caption,
+                body=body,
+                structure=columnar_table(wrap),
+                mentions=mentions[:10],
+                context_paragraphs=context_paragraphs,
+                position=idx,
+                terms=list(terms)[:50]
+            ))
+        
+        return tables
+    
+    def _extract_paragraphs(self, doc) -> ParagraphStore:
         """Estrae tutti i paragrafi dal documento."""
-        paragraphs = []
-        
-        # Trova tutti i paragrafi
-        p_elements = doc.xpath('//p[contains(@class, "para")] | //div[contains(@class, "para")]')
-        if not p_elements:
-            p_elements = doc.xpath('//p')
-        
-        for idx, p in enumerate(p_elements):
-            text = ' '.join(p.text_content().split())
-            if len(text) > 20:  # Ignora paragrafi troppo corti
-                paragraphs.append({
-                    'index': idx,
-                    'text': text,
-                    'text_lower': text.lower()
-                })
-        
-        return paragraphs
+        return ParagraphStore.from_html(doc)
     
     def _extract_table_data(
         self, 
@@ -102,20 +169,18 @@ class TableExtractor:
         paper_id: str, 
         source: str, 
         position: int,
-        paragraphs: List[Dict]
-    ) -> Optional[Dict]:
-        """Estrae i dati di una singola tabella."""
+        paragraphs: ParagraphStore,
+        caption: str
+    ) -> Optional[TableRecord]:
+        """Estrae i dati di una singola tabella (caption già risolta)."""
         
         # Estrai il corpo della tabella
         body = self._extract_table_body(table_elem)
         if not body or len(body) < 10:
             return None
         
-        # Estrai la caption
-        caption = self._extract_caption(table_elem)
-        
         # Trova l'ID della tabella (es. "Table 1", "tab1", ecc.)
-        table_ref = self._find_table_reference(table_elem, position)
+        table_ref = self._find_table_reference(table_elem, position, caption)
         
         # Trova i paragrafi che citano la tabella
         mentions = self._find_mentions(paragraphs, table_ref, position)
@@ -124,25 +189,26 @@ class TableExtractor:
         terms = self._extract_informative_terms(body, caption)
         context_paragraphs = self._find_context_paragraphs(paragraphs, terms, mentions)
         
-        return {
-            'table_id': f"{paper_id}_table_{position}",
-            'paper_id': paper_id,
-            'source': source,
-            'caption': caption,
-            'body': body,
-            'mentions': mentions,
-            'context_paragraphs': context_paragraphs,
-            'position': position,
-            'terms': list(terms)[:50]  # Limita i termini salvati
-        }
+        return TableRecord(
+            table_id=f"{paper_id}_table_{position}",
+            paper_id=paper_id,
+            source=source,
+            caption=caption,
+            body=body,
+            structure=columnar_table(table_elem),
+            mentions=mentions,
+            context_paragraphs=context_paragraphs,
+            position=position,
+            terms=list(terms)[:50]  # Limita i termini salvati
+        )
     
     def _extract_table_body(self, table_elem) -> str:
         """Estrae il contenuto testuale della tabella."""
         rows = []
         
-        for tr in table_elem.xpath('.//tr'):
+        for tr in _rows(table_elem):
             cells = []
-            for cell in tr.xpath('.//th | .//td'):
+            for cell in _cells(tr):
                 cell_text = ' '.join(cell.text_content().split())
                 cells.append(cell_text)
             if cells:
@@ -151,43 +217,123 @@ class TableExtractor:
         return '\n'.join(rows)
     
     def _extract_caption(self, table_elem) -> str:
-        """Estrae la caption della tabella."""
-        # Cerca caption come elemento figlio
-        caption = table_elem.xpath('.//caption')
-        if caption:
-            return ' '.join(caption[0].text_content().split())
-        
-        # Cerca nel parent (figure o div wrapper)
-        parent = table_elem.getparent()
-        if parent is not None:
-            # Cerca figcaption
-            figcaption = parent.xpath('.//figcaption')
-            if figcaption:
-                return ' '.join(figcaption[0].text_content().split())
+        """Estrae la caption di una singola tabella."""
+        return self._resolve_captions([table_elem])[table_elem]
+    
+    def _resolve_captions(self, table_elements: List) -> Dict:
+        """
+        Caption di tutte le tabelle del documento, in una passata.
+        
+        Per ogni tabella, nell'ordine:
+        1. <caption> della tabella
+        2. figcaption/elemento "caption" delle <figure> che la contengono, dalla
+           più esterna (esclusi quelli di sotto-figure e tabelle interne)
+        3. figcaption/elemento "caption" del wrapper (parent): con più tabelle
+           nel wrapper, la caption più vicina che precede la tabella (o la prima
+           che la segue)
+        4. elemento precedente che inizia con "Table X"
+        
+        Le caption delle figure e dei wrapper (con le loro posizioni nel
+        wrapper) sono calcolate una sola volta.
+        """
+        captions = {}
+        figure_captions: Dict = {}
+        wrapper_captions: Dict = {}
+        
+        for table_elem in table_elements:
+            # 1. Caption come elemento figlio
+            caption = _own_caption(table_elem)
+            if caption:
+                captions[table_elem] = ' '.join(caption[0].text_content().split())
+                continue
+            
+            # 2. Figure che contengono la tabella (anche non come parent diretto):
+            #    caption della figura esterna seguita da quella del pannello
+            parts = []
+            for figure in table_elem.iterancestors('figure'):
+                if figure not in figure_captions:
+                    figure_captions[figure] = self._figure_caption(figure)
+                if figure_captions[figure]:
+                    parts.append(figure_captions[figure])
+            text = ' '.join(reversed(parts))
             
-            # Cerca elementi con classe caption
-            caption_elem = parent.xpath('.//*[contains(@class, "caption")]')
-            if caption_elem:
-                return ' '.join(caption_elem[0].text_content().split())
+            # 3. Wrapper della tabella
+            parent = table_elem.getparent()
+            if not text and parent is not None:
+                if parent not in wrapper_captions:
+                    wrapper_captions[parent] = self._wrapper_captions(parent)
+                text = self._nearest_caption(table_elem, *wrapper_captions[parent])
             
-            # Cerca elementi precedenti con "Table X"
-            prev = table_elem.xpath('preceding-sibling::*[self::p or self::div or self::span][1]')
-            if prev:
-                text = ' '.join(prev[0].text_content().split())
-                if re.match(r'^Table\s+\d+', text, re.IGNORECASE):
-                    return text
+            # 4. Elementi precedenti con "Table X"
+            if not text and parent is not None:
+                prev = _previous_block(table_elem)
+                if prev:
+                    prev_text = ' '.join(prev[0].text_content().split())
+                    if _TABLE_LABEL.match(prev_text):
+                        text = prev_text
+            
+            captions[table_elem] = text
         
+        return captions
+    
+    @staticmethod
+    def _figure_caption(figure) -> str:
+        """Caption propria di una <figure> (non di sotto-figure o tabelle interne)."""
+        for xpath in (_figcaptions, _caption_elements):
+            for elem in xpath(figure):
+                if (next(elem.iterancestors('figure'), None) is figure
+                        and not TableExtractor._inside_table(elem, figure)):
+                    return ' '.join(elem.text_content().split())
         return ""
     
-    def _find_table_reference(self, table_elem, position: int) -> str:
-        """Trova il riferimento usato per citare la tabella."""
+    @staticmethod
+    def _inside_table(elem, container) -> bool:
+        """True se elem è dentro una tabella che sta nel container."""
+        for ancestor in elem.iterancestors():
+            if ancestor is container:
+                return False
+            if ancestor.tag == 'table':
+                return True
+        return False
+    
+    @staticmethod
+    def _wrapper_captions(parent) -> Tuple[List, List[int], Dict]:
+        """
+        Elementi caption del wrapper fuori dalle tabelle, in ordine di documento
+        (prima le figcaption, come in _figure_caption). Con più caption anche le
+        loro posizioni e l'ordine degli elementi nel sottoalbero del wrapper,
+        calcolato una volta per tutte le tabelle del wrapper.
+        """
+        for xpath in (_figcaptions, _caption_elements):
+            elements = [elem for elem in xpath(parent) if not TableExtractor._inside_table(elem, parent)]
+            if len(elements) > 1:
+                order = {elem: i for i, elem in enumerate(parent.iter())}
+                return elements, [order[elem] for elem in elements], order
+            if elements:
+                return elements, [], {}
+        return [], [], {}
+    
+    @staticmethod
+    def _nearest_caption(table_elem, elements: List, positions: List[int], order: Dict) -> str:
+        """Caption del wrapper per la tabella: l'ultima che la precede, altrimenti la prima."""
+        if not elements:
+            return ""
+        chosen = elements[0]
+        if positions:
+            # Caption in ordine di documento: ricerca binaria della posizione della tabella
+            preceding = bisect_left(positions, order[table_elem])
+            if preceding:
+                chosen = elements[preceding - 1]
+        return ' '.join(chosen.text_content().split())
+    
+    def _find_table_reference(self, table_elem, position: int, caption: str) -> str:
+        """Trova il riferimento usato per citare la tabella (caption già risolta)."""
         # Cerca ID o attributi
         table_id = table_elem.get('id', '')
         if table_id:
             return table_id
         
         # Cerca nella caption
-        caption = self._extract_caption(table_elem)
         match = re.search(r'Table\s*(\d+)', caption, re.IGNORECASE)
         if match:
             return f"Table {match.group(1)}"
@@ -196,29 +342,22 @@ class TableExtractor:
     
     def _find_mentions(
         self, 
-        paragraphs: List[Dict], 
+        paragraphs: ParagraphStore, 
         table_ref: str, 
         position: int
     ) -> List[str]:
         """Trova i paragrafi che citano esplicitamente la tabella."""
-        mentions = []
-        
-        # Pattern per trovare citazioni
-        patterns = [
-            rf'\b{re.escape(table_ref)}\b',
-            rf'\bTable\s*{position}\b',
-            rf'\btab\.\s*{position}\b',
-            rf'\btbl\.\s*{position}\b',
-        ]
-        
-        for para in paragraphs:
-            text = para['text']
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    mentions.append(text)
-                    break
-        
-        return mentions[:10]  # Limita a 10 menzioni
+        # Pattern per trovare citazioni, in un'unica regex: una passata sul buffer
+        pattern = re.compile(
+            rf'\b{re.escape(table_ref)}\b'
+            rf'|\bTable\s*{position}\b'
+            rf'|\btab\.\s*{position}\b'
+            rf'|\btbl\.\s*{position}\b',
+            re.IGNORECASE
+        )
+        
+        # Limita a 10 menzioni
+        return paragraphs.texts(paragraphs.search(pattern, limit=10))
     
     def _extract_informative_terms(self, body: str, caption: str) -> Set[str]:
         """Estrae termini informativi dalla tabella e caption."""
@@ -237,30 +376,17 @@ class TableExtractor:
     
     def _find_context_paragraphs(
         self, 
-        paragraphs: List[Dict], 
+        paragraphs: ParagraphStore, 
         terms: Set[str],
         exclude_mentions: List[str]
     ) -> List[str]:
         """Trova paragrafi contenenti termini della tabella."""
-        context = []
-        exclude_set = set(exclude_mentions)
-        
-        for para in paragraphs:
-            if para['text'] in exclude_set:
-                continue
-            
-            # Conta quanti termini sono presenti
-            term_count = sum(1 for term in terms if term in para['text_lower'])
-            
-            # Richiedi almeno 3 termini
-            if term_count >= 3:
-                context.append(para['text'])
-        
-        return context[:15]  # Limita a 15 paragrafi di contesto
+        # Richiedi almeno 3 termini, limita a 15 paragrafi di contesto
+        return paragraphs.matching(terms, min_terms=3, exclude=exclude_mentions, limit=15)
     
     def process_arxiv_articles(self) -> int:
         """Processa tutti gli articoli arXiv."""
-        html_files = [f for f in os.listdir(ARXIV_DATA_DIR) if f.endswith('.html')]
+        html_files = list_raw(ARXIV_DATA_DIR, ('.html',))
         
         if not html_files:
             print("[WARN] Nessun file HTML trovato in arXiv")
@@ -269,28 +395,23 @@ class TableExtractor:
         count = 0
         print(f"\n[INFO] Elaborazione {len(html_files)} articoli arXiv...")
         
-        for filename in tqdm(html_files, desc="Estrazione tabelle arXiv"):
-            filepath = os.path.join(ARXIV_DATA_DIR, filename)
-            paper_id = filename.replace('.html', '')
-            
+        for paper_id, filepath in tqdm(html_files, desc="Estrazione tabelle arXiv"):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
+                html_content = read_raw(filepath)
                 
                 tables = self.extract_from_html(html_content, paper_id, "arxiv")
                 self.tables.extend(tables)
                 count += len(tables)
                 
             except Exception as e:
-                print(f"\n[WARN] Errore elaborazione {filename}: {e}")
+                print(f"\n[WARN] Errore elaborazione {filepath}: {e}")
         
         return count
     
     def process_pubmed_articles(self) -> int:
         """Processa tutti gli articoli PubMed (HTML o XML)."""
         # Cerca sia file HTML che XML
-        all_files = [f for f in os.listdir(PUBMED_DATA_DIR) 
-                     if f.endswith('.html') or f.endswith('.xml')]
+        all_files = list_raw(PUBMED_DATA_DIR)
         
         if not all_files:
             print("[WARN] Nessun file HTML/XML trovato in PubMed")
@@ -299,13 +420,9 @@ class TableExtractor:
         count = 0
         print(f"\n[INFO] Elaborazione {len(all_files)} articoli PubMed...")
         
-        for filename in tqdm(all_files, desc="Estrazione tabelle PubMed"):
-            filepath = os.path.join(PUBMED_DATA_DIR, filename)
-            paper_id = filename.replace('.html', '').replace('.xml', '')
-            
+        for paper_id, filepath in tqdm(all_files, desc="Estrazione tabelle PubMed"):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = read_raw(filepath)
                 
                 tables = self.extract_from_html(content, paper_id, "pubmed")
                 self.tables.extend(tables)
@@ -328,7 +445,7 @@ class TableExtractor:
         # Salva i risultati
         print(f"\n[INFO] Salvataggio {len(self.tables)} tabelle...")
         with open(self.tables_file, 'w', encoding='utf-8') as f:
-            json.dump(self.tables, f, indent=2, ensure_ascii=False)
+            json.dump(self.tables, f, indent=2, ensure_ascii=False, default=json_default)
         
         # Statistiche
         print("\n" + "=" * 60)
@@ -0,0 +1,289 @@
+"""
+Modello colonnare delle tabelle estratte.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Il corpo testuale ("cella | cella" per riga) perde la struttura della tabella.
+Qui la tabella (HTML o JATS: entrambi usano tr/th/td) diventa una griglia con
+rowspan/colspan espansi, separata in righe di intestazione e colonne tipizzate:
+
+    {
+        "header_rows": [["Method", "Latency (ms)", "Speedup"]],
+        "n_rows": 2,
+        "columns": [
+            {"header": "Method", "type": "text", "unit": null, "values": ["A", "B"]},
+            {"header": "Latency (ms)", "type": "number", "unit": "ms", "values": [8.5, 12.0]},
+            {"header": "Speedup", "type": "number", "unit": "x", "values": [2.1, null]}
+        ]
+    }
+
+Le colonne numeriche contengono i valori già convertiti (None dove la cella
+non è un numero) con l'unità separata; l'indexer li invia a Elasticsearch
+come campo nested per le query di intervallo ("latency < 10 ms").
+
+measurements() appiattisce le colonne numeriche in tuple (intestazione,
+valore, unità) con le unità di tempo e dimensione convertite nell'unità base
+(ms -> s, MB -> B), così "latency < 10 ms" trova anche una colonna in secondi.
+"""
+
+import math
+import os
+import re
+import sys
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extractors.text_extractor import element_text
+
+# Limiti di espansione degli span (tabelle malformate con colspan="1000")
+MAX_SPAN = 50
+MAX_COLUMNS = 100
+
+# Tuple (intestazione, valore, unità) indicizzate per tabella: ognuna è un documento
+# nested e Elasticsearch rifiuta i documenti oltre index.mapping.nested_objects.limit
+# (10000, comprese le MAX_COLUMNS colonne). Le tabelle più grandi sono indicizzate
+# con le prime righe: i predicati numerici non vedono le righe successive.
+MAX_MEASUREMENTS = 5000
+
+# Una colonna è numerica se almeno questa frazione delle celle non vuote è un numero
+NUMERIC_RATIO = 0.5
+
+# Numero iniziale della cella: segno, migliaia, decimali, esponente (1.2e-3, 1.2×10^3)
+_NUMBER = re.compile(
+    r'^[<>≤≥~≈]?\s*'
+    r'(?P<number>[-+−–]?(?:\d+(?:[.,]\d+)*|[.,]\d+))'
+    r'(?:\s*[eE](?P<exp>[-+−]?\d+)|\s*[×x]\s*10\s*\^?\s*(?P<exp10>[-+−]?\d+))?'
+    r'\s*(?P<rest>.*)$'
+)
+# Parti ignorate dopo il numero: deviazione standard, valori tra parentesi, note
+_SPREAD = re.compile(r'\s*(?:±|\+/-|\+-)\s*[\d.,]+')
+_BRACKETED = re.compile(r'\s*[(\[][^)\]]*[)\]]')
+_FOOTNOTES = re.compile(r'[*†‡§¶#]+|\^?[a-d]$')
+# Unità ammessa: breve, senza spazi interni
+_UNIT = re.compile(r'^[A-Za-zµμΩ°%‰/²³·-]{1,12}$')
+# Unità nell'intestazione: "Latency (ms)", "Time [s] / p50"
+_HEADER_UNIT = re.compile(r'[(\[]\s*([A-Za-zµμΩ°%‰/²³·-]{1,12})\s*[)\]]')
+_THOUSANDS = re.compile(r'^[-+]?\d{1,3}(,\d{3})+(\.\d+)?$')
+
+# Unità -> (unità base, fattore): tempi in secondi, dimensioni in byte
+UNIT_SCALES = {
+    'ns': ('s', 1e-9), 'µs': ('s', 1e-6), 'μs': ('s', 1e-6), 'us': ('s', 1e-6),
+    'ms': ('s', 1e-3), 's': ('s', 1.0), 'sec': ('s', 1.0), 'secs': ('s', 1.0),
+    'min': ('s', 60.0), 'mins': ('s', 60.0), 'h': ('s', 3600.0), 'hr': ('s', 3600.0),
+    'B': ('B', 1.0), 'KB': ('B', 1e3), 'kB': ('B', 1e3), 'MB': ('B', 1e6),
+    'GB': ('B', 1e9), 'TB': ('B', 1e12), 'KiB': ('B', 2.0 ** 10), 'MiB': ('B', 2.0 ** 20),
+    'GiB': ('B', 2.0 ** 30), 'TiB': ('B', 2.0 ** 40),
+    'x': ('x', 1.0), '×': ('x', 1.0), 'X': ('x', 1.0),
+}
+
+
+def _to_float(number: str) -> Optional[float]:
+    number = number.replace('−', '-').replace('–', '-')
+    if _THOUSANDS.match(number):
+        number = number.replace(',', '')
+    elif ',' in number and '.' not in number and number.count(',') == 1:
+        number = number.replace(',', '.')  # virgola decimale
+    elif ',' in number:
+        return None  # elenco di valori ("1,2,3")
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def parse_number(text: str) -> Optional[Tuple[float, Optional[str]]]:
+    """
+    Valore numerico e unità di una cella.
+
+    Esempi: "12.5 ms" -> (12.5, "ms"); "2.1x" -> (2.1, "x"); "95.3%" -> (95.3, "%");
+    "0.81 ± 0.02" -> (0.81, None); "1,234" -> (1234.0, None); "N/A" -> None
+    """
+    match = _NUMBER.match(text.strip())
+    if not match:
+        return None
+    value = _to_float(match.group('number'))
+    if value is None:
+        return None
+    exponent = match.group('exp') or match.group('exp10')
+    if exponent:
+        try:
+            value *= 10.0 ** int(exponent.replace('−', '-'))
+        except OverflowError:
+            return None
+    if not math.isfinite(value):
+        return None
+
+    rest = _SPREAD.sub('', match.group('rest'))
+    rest = _BRACKETED.sub('', rest)
+    rest = _FOOTNOTES.sub('', rest).strip()
+    if not rest:
+        return value, None
+    if _UNIT.match(rest):
+        return value, rest
+    return None
+
+
+def header_unit(header: str) -> Optional[str]:
+    """Unità indicata tra parentesi nell'intestazione (l'ultima, se più di una)."""
+    units = _HEADER_UNIT.findall(header)
+    return units[-1] if units else None
+
+
+def table_grid(table_elem) -> Tuple[List[List[str]], int]:
+    """
+    Griglia delle celle con rowspan/colspan espansi.
+
+    Returns:
+        (righe, numero di righe di intestazione)
+    """
+    grid: List[List[str]] = []
+    pending: Dict[int, Tuple[int, str]] = {}  # colonna -> (righe residue, testo) dei rowspan
+    header_rows = 0
+    in_header = True
+
+    for tr in table_elem.iter('tr'):
+        cells = [c for c in tr if isinstance(c.tag, str) and c.tag in ('th', 'td')]
+        if not cells:
+            continue
+        row: List[str] = []
+        col = 0
+
+        def fill_pending():
+            nonlocal col
+            while col in pending:
+                remaining, text = pending[col]
+                row.append(text)
+                if remaining > 1:
+                    pending[col] = (remaining - 1, text)
+                else:
+                    del pending[col]
+                col += 1
+
+        for cell in cells:
+            fill_pending()
+            text = element_text(cell)
+            colspan = _span(cell.get('colspan'))
+            rowspan = _span(cell.get('rowspan'))
+            for _ in range(colspan):
+                if col >= MAX_COLUMNS:
+                    break
+                row.append(text)
+                if rowspan > 1:
+                    pending[col] = (rowspan - 1, text)
+                col += 1
+        fill_pending()
+
+        # Intestazione: righe in <thead> o composte solo da <th>, prima dei dati
+        parent = tr.getparent()
+        is_header = (parent is not None and parent.tag == 'thead') or all(c.tag == 'th' for c in cells)
+        if in_header and is_header:
+            header_rows += 1
+        else:
+            in_header = False
+        grid.append(row)
+
+    width = max((len(row) for row in grid), default=0)
+    grid = [row + [''] * (width - len(row)) for row in grid]
+
+    # Senza marcatura: la prima riga è intestazione se è testuale e le successive hanno numeri
+    if header_rows == 0 and len(grid) > 1:
+        first_numeric = any(parse_number(text) for text in grid[0] if text)
+        later_numeric = any(parse_number(text) for row in grid[1:] for text in row if text)
+        if not first_numeric and later_numeric:
+            header_rows = 1
+
+    return grid, header_rows
+
+
+def _span(value) -> int:
+    try:
+        return max(1, min(MAX_SPAN, int(value)))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _column_header(header_rows: List[List[str]], col: int) -> str:
+    """Intestazione della colonna: livelli distinti uniti con " / "."""
+    levels = []
+    for row in header_rows:
+        text = row[col]
+        if text and text not in levels:
+            levels.append(text)
+    return ' / '.join(levels)
+
+
+def columnar_table(table_elem) -> Optional[Dict]:
+    """
+    Rappresentazione colonnare della tabella, o None se non ha righe di dati.
+    """
+    grid, n_header = table_grid(table_elem)
+    header_rows = grid[:n_header]
+    data_rows = grid[n_header:]
+    if not data_rows or not data_rows[0]:
+        return None
+
+    columns = []
+    for col in range(len(data_rows[0])):
+        header = _column_header(header_rows, col)
+        texts = [row[col] for row in data_rows]
+        filled = [text for text in texts if text]
+        parsed = [parse_number(text) if text else None for text in texts]
+        numbers = [p for p in parsed if p is not None]
+
+        if filled and len(numbers) >= NUMERIC_RATIO * len(filled):
+            units = Counter(unit for _, unit in numbers if unit)
+            unit = units.most_common(1)[0][0] if units else header_unit(header)
+            column = {
+                'header': header,
+                'type': 'number',
+                'unit': unit,
+                'values': [p[0] if p is not None else None for p in parsed]
+            }
+            # Unità per cella solo se non tutte uguali (es. "850 ms" e "1.2 s")
+            if len(units) > 1:
+                column['units'] = [p[1] or unit if p is not None else None for p in parsed]
+            columns.append(column)
+        else:
+            columns.append({
+                'header': header,
+                'type': 'text',
+                'unit': None,
+                'values': texts
+            })
+
+    return {
+        'header_rows': header_rows,
+        'n_rows': len(data_rows),
+        'columns': columns
+    }
+
+
+def normalize_unit(value: float, unit: Optional[str]) -> Tuple[float, Optional[str]]:
+    """Valore nell'unità base (10 ms -> 0.01 s); unità sconosciute restano invariate."""
+    if not unit:
+        return value, None
+    base, factor = UNIT_SCALES.get(unit, UNIT_SCALES.get(unit.lower(), (unit, 1.0)))
+    return value * factor, base
+
+
+def measurements(structure: Optional[Dict], limit: int = MAX_MEASUREMENTS) -> List[Dict]:
+    """
+    Tuple (intestazione, valore, unità) delle colonne numeriche, una per cella,
+    con valori e unità normalizzati. Oltre `limit` celle si tengono le prime
+    righe intere (tutte le colonne di una riga o nessuna).
+    """
+    if not structure:
+        return []
+    numeric = [column for column in structure.get('columns', []) if column.get('type') == 'number']
+    rows = limit // len(numeric) if numeric else 0
+    tuples = []
+    for column in numeric:
+        values = column.get('values', [])[:rows]
+        units = column.get('units') or [column.get('unit')] * len(values)
+        for value, unit in zip(values, units):
+            if value is None:
+                continue
+            value, unit = normalize_unit(value, unit)
+            tuples.append({'header': column.get('header', ''), 'value': value, 'unit': unit})
+    return tuples
@@ -0,0 +1,127 @@
+"""
+Estrazione del testo completo degli articoli con lxml.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Sostituisce il percorso BeautifulSoup degli scraper: il documento è parsato
+una sola volta dai bytes della risposta, gli elementi non testuali sono rimossi
+con etree.strip_elements e il contenuto principale è cercato con XPath.
+Il testo prodotto è lo stesso di get_text(separator=' ', strip=True) seguito
+dalla compressione degli spazi.
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from lxml import etree
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage.raw_archive import parse_document, parse_xml
+
+# Elementi non testuali rimossi prima dell'estrazione (il testo che li segue resta)
+ARXIV_STRIP_TAGS = ('script', 'style', 'nav', 'header', 'footer')
+
+# Contenitore principale, in ordine di preferenza
+ARXIV_CONTENT_XPATHS = [
+    etree.XPath("(//div[contains(concat(' ', normalize-space(@class), ' '), ' ltx_page_content ')])[1]"),
+    etree.XPath("(//article)[1]"),
+    etree.XPath("(//body)[1]"),
+]
+
+# Una pagina arXiv HTML valida ha il contenuto LaTeXML o un <article>
+_has_arxiv_content = etree.XPath(
+    "boolean(//div[contains(concat(' ', normalize-space(@class), ' '), ' ltx_page_content ')] | //article)"
+)
+
+# JATS (efetch PMC)
+_jats_abstract = etree.XPath("(//abstract)[1]")
+_jats_contrib_group = etree.XPath("(//contrib-group)[1]")
+_jats_authors = etree.XPath("contrib[@contrib-type='author']")
+_jats_name = etree.XPath("(.//name)[1]")
+_jats_surname = etree.XPath("(.//surname)[1]")
+_jats_given_names = etree.XPath("(.//given-names)[1]")
+_jats_body = etree.XPath("(//body)[1]")
+
+
+def element_text(element) -> str:
+    """Testo di un elemento: frammenti separati da uno spazio, spazi compressi."""
+    if element is None:
+        return ""
+    return ' '.join(' '.join(element.itertext()).split())
+
+
+def strip_non_text(tree, tags: Sequence[str]):
+    """Rimuove commenti ed elementi non testuali, conservando il testo che li segue."""
+    etree.strip_elements(tree, etree.Comment, *tags, with_tail=False)
+
+
+def main_content(tree, xpaths: List[etree.XPath]):
+    """Primo contenitore trovato tra quelli di `xpaths`, o None."""
+    for xpath in xpaths:
+        found = xpath(tree)
+        if found:
+            return found[0]
+    return None
+
+
+def html_full_text(tree, tags: Sequence[str] = ARXIV_STRIP_TAGS,
+                   xpaths: Optional[List[etree.XPath]] = None) -> str:
+    """
+    Testo completo di una pagina HTML già parsata.
+    L'albero viene modificato (rimozione degli elementi non testuali).
+    """
+    strip_non_text(tree, tags)
+    return element_text(main_content(tree, xpaths or ARXIV_CONTENT_XPATHS))
+
+
+def arxiv_full_text(content) -> Optional[str]:
+    """
+    Testo completo di una pagina HTML arXiv.
+
+    Args:
+        content: Bytes della risposta (o stringa)
+
+    Returns:
+        Il testo, o None se la pagina non ha contenuto LaTeXML/<article>
+    """
+    tree = parse_document(content)
+    if not _has_arxiv_content(tree):
+        return None
+    return html_full_text(tree, ARXIV_STRIP_TAGS, ARXIV_CONTENT_XPATHS)
+
+
+def jats_authors(tree) -> List[str]:
+    """Autori dal primo <contrib-group> ("Nome Cognome")."""
+    groups = _jats_contrib_group(tree)
+    if not groups:
+        return []
+    authors = []
+    for contrib in _jats_authors(groups[0]):
+        names = _jats_name(contrib)
+        if not names:
+            continue
+        surname = _jats_surname(names[0])
+        given = _jats_given_names(names[0])
+        if surname and given:
+            authors.append(f"{element_text(given[0])} {element_text(surname[0])}")
+        elif surname:
+            authors.append(element_text(surname[0]))
+    return authors
+
+
+def jats_document(content) -> Dict:
+    """
+    Abstract, autori e testo del body di un articolo JATS (efetch PMC).
+
+    Returns:
+        {'abstract': str, 'authors': List[str], 'full_text': str o None se manca il body}
+    """
+    tree = parse_xml(content)
+    abstract = _jats_abstract(tree)
+    body = _jats_body(tree)
+    return {
+        'abstract': element_text(abstract[0]) if abstract else '',
+        'authors': jats_authors(tree),
+        'full_text': element_text(body[0]) if body else None,
+    }
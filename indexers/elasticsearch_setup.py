@@ -61,7 +61,8 @@ PAPERS_MAPPING = {
                 "type": "text",
                 "analyzer": "text_analyzer",
                 "fields": {
-                    "keyword": {"type": "keyword"}
+                    "keyword": {"type": "keyword"},
+                    "suggest": {"type": "search_as_you_type"}  # Autocompletamento
                 }
             },
             "authors": {
@@ -70,12 +71,21 @@ PAPERS_MAPPING = {
                     "keyword": {"type": "keyword"}
                 }
             },
+            "author_names": {
+                "type": "keyword"  # Lista autori per le aggregazioni (facet)
+            },
             "date": {
                 "type": "text",
                 "fields": {
                     "keyword": {"type": "keyword"}
                 }
             },
+            "year": {
+                "type": "integer"  # Anno di pubblicazione per facet e filtri
+            },
+            "categories": {
+                "type": "keyword"  # Categorie arXiv (es. "cs.DB")
+            },
             "abstract": {
                 "type": "text",
                 "analyzer": "text_analyzer"
@@ -90,6 +100,18 @@ PAPERS_MAPPING = {
             "html_available": {
                 "type": "boolean"
             },
+            "num_tables": {
+                "type": "integer"
+            },
+            "num_figures": {
+                "type": "integer"
+            },
+            "has_tables": {
+                "type": "boolean"
+            },
+            "has_figures": {
+                "type": "boolean"
+            },
             "indexed_at": {
                 "type": "date"
             }
@@ -125,12 +147,60 @@ TABLES_MAPPING = {
             },
             "caption": {
                 "type": "text",
-                "analyzer": "text_analyzer"
+                "analyzer": "text_analyzer",
+                "fields": {
+                    "suggest": {"type": "search_as_you_type"}  # Autocompletamento
+                }
             },
             "body": {
                 "type": "text",
                 "analyzer": "text_analyzer"
             },
+            "columns": {
+                "type": "nested",  # Una colonna per documento nested: header e valori restano associati
+                "properties": {
+                    "header": {
+                        "type": "text",
+                        "analyzer": "text_analyzer",
+                        "fields": {
+                            "raw": {"type": "keyword", "ignore_above": 256}
+                        }
+                    },
+                    "type": {
+                        "type": "keyword"  # "number" o "text"
+                    },
+                    "unit": {
+                        "type": "keyword"
+                    },
+                    "numbers": {
+                        "type": "double"  # Valori numerici della colonna (query range)
+                    }
+                }
+            },
+            "n_rows": {
+                "type": "integer"
+            },
+            "measurements": {
+                # Una tupla per cella numerica: "latency < 10 ms" -> range su value.
+                # Al massimo MAX_MEASUREMENTS per tabella (extractors/table_model.py),
+                # sotto il limite di 10000 oggetti nested per documento
+                "type": "nested",
+                "properties": {
+                    "header": {
+                        "type": "text",
+                        "analyzer": "text_analyzer",
+                        "fields": {
+                            "raw": {"type": "keyword", "ignore_above": 256}
+                        }
+                    },
+                    "value": {
+                        "type": "double"  # Nell'unità base (s, B): indicizzato con BKD tree
+                    },
+                    "unit": {
+                        "type": "keyword"
+                    }
+                }
+            },
             "mentions": {
                 "type": "text",
                 "analyzer": "text_analyzer"
@@ -180,7 +250,10 @@ FIGURES_MAPPING = {
             },
             "caption": {
                 "type": "text",
-                "analyzer": "text_analyzer"
+                "analyzer": "text_analyzer",
+                "fields": {
+                    "suggest": {"type": "search_as_you_type"}  # Autocompletamento
+                }
             },
             "mentions": {
                 "type": "text",
@@ -193,6 +266,24 @@ FIGURES_MAPPING = {
             "position": {
                 "type": "integer"
             },
+            "panel": {
+                "type": "integer"  # Pannello di una figura con sotto-figure
+            },
+            "media_type": {
+                "type": "keyword"  # "image", "object" o "svg" (inline)
+            },
+            "asset_id": {
+                "type": "keyword"  # SHA-256 dell'immagine (storage/asset_store.py)
+            },
+            "phash": {
+                "type": "keyword"
+            },
+            "canonical_asset": {
+                "type": "keyword"  # Immagine canonica del gruppo di duplicati
+            },
+            "cluster_size": {
+                "type": "integer"
+            },
             "indexed_at": {
                 "type": "date"
             }
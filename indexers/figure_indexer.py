@@ -6,16 +6,19 @@ Campi indicizzati:
 - figure_id: ID della figura
 - paper_id: ID dell'articolo
 - url: URL dell'immagine
-- caption: testo della caption
+- caption: testo della caption (con la didascalia del pannello, per le sotto-figure)
+- panel, media_type: pannello di una figura con sotto-figure e tipo di immagine
 - mentions: paragrafi che citano la figura
 - context_paragraphs: paragrafi con termini della caption
+- asset_id, phash, canonical_asset, cluster_size: immagine scaricata e gruppo
+  di duplicati (solo con python main.py --fetch-figures)
 """
 
 import os
 import sys
 import json
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Union
 
 from elasticsearch import Elasticsearch, helpers
 from tqdm import tqdm
@@ -24,6 +27,7 @@ from tqdm import tqdm
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import ELASTICSEARCH_URL, INDEX_FIGURES, FIGURES_DIR
 from indexers.elasticsearch_setup import get_elasticsearch_client, create_indices
+from models.records import FigureRecord
 
 
 class FigureIndexer:
@@ -31,11 +35,12 @@ class FigureIndexer:
     Indicizza le figure estratte in Elasticsearch.
     """
     
-    def __init__(self):
-        self.es = get_elasticsearch_client()
+    def __init__(self, connect: bool = True):
+        # connect=False: solo preparazione documenti (es. per l'indice locale)
+        self.es = get_elasticsearch_client() if connect else None
         self.figures_file = os.path.join(FIGURES_DIR, "figures_metadata.json")
     
-    def load_figures(self) -> List[Dict]:
+    def load_figures(self) -> List[FigureRecord]:
         """Carica le figure dal file JSON."""
         if not os.path.exists(self.figures_file):
             print(f"[WARN] File non trovato: {self.figures_file}")
@@ -43,34 +48,42 @@ class FigureIndexer:
             return []
         
         with open(self.figures_file, 'r', encoding='utf-8') as f:
-            figures = json.load(f)
+            figures = [FigureRecord.from_dict(item) for item in json.load(f)]
         
         print(f"[INFO] Caricate {len(figures)} figure")
         return figures
     
-    def prepare_document(self, figure: Dict) -> Dict:
-        """Prepara un documento figura per l'indicizzazione."""
-        paper_id = figure['paper_id']
+    def prepare_document(self, figure: Union[FigureRecord, Dict]) -> Dict:
+        """Prepara un documento figura per l'indicizzazione (record o dizionario letto dal JSON)."""
+        figure = FigureRecord.from_dict(figure)
+        paper_id = figure.paper_id
         # Determina la fonte dal paper_id
         source = "pubmed" if paper_id.startswith("PMC") else "arxiv"
         
         return {
             "_index": INDEX_FIGURES,
-            "_id": figure['figure_id'],
+            "_id": figure.figure_id,
             "_source": {
-                "figure_id": figure['figure_id'],
+                "figure_id": figure.figure_id,
                 "paper_id": paper_id,
                 "source": source,
-                "url": figure.get('url', ''),
-                "caption": figure.get('caption', ''),
-                "mentions": '\n\n'.join(figure.get('mentions', [])),
-                "context_paragraphs": '\n\n'.join(figure.get('context_paragraphs', [])),
-                "position": figure.get('position', 0),
+                "url": figure.url or '',
+                # I pannelli sono cercati anche per la propria didascalia
+                "caption": ' '.join(part for part in (figure.caption, figure.subcaption) if part),
+                "mentions": '\n\n'.join(figure.mentions or []),
+                "context_paragraphs": '\n\n'.join(figure.context_paragraphs or []),
+                "position": figure.position or 0,
+                "panel": figure.panel,
+                "media_type": figure.media_type or "image",
+                "asset_id": figure.asset_id,
+                "phash": figure.phash,
+                "canonical_asset": figure.canonical_asset,
+                "cluster_size": figure.cluster_size or 1,
                 "indexed_at": datetime.utcnow().isoformat()
             }
         }
     
-    def index_figures(self, figures: List[Dict]) -> int:
+    def index_figures(self, figures: List[FigureRecord]) -> int:
         """
         Indicizza tutte le figure.
         
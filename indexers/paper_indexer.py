@@ -6,8 +6,10 @@ Ingegneria dei Dati 2025/2026 - Homework 5
 import os
 import sys
 import json
+import re
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from elasticsearch import Elasticsearch, helpers
 from tqdm import tqdm
@@ -15,10 +17,14 @@ from tqdm import tqdm
 # Aggiungi il path principale al PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
-    ELASTICSEARCH_URL, INDEX_PAPERS,
-    ARXIV_DATA_DIR, PUBMED_DATA_DIR
+    ELASTICSEARCH_URL, INDEX_PAPERS, TABLES_DIR, FIGURES_DIR
 )
 from indexers.elasticsearch_setup import get_elasticsearch_client, create_indices
+from storage.article_store import open_article_store
+from storage.text_store import FullTextStore
+
+# Anno a 4 cifre nelle date arXiv ("2024-01-15") e PubMed ("2023 Jan 5")
+YEAR_PATTERN = re.compile(r'\b(?:19|20)\d{2}\b')
 
 
 class PaperIndexer:
@@ -27,38 +33,67 @@ class PaperIndexer:
     Campi: titolo, autori, data, abstract, testo completo.
     """
     
-    def __init__(self):
-        self.es = get_elasticsearch_client()
+    def __init__(self, connect: bool = True, text_store: Optional[FullTextStore] = None):
+        # connect=False: solo preparazione documenti (es. per l'indice locale)
+        self.es = get_elasticsearch_client() if connect else None
+        # Testi completi letti dal blob store solo alla preparazione del documento
+        self.text_store = text_store or FullTextStore()
         self.indexed_count = 0
+        # Numero di tabelle/figure per paper_id (per i facet has_tables/has_figures)
+        self.table_counts: Counter = Counter()
+        self.figure_counts: Counter = Counter()
     
-    def load_arxiv_articles(self) -> List[Dict]:
-        """Carica gli articoli arXiv dal file JSON."""
-        metadata_file = os.path.join(ARXIV_DATA_DIR, "articles_metadata.json")
-        
-        if not os.path.exists(metadata_file):
-            print(f"[WARN] File non trovato: {metadata_file}")
-            return []
+    def set_asset_counts(self, tables: List[Dict], figures: List[Dict]):
+        """Registra quante tabelle e figure sono state estratte per ogni articolo."""
+        self.table_counts = Counter(t['paper_id'] for t in tables if t.get('paper_id'))
+        self.figure_counts = Counter(f['paper_id'] for f in figures if f.get('paper_id'))
+    
+    def _extract_year(self, date: str) -> Optional[int]:
+        """Estrae l'anno di pubblicazione dalla data (formati arXiv e PubMed)."""
+        match = YEAR_PATTERN.search(date or '')
+        return int(match.group(0)) if match else None
+    
+    def _facet_fields(self, paper_id: str, article: Dict) -> Dict:
+        """Campi keyword/numerici usati dalle aggregazioni della ricerca."""
+        authors = article.get('authors', [])
+        if isinstance(authors, str):
+            authors = [a.strip() for a in authors.split(',')]
+        num_tables = self.table_counts.get(paper_id, 0)
+        num_figures = self.figure_counts.get(paper_id, 0)
         
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            articles = json.load(f)
+        return {
+            "author_names": [a for a in authors if a],
+            "year": self._extract_year(article.get('date', '')),
+            "categories": article.get('categories', []),
+            "num_tables": num_tables,
+            "num_figures": num_figures,
+            "has_tables": num_tables > 0,
+            "has_figures": num_figures > 0
+        }
+    
+    def load_arxiv_articles(self) -> List[Dict]:
+        """Carica gli articoli arXiv dall'archivio SQLite."""
+        with open_article_store() as store:
+            articles = store.load('arxiv')
         
         print(f"[INFO] Caricati {len(articles)} articoli da arXiv")
         return articles
     
     def load_pubmed_articles(self) -> List[Dict]:
-        """Carica gli articoli PubMed dal file JSON."""
-        metadata_file = os.path.join(PUBMED_DATA_DIR, "articles_metadata.json")
-        
-        if not os.path.exists(metadata_file):
-            print(f"[WARN] File non trovato: {metadata_file}")
-            return []
-        
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            articles = json.load(f)
+        """Carica gli articoli PubMed dall'archivio SQLite."""
+        with open_article_store() as store:
+            articles = store.load('pubmed')
         
         print(f"[INFO] Caricati {len(articles)} articoli da PubMed")
         return articles
     
+    def _load_json(self, path: str) -> List[Dict]:
+        """Carica una lista JSON, restituendo una lista vuota se il file manca."""
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
     def prepare_arxiv_document(self, article: Dict) -> Dict:
         """Prepara un documento arXiv per l'indicizzazione."""
         return {
@@ -71,9 +106,10 @@ class PaperIndexer:
                 "authors": ', '.join(article.get('authors', [])),
                 "date": article.get('date', ''),
                 "abstract": article.get('abstract', ''),
-                "full_text": article.get('full_text', article.get('abstract', '')),
+                "full_text": self.text_store.text_for(article),
                 "url": article.get('abs_url', article.get('html_url', '')),
                 "html_available": article.get('html_available', False),
+                **self._facet_fields(article['arxiv_id'], article),
                 "indexed_at": datetime.utcnow().isoformat()
             }
         }
@@ -90,9 +126,10 @@ class PaperIndexer:
                 "authors": ', '.join(article.get('authors', [])) if isinstance(article.get('authors'), list) else article.get('authors', ''),
                 "date": article.get('date', ''),
                 "abstract": article.get('abstract', ''),
-                "full_text": article.get('full_text', article.get('abstract', '')),
+                "full_text": self.text_store.text_for(article),
                 "url": article.get('url', ''),
                 "html_available": True,
+                **self._facet_fields(article['pmc_id'], article),
                 "indexed_at": datetime.utcnow().isoformat()
             }
         }
@@ -111,21 +148,20 @@ class PaperIndexer:
         if not articles:
             return 0
         
-        # Prepara i documenti
-        if source == "arxiv":
-            documents = [self.prepare_arxiv_document(a) for a in articles]
-        else:
-            documents = [self.prepare_pubmed_document(a) for a in articles]
+        # Documenti preparati on demand: i testi completi vengono letti dal blob store
+        # mentre streaming_bulk consuma le azioni, un blocco alla volta
+        prepare = self.prepare_arxiv_document if source == "arxiv" else self.prepare_pubmed_document
+        documents = (prepare(a) for a in articles)
         
         # Indicizza in bulk
-        print(f"\n📤 Indicizzazione {len(documents)} articoli da {source}...")
+        print(f"\n📤 Indicizzazione {len(articles)} articoli da {source}...")
         
         success_count = 0
         failed_count = 0
         
         # Usa bulk helper per efficienza
         try:
-            with tqdm(total=len(documents), desc="Indicizzazione") as pbar:
+            with tqdm(total=len(articles), desc="Indicizzazione") as pbar:
                 for success, info in helpers.streaming_bulk(
                     self.es,
                     documents,
@@ -141,7 +177,8 @@ class PaperIndexer:
         except Exception as e:
             print(f"[ERROR] Errore durante indicizzazione bulk: {e}")
             # Fallback: indicizza uno per uno
-            for doc in tqdm(documents, desc="Indicizzazione (fallback)"):
+            documents = (prepare(a) for a in articles)
+            for doc in tqdm(documents, total=len(articles), desc="Indicizzazione (fallback)"):
                 try:
                     self.es.index(
                         index=doc['_index'],
@@ -164,6 +201,12 @@ class PaperIndexer:
         # Assicurati che l'indice esista
         create_indices(self.es, force_recreate=False)
         
+        # Conteggi tabelle/figure per i facet (se l'estrazione è già stata eseguita)
+        self.set_asset_counts(
+            self._load_json(os.path.join(TABLES_DIR, "tables_metadata.json")),
+            self._load_json(os.path.join(FIGURES_DIR, "figures_metadata.json"))
+        )
+        
         total_indexed = 0
         
         # Indicizza articoli arXiv
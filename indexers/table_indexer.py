@@ -7,6 +7,8 @@ Campi indicizzati:
 - table_id: ID della tabella
 - caption: testo della caption
 - body: contenuto della tabella
+- columns: colonne della tabella (nested: intestazione, tipo, unità, valori numerici)
+- measurements: tuple (intestazione, valore, unità) delle celle numeriche (nested, query range)
 - mentions: paragrafi che citano la tabella
 - context_paragraphs: paragrafi con termini della tabella
 """
@@ -15,7 +17,7 @@ import os
 import sys
 import json
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 
 from elasticsearch import Elasticsearch, helpers
 from tqdm import tqdm
@@ -24,6 +26,8 @@ from tqdm import tqdm
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import ELASTICSEARCH_URL, INDEX_TABLES, TABLES_DIR
 from indexers.elasticsearch_setup import get_elasticsearch_client, create_indices
+from models.records import TableRecord
+from extractors.table_model import measurements
 
 
 class TableIndexer:
@@ -31,11 +35,12 @@ class TableIndexer:
     Indicizza le tabelle estratte in Elasticsearch.
     """
     
-    def __init__(self):
-        self.es = get_elasticsearch_client()
+    def __init__(self, connect: bool = True):
+        # connect=False: solo preparazione documenti (es. per l'indice locale)
+        self.es = get_elasticsearch_client() if connect else None
         self.tables_file = os.path.join(TABLES_DIR, "tables_metadata.json")
     
-    def load_tables(self) -> List[Dict]:
+    def load_tables(self) -> List[TableRecord]:
         """Carica le tabelle dal file JSON."""
         if not os.path.exists(self.tables_file):
             print(f"[WARN] File non trovato: {self.tables_file}")
@@ -43,34 +48,57 @@ class TableIndexer:
             return []
         
         with open(self.tables_file, 'r', encoding='utf-8') as f:
-            tables = json.load(f)
+            tables = [TableRecord.from_dict(item) for item in json.load(f)]
         
         print(f"[INFO] Caricate {len(tables)} tabelle")
         return tables
     
-    def prepare_document(self, table: Dict) -> Dict:
-        """Prepara un documento tabella per l'indicizzazione."""
-        paper_id = table['paper_id']
+    def prepare_document(self, table: Union[TableRecord, Dict]) -> Dict:
+        """Prepara un documento tabella per l'indicizzazione (record o dizionario letto dal JSON)."""
+        table = TableRecord.from_dict(table)
+        paper_id = table.paper_id
         # Determina la fonte dal paper_id
         source = "pubmed" if paper_id.startswith("PMC") else "arxiv"
         
         return {
             "_index": INDEX_TABLES,
-            "_id": table['table_id'],
+            "_id": table.table_id,
             "_source": {
-                "table_id": table['table_id'],
+                "table_id": table.table_id,
                 "paper_id": paper_id,
                 "source": source,
-                "caption": table.get('caption', ''),
-                "body": table.get('body', ''),
-                "mentions": '\n\n'.join(table.get('mentions', [])),
-                "context_paragraphs": '\n\n'.join(table.get('context_paragraphs', [])),
-                "position": table.get('position', 0),
+                "caption": table.caption or '',
+                "body": table.body or '',
+                "columns": self.prepare_columns(table.structure),
+                "n_rows": (table.structure or {}).get('n_rows', 0),
+                "measurements": measurements(table.structure),
+                "mentions": '\n\n'.join(table.mentions or []),
+                "context_paragraphs": '\n\n'.join(table.context_paragraphs or []),
+                "position": table.position or 0,
                 "indexed_at": datetime.now(timezone.utc).isoformat()
             }
         }
     
-    def index_tables(self, tables: List[Dict]) -> int:
+    def prepare_columns(self, structure: Optional[Dict]) -> List[Dict]:
+        """
+        Colonne della struttura colonnare come documenti nested:
+        le colonne numeriche portano i valori (senza celle vuote) per le query di intervallo.
+        """
+        if not structure:
+            return []
+        columns = []
+        for column in structure.get('columns', []):
+            entry = {
+                "header": column.get('header', ''),
+                "type": column.get('type', 'text'),
+                "unit": column.get('unit')
+            }
+            if column.get('type') == 'number':
+                entry["numbers"] = [v for v in column.get('values', []) if v is not None]
+            columns.append(entry)
+        return columns
+    
+    def index_tables(self, tables: List[TableRecord]) -> int:
         """
         Indicizza tutte le tabelle.
         
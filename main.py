@@ -6,13 +6,28 @@ Questo script esegue l'intero workflow:
 1. Scraping articoli da arXiv e PubMed
 2. Estrazione tabelle e figure
 3. Indicizzazione in Elasticsearch
+
+Uso (non interattivo, adatto a cron/batch):
+    python main.py                                  # tutte le fasi da zero
+    python main.py --resume                         # riprende un'esecuzione interrotta
+    python main.py --stages extract,index --resume  # salta lo scraping
+    python main.py --since 2024-01-01               # solo articoli pubblicati da questa data
+    python main.py --streaming                      # fasi sovrapposte (pipeline/streaming.py)
+    python main.py --fetch-figures                  # scarica e deduplica le immagini delle figure
+    python main.py --stages extract --profile-extraction  # tempi per fase e articoli più lenti
+    python main.py --interactive                    # menu dei dati esistenti
+
+Le fasi completate per ogni articolo sono registrate in data/pipeline_manifest.json
+(vedi pipeline/checkpoints.py).
 """
 
 import os
 import sys
 import json
 import logging
+import argparse
 import shutil
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 
@@ -24,23 +39,58 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Costanti
-ARXIV_METADATA_FILE = "arxiv_metadata.json"
-PUBMED_METADATA_FILE = "pubmed_metadata.json"
-HTML_GLOB_PATTERN = "*.html"
+# Documenti scaricati: HTML/XML, non compressi o compressi (.gz, .zst)
+RAW_GLOB_PATTERNS = ("*.html", "*.xml", "*.html.*", "*.xml.*")
+TABLES_FILE = "extracted_tables.json"
+FIGURES_FILE = "extracted_figures.json"
 
 # Importa moduli del progetto
 from config import (
     DATA_DIR, PAPERS_DIR, ARXIV_KEYWORDS, PUBMED_KEYWORDS,
-    ELASTICSEARCH_URL, ARXIV_DATA_DIR, PUBMED_DATA_DIR
+    ELASTICSEARCH_URL, ARXIV_DATA_DIR, PUBMED_DATA_DIR, ARTICLE_STORE_PATH, FULL_TEXT_DIR,
+    CHECKPOINT_CHUNK_SIZE
 )
 from scrapers.arxiv_scraper import ArxivScraper
 from scrapers.pubmed_scraper import PubMedScraper
+from scrapers.http_client import get_http_client
 from extractors.table_extractor import TableExtractor
 from extractors.figure_extractor import FigureExtractor
 from indexers.elasticsearch_setup import get_elasticsearch_client, create_indices
 from indexers.paper_indexer import PaperIndexer
 from indexers.table_indexer import TableIndexer
 from indexers.figure_indexer import FigureIndexer
+from search.local_index import write_local_indices
+from pipeline.streaming import StreamingPipeline, extract_article
+from pipeline.extraction_profile import ExtractionProfiler, no_stage, PROFILE_FILE
+from pipeline.harvest import KeywordScheduler
+from pipeline.figure_assets import process_figures
+from pipeline.checkpoints import (
+    CheckpointManifest, STAGES, paper_key, published_since
+)
+from storage.article_store import open_article_store
+from storage.raw_archive import list_raw
+from models.records import TableRecord, FigureRecord, json_default
+
+
+def delete_existing_data():
+    """Elimina metadata, file scaricati, dati estratti e checkpoint."""
+    print("\n[INFO] Eliminazione dati esistenti...")
+    # Elimina HTML/XML scaricati (compressi o no)
+    for directory in (ARXIV_DATA_DIR, PUBMED_DATA_DIR):
+        for pattern in RAW_GLOB_PATTERNS:
+            for f in directory.glob(pattern):
+                f.unlink()
+    # Elimina archivio articoli (con i file WAL di SQLite)
+    for suffix in ("", "-wal", "-shm"):
+        db_file = Path(f"{ARTICLE_STORE_PATH}{suffix}")
+        if db_file.exists():
+            db_file.unlink()
+    # Elimina i testi completi compressi
+    if FULL_TEXT_DIR.exists():
+        shutil.rmtree(FULL_TEXT_DIR)
+    # Elimina dati estratti e manifest dei checkpoint
+    for f in DATA_DIR.glob("*.json"):
+        f.unlink()
 
 
 def check_existing_data():
@@ -50,17 +100,15 @@ def check_existing_data():
     Returns:
         str: 'fresh' per ricominciare, 'continue' per continuare, 'skip' per saltare scraping
     """
-    arxiv_metadata = DATA_DIR / ARXIV_METADATA_FILE
-    pubmed_metadata = DATA_DIR / PUBMED_METADATA_FILE
-    
-    arxiv_exists = arxiv_metadata.exists()
-    pubmed_exists = pubmed_metadata.exists()
+    with open_article_store() as store:
+        arxiv_count = store.count('arxiv')
+        pubmed_count = store.count('pubmed')
     
     # Conta file HTML/XML esistenti
-    arxiv_html_count = len(list(ARXIV_DATA_DIR.glob(HTML_GLOB_PATTERN))) if ARXIV_DATA_DIR.exists() else 0
-    pubmed_html_count = len(list(PUBMED_DATA_DIR.glob(HTML_GLOB_PATTERN))) + len(list(PUBMED_DATA_DIR.glob("*.xml"))) if PUBMED_DATA_DIR.exists() else 0
+    arxiv_html_count = len(list_raw(ARXIV_DATA_DIR))
+    pubmed_html_count = len(list_raw(PUBMED_DATA_DIR))
     
-    if not arxiv_exists and not pubmed_exists and arxiv_html_count == 0 and pubmed_html_count == 0:
+    if not arxiv_count and not pubmed_count and arxiv_html_count == 0 and pubmed_html_count == 0:
         print("\n[INFO] Nessun dato esistente trovato. Avvio nuovo scraping...")
         return 'fresh'
     
@@ -68,19 +116,8 @@ def check_existing_data():
     print("DATI ESISTENTI TROVATI")
     print("=" * 60)
     
-    if arxiv_exists:
-        with open(arxiv_metadata, 'r', encoding='utf-8') as f:
-            arxiv_data = json.load(f)
-        print(f"   arXiv: {len(arxiv_data)} articoli in metadata, {arxiv_html_count} file HTML")
-    else:
-        print(f"   arXiv: nessun metadata, {arxiv_html_count} file HTML")
-    
-    if pubmed_exists:
-        with open(pubmed_metadata, 'r', encoding='utf-8') as f:
-            pubmed_data = json.load(f)
-        print(f"   PubMed: {len(pubmed_data)} articoli in metadata, {pubmed_html_count} file HTML")
-    else:
-        print(f"   PubMed: nessun metadata, {pubmed_html_count} file HTML")
+    print(f"   arXiv: {arxiv_count} articoli in archivio, {arxiv_html_count} file HTML")
+    print(f"   PubMed: {pubmed_count} articoli in archivio, {pubmed_html_count} file HTML")
     
     print("=" * 60)
     print("\nCosa vuoi fare?")
@@ -96,22 +133,7 @@ def check_existing_data():
             if choice == '1':
                 confirm = input("Sei sicuro? Tutti i dati saranno eliminati (s/n): ").strip().lower()
                 if confirm == 's':
-                    print("\n[INFO] Eliminazione dati esistenti...")
-                    # Elimina metadata
-                    if arxiv_metadata.exists():
-                        arxiv_metadata.unlink()
-                    if pubmed_metadata.exists():
-                        pubmed_metadata.unlink()
-                    # Elimina HTML files
-                    if ARXIV_DATA_DIR.exists():
-                        for f in ARXIV_DATA_DIR.glob(HTML_GLOB_PATTERN):
-                            f.unlink()
-                    if PUBMED_DATA_DIR.exists():
-                        for f in PUBMED_DATA_DIR.glob(HTML_GLOB_PATTERN):
-                            f.unlink()
-                    # Elimina altri file json nella data dir
-                    for f in DATA_DIR.glob("*.json"):
-                        f.unlink()
+                    delete_existing_data()
                     print("[OK] Dati eliminati. Avvio nuovo scraping...")
                     return 'fresh'
                 else:
@@ -137,260 +159,299 @@ def check_existing_data():
             sys.exit(0)
 
 
-def load_existing_articles():
-    """Carica articoli esistenti dai file metadata."""
-    arxiv_articles = []
-    pubmed_articles = []
-    
-    arxiv_metadata = DATA_DIR / ARXIV_METADATA_FILE
-    pubmed_metadata = DATA_DIR / PUBMED_METADATA_FILE
+def load_existing_articles(store=None):
+    """Carica gli articoli esistenti dall'archivio SQLite."""
+    store = store or open_article_store()
     
-    if arxiv_metadata.exists():
-        with open(arxiv_metadata, 'r', encoding='utf-8') as f:
-            arxiv_articles = json.load(f)
+    arxiv_articles = store.load('arxiv')
+    if arxiv_articles:
         print(f"[INFO] Caricati {len(arxiv_articles)} articoli arXiv esistenti")
     
-    if pubmed_metadata.exists():
-        with open(pubmed_metadata, 'r', encoding='utf-8') as f:
-            pubmed_articles = json.load(f)
+    pubmed_articles = store.load('pubmed')
+    if pubmed_articles:
         print(f"[INFO] Caricati {len(pubmed_articles)} articoli PubMed esistenti")
     
     return arxiv_articles, pubmed_articles
 
 
-def run_scraping(continue_mode=False):
+def load_extracted_data():
+    """Carica tabelle e figure estratte da un'esecuzione precedente."""
+    all_tables = _load_json(DATA_DIR / TABLES_FILE, TableRecord)
+    all_figures = _load_json(DATA_DIR / FIGURES_FILE, FigureRecord)
+    logger.info(f"[OK] Caricate {len(all_tables)} tabelle e {len(all_figures)} figure")
+    return all_tables, all_figures
+
+
+def _load_json(path, record_type):
+    """Lista di record (TableRecord/FigureRecord) da un file JSON, vuota se manca."""
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [record_type.from_dict(item) for item in json.load(f)]
+
+
+def _save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
+
+
+def _chunks(items, size=CHECKPOINT_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _asset_key(asset):
+    """Chiave nel manifest dell'articolo a cui appartiene una tabella/figura."""
+    return f"{asset.get('source')}:{asset.get('paper_id')}"
+
+
+def _download_source(source, scraper, found, manifest, since, store):
+    """Download degli articoli nuovi di una fonte, salvati a blocchi nell'archivio."""
+    label = source.upper()
+    
+    # Filtra articoli fuori dall'intervallo --since
+    new_articles = [a for a in found if published_since(a, since)]
+    
+    # Download a blocchi: ogni blocco costa solo l'upsert delle sue righe, poi il checkpoint
+    if new_articles:
+        logger.info(f"\n[{label}] Download parallelo di {len(new_articles)} articoli...")
+    for chunk in _chunks(new_articles):
+        store.upsert(source, scraper.download_articles_parallel(chunk))
+        # Solo i download riusciti: gli altri saranno ritentati con --resume
+        manifest.mark_done('scrape', [paper_key(a, source) for a in chunk if a.get('html_path')])
+    
+    articles = store.load(source)
+    logger.info(f"[OK] {source}: totale {len(articles)} articoli")
+    return articles
+
+
+def _pending_downloads(source, store, manifest):
+    """Articoli in archivio da riscaricare: senza file scaricato o non completati nel manifest."""
+    scraped = manifest.done('scrape')
+    return [
+        article for article in store.load(source)
+        if not article.get('html_path') or paper_key(article, source) not in scraped
+    ]
+
+
+def run_scraping(continue_mode=False, manifest=None, since=None, store=None):
     """
     Esegue lo scraping di articoli da arXiv e PubMed.
     
+    Le ricerche di tutte le keyword partono in parallelo (nel rate limit di ogni host)
+    e i risultati sono deduplicati prima del download.
+    
     Args:
         continue_mode: Se True, salta articoli già scaricati
+        manifest: Checkpoint della pipeline (default: data/pipeline_manifest.json)
+        since: Se indicata, solo articoli pubblicati da questa data
+        store: Archivio articoli (default: data/articles.db)
     """
     logger.info("=" * 60)
     logger.info("FASE 1: SCRAPING ARTICOLI")
     logger.info("=" * 60)
     
-    # Carica articoli esistenti se in modalità continue
-    existing_arxiv_ids = set()
-    existing_pubmed_ids = set()
-    arxiv_articles = []
-    pubmed_articles = []
-    
+    manifest = manifest or CheckpointManifest()
+    store = store or open_article_store()
+    scrapers = {'arxiv': ArxivScraper(), 'pubmed': PubMedScraper()}
+    keywords = {'arxiv': ARXIV_KEYWORDS, 'pubmed': PUBMED_KEYWORDS}
+    
+    # In modalità continue gli articoli già in archivio non vengono riscaricati
+    # e le ricerche chiedono solo gli articoli successivi all'ultima raccolta della keyword
+    existing = {source: store.ids(source) if continue_mode else set() for source in scrapers}
+    for source, ids in existing.items():
+        if ids:
+            logger.info(f"[INFO] Trovati {len(ids)} articoli {source} esistenti")
+    
+    logger.info(f"\n[SEARCH] Ricerca in parallelo: {keywords}")
+    scheduler = KeywordScheduler(scrapers, store, incremental=continue_mode, seen=existing)
+    found = scheduler.run(keywords)
+    for line in scheduler.report():
+        logger.info(line)
+    
+    # Download falliti o interrotti in un'esecuzione precedente
     if continue_mode:
-        arxiv_metadata = DATA_DIR / ARXIV_METADATA_FILE
-        pubmed_metadata = DATA_DIR / PUBMED_METADATA_FILE
-        
-        if arxiv_metadata.exists():
-            with open(arxiv_metadata, 'r', encoding='utf-8') as f:
-                arxiv_articles = json.load(f)
-            existing_arxiv_ids = {a.get('arxiv_id') for a in arxiv_articles}
-            logger.info(f"[INFO] Trovati {len(existing_arxiv_ids)} articoli arXiv esistenti")
-        
-        if pubmed_metadata.exists():
-            with open(pubmed_metadata, 'r', encoding='utf-8') as f:
-                pubmed_articles = json.load(f)
-            existing_pubmed_ids = {a.get('pmc_id') or a.get('pmid') for a in pubmed_articles}
-            logger.info(f"[INFO] Trovati {len(existing_pubmed_ids)} articoli PubMed esistenti")
-    
-    # Scraping arXiv
-    logger.info(f"\n[ARXIV] Scraping arXiv con keywords: {ARXIV_KEYWORDS}")
-    arxiv_scraper = ArxivScraper()
-    new_arxiv_articles = []
-    
-    for keyword in ARXIV_KEYWORDS:
-        logger.info(f"  Cercando: {keyword}")
-        articles = arxiv_scraper.search_articles(keyword, max_results=50)
-        logger.info(f"  Trovati {len(articles)} articoli")
-        
-        # Filtra articoli già esistenti
-        for article in articles:
-            if continue_mode and article.get('arxiv_id') in existing_arxiv_ids:
-                continue  # Già scaricato
-            new_arxiv_articles.append(article)
-    
-    # Download parallelo degli articoli arXiv
-    if new_arxiv_articles:
-        logger.info(f"\n[ARXIV] Download parallelo di {len(new_arxiv_articles)} articoli...")
-        new_arxiv_articles = arxiv_scraper.download_articles_parallel(new_arxiv_articles)
-        arxiv_articles.extend(new_arxiv_articles)
-    
-    # Rimuovi duplicati per arxiv_id
-    seen_ids = set()
-    unique_arxiv = []
-    for a in arxiv_articles:
-        aid = a.get('arxiv_id')
-        if aid and aid not in seen_ids:
-            seen_ids.add(aid)
-            unique_arxiv.append(a)
-    arxiv_articles = unique_arxiv
-    
-    logger.info(f"[OK] arXiv: totale {len(arxiv_articles)} articoli")
-    
-    # Salva metadata arXiv
-    arxiv_meta_path = DATA_DIR / ARXIV_METADATA_FILE
-    with open(arxiv_meta_path, 'w', encoding='utf-8') as f:
-        json.dump(arxiv_articles, f, ensure_ascii=False, indent=2)
-    
-    # Scraping PubMed
-    logger.info(f"\n[PUBMED] Scraping PubMed con keywords: {PUBMED_KEYWORDS}")
-    pubmed_scraper = PubMedScraper()
-    new_pubmed_articles = []
-    
-    for keyword in PUBMED_KEYWORDS:
-        logger.info(f"  Cercando: {keyword}")
-        articles = pubmed_scraper.search_via_api(keyword, max_results=500)
-        logger.info(f"  Trovati {len(articles)} articoli open access")
-        
-        # Filtra articoli già esistenti
-        for article in articles:
-            article_id = article.get('pmc_id') or article.get('pmid')
-            if continue_mode and article_id in existing_pubmed_ids:
-                continue  # Già scaricato
-            new_pubmed_articles.append(article)
-    
-    # Download parallelo degli articoli PubMed
-    if new_pubmed_articles:
-        logger.info(f"\n[PUBMED] Download parallelo di {len(new_pubmed_articles)} articoli...")
-        new_pubmed_articles = pubmed_scraper.download_articles_parallel(new_pubmed_articles)
-        pubmed_articles.extend(new_pubmed_articles)
-    
-    # Rimuovi duplicati
-    seen_ids = set()
-    unique_pubmed = []
-    for a in pubmed_articles:
-        pid = a.get('pmc_id') or a.get('pmid')
-        if pid and pid not in seen_ids:
-            seen_ids.add(pid)
-            unique_pubmed.append(a)
-    pubmed_articles = unique_pubmed
-    
-    logger.info(f"[OK] PubMed: totale {len(pubmed_articles)} articoli")
-    
-    # Salva metadata PubMed
-    pubmed_meta_path = DATA_DIR / PUBMED_METADATA_FILE
-    with open(pubmed_meta_path, 'w', encoding='utf-8') as f:
-        json.dump(pubmed_articles, f, ensure_ascii=False, indent=2)
+        for source in scrapers:
+            retry = _pending_downloads(source, store, manifest)
+            if retry:
+                logger.info(f"[INFO] {len(retry)} articoli {source} da riscaricare")
+                found[source] = found[source] + retry
+    
+    arxiv_articles = _download_source('arxiv', scrapers['arxiv'], found['arxiv'], manifest, since, store)
+    pubmed_articles = _download_source('pubmed', scrapers['pubmed'], found['pubmed'], manifest, since, store)
+    
+    # Mark aggiornati solo dopo che gli articoli trovati sono in archivio
+    scheduler.save_marks()
+    for line in get_http_client().report():
+        logger.info(line)
     
     return arxiv_articles, pubmed_articles
 
 
-def run_extraction(arxiv_articles, pubmed_articles):
-    """Estrae tabelle e figure dagli articoli scaricati."""
+def run_extraction(arxiv_articles, pubmed_articles, manifest=None, resume=False, since=None,
+                   profiler=None):
+    """
+    Estrae tabelle e figure dagli articoli scaricati.
+    
+    Con resume=True (o --since) i risultati già presenti degli articoli completati
+    (o fuori dall'intervallo) vengono mantenuti e quegli articoli non sono rielaborati.
+    Con un ExtractionProfiler (--profile-extraction) tempi e allocazioni sono
+    misurati per articolo e per fase.
+    """
     logger.info("\n" + "=" * 60)
     logger.info("FASE 2: ESTRAZIONE TABELLE E FIGURE")
     logger.info("=" * 60)
     
-    table_extractor = TableExtractor()
-    figure_extractor = FigureExtractor()
+    manifest = manifest or CheckpointManifest()
+    tables_path = DATA_DIR / TABLES_FILE
+    figures_path = DATA_DIR / FIGURES_FILE
     
-    all_tables = []
-    all_figures = []
+    # Senza i file estratti i checkpoint non servono: si rielabora tutto
+    done = manifest.done('extract') if resume and tables_path.exists() and figures_path.exists() else set()
     
-    # Processa articoli arXiv
-    logger.info("\n[EXTRACT] Estrazione da articoli arXiv...")
-    for article in arxiv_articles:
-        if 'html_path' not in article:
-            continue
-        
-        html_path = Path(article['html_path'])
-        if not html_path.exists():
-            continue
-        
-        paper_id = article.get('arxiv_id', html_path.stem)
-        base_url = f"https://arxiv.org/html/{paper_id}/"
-        
-        try:
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            # Estrai tabelle
-            tables = table_extractor.extract_from_html(html_content, paper_id, 'arxiv')
-            all_tables.extend(tables)
-            
-            # Estrai figure
-            figures = figure_extractor.extract_from_html(html_content, paper_id, 'arxiv', base_url)
-            all_figures.extend(figures)
-            
-        except Exception as e:
-            logger.warning(f"  Errore con {paper_id}: {e}")
+    pending = {}
+    kept = set()
+    for source, articles in (('arxiv', arxiv_articles), ('pubmed', pubmed_articles)):
+        pending[source] = []
+        for article in articles:
+            key = paper_key(article, source)
+            if key in done or not published_since(article, since):
+                kept.add(key)
+            else:
+                pending[source].append(article)
     
-    logger.info(f"  Estratte {len(all_tables)} tabelle e {len(all_figures)} figure da arXiv")
+    all_tables = [t for t in _load_json(tables_path, TableRecord) if _asset_key(t) in kept] if kept else []
+    all_figures = [f for f in _load_json(figures_path, FigureRecord) if _asset_key(f) in kept] if kept else []
+    if kept:
+        logger.info(f"[INFO] {len(kept)} articoli già elaborati: "
+                    f"mantenute {len(all_tables)} tabelle e {len(all_figures)} figure")
     
-    # Processa articoli PubMed
-    logger.info("\n[EXTRACT] Estrazione da articoli PubMed...")
-    for article in pubmed_articles:
-        if 'html_path' not in article:
-            continue
-        
-        html_path = Path(article['html_path'])
-        if not html_path.exists():
-            continue
-        
-        paper_id = article.get('pmc_id', article.get('pmid', html_path.stem))
-        base_url = f"https://pmc.ncbi.nlm.nih.gov/articles/{paper_id}/"
-        
-        try:
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            # Estrai tabelle
-            tables = table_extractor.extract_from_html(html_content, paper_id, 'pubmed')
-            all_tables.extend(tables)
-            
-            # Estrai figure  
-            figures = figure_extractor.extract_from_html(html_content, paper_id, 'pubmed', base_url)
-            all_figures.extend(figures)
+    table_extractor = TableExtractor()
+    figure_extractor = FigureExtractor()
+    if profiler is not None:
+        profiler.instrument(table_extractor, figure_extractor)
+    stage = profiler.stage if profiler is not None else no_stage
+    
+    for source, articles in pending.items():
+        logger.info(f"\n[EXTRACT] Estrazione da {len(articles)} articoli {source}...")
+        source_tables = source_figures = 0
+        for chunk in _chunks(articles):
+            # Solo gli articoli estratti senza errori: gli altri saranno ritentati con --resume
+            extracted = []
+            for article in chunk:
+                key = paper_key(article, source)
+                measured = profiler.document(key, source) if profiler is not None else nullcontext()
+                try:
+                    with measured:
+                        tables, figures = extract_article(article, source, table_extractor,
+                                                          figure_extractor, profiler)
+                except Exception as e:
+                    logger.warning(f"  Errore con {article.get('html_path')}: {e}")
+                    continue
+                extracted.append(key)
+                all_tables.extend(tables)
+                all_figures.extend(figures)
+                source_tables += len(tables)
+                source_figures += len(figures)
             
-        except Exception as e:
-            logger.warning(f"  Errore con {paper_id}: {e}")
-    
-    logger.info(f"[OK] Totale: {len(all_tables)} tabelle e {len(all_figures)} figure estratte")
+            # Salva dati estratti prima di registrare il checkpoint
+            with stage('json_write'):
+                _save_json(tables_path, all_tables)
+                _save_json(figures_path, all_figures)
+            manifest.mark_done('extract', extracted)
+        logger.info(f"  Estratte {source_tables} tabelle e {source_figures} figure da {source}")
     
-    # Salva dati estratti
-    tables_path = DATA_DIR / "extracted_tables.json"
-    with open(tables_path, 'w', encoding='utf-8') as f:
-        json.dump(all_tables, f, ensure_ascii=False, indent=2)
+    with stage('json_write'):
+        _save_json(tables_path, all_tables)
+        _save_json(figures_path, all_figures)
     
-    figures_path = DATA_DIR / "extracted_figures.json"
-    with open(figures_path, 'w', encoding='utf-8') as f:
-        json.dump(all_figures, f, ensure_ascii=False, indent=2)
+    logger.info(f"[OK] Totale: {len(all_tables)} tabelle e {len(all_figures)} figure estratte")
     
     return all_tables, all_figures
 
 
-def run_indexing(arxiv_articles, pubmed_articles, all_tables, all_figures):
-    """Indicizza tutti i dati in Elasticsearch."""
+def report_extraction_profile(profiler, top=10, dump_path=None):
+    """Stampa il report del profilo, lo salva in JSON e scrive il dump cProfile."""
+    for line in profiler.report(top):
+        logger.info(line)
+    profiler.save(DATA_DIR / PROFILE_FILE, top)
+    logger.info(f"[OK] Profilo dell'estrazione salvato in {DATA_DIR / PROFILE_FILE}")
+    if dump_path and profiler.dump_stats(dump_path):
+        logger.info(f"[OK] Profilo cProfile in {dump_path} (python -m pstats {dump_path})")
+
+
+def run_figure_assets(all_figures):
+    """
+    Scarica le immagini delle figure e raggruppa i duplicati (pipeline/figure_assets.py).
+    Le figure aggiornate (asset_id, phash, canonical_asset) sono salvate nel file JSON.
+    """
+    logger.info("\n" + "=" * 60)
+    logger.info("FASE 2b: IMMAGINI DELLE FIGURE")
+    logger.info("=" * 60)
+    
+    process_figures(all_figures)
+    _save_json(DATA_DIR / FIGURES_FILE, all_figures)
+    return all_figures
+
+
+def run_indexing(arxiv_articles, pubmed_articles, all_tables, all_figures,
+                 manifest=None, resume=False, since=None):
+    """
+    Indicizza i dati in Elasticsearch.
+    
+    Con resume=True gli articoli già indicizzati (e le loro tabelle/figure) vengono saltati.
+    """
     logger.info("\n" + "=" * 60)
     logger.info("FASE 3: INDICIZZAZIONE ELASTICSEARCH")
     logger.info("=" * 60)
     
+    manifest = manifest or CheckpointManifest()
+    
+    # Indice locale binario (ricerca senza Elasticsearch), accanto ai file JSON
+    logger.info("\n[INDEX] Scrittura indice locale...")
+    for index_name, count in write_local_indices().items():
+        logger.info(f"  {index_name}: {count} documenti")
+    
     # Setup Elasticsearch
     logger.info("\n[ES] Configurazione indici Elasticsearch...")
     es = get_elasticsearch_client()
     create_indices(es)
     
-    # Indicizza articoli
-    logger.info("\n[INDEX] Indicizzazione articoli...")
     paper_indexer = PaperIndexer()
-    
-    # Indicizza arXiv
-    arxiv_count = paper_indexer.index_articles(arxiv_articles, "arxiv")
-    logger.info(f"  Indicizzati {arxiv_count} articoli arXiv")
-    
-    # Indicizza PubMed
-    pubmed_count = paper_indexer.index_articles(pubmed_articles, "pubmed")
-    logger.info(f"  Indicizzati {pubmed_count} articoli PubMed")
-    
-    # Indicizza tabelle
-    logger.info("\n[INDEX] Indicizzazione tabelle...")
+    paper_indexer.set_asset_counts(all_tables, all_figures)
     table_indexer = TableIndexer()
-    table_count = table_indexer.index_tables(all_tables)
-    logger.info(f"  Indicizzate {table_count} tabelle")
-    
-    # Indicizza figure
-    logger.info("\n[INDEX] Indicizzazione figure...")
     figure_indexer = FigureIndexer()
-    figure_count = figure_indexer.index_figures(all_figures)
-    logger.info(f"  Indicizzate {figure_count} figure")
+    
+    tables_by_paper = {}
+    for table in all_tables:
+        tables_by_paper.setdefault(_asset_key(table), []).append(table)
+    figures_by_paper = {}
+    for figure in all_figures:
+        figures_by_paper.setdefault(_asset_key(figure), []).append(figure)
+    
+    done = manifest.done('index') if resume else set()
+    totals = {'articles': 0, 'tables': 0, 'figures': 0}
+    
+    for source, articles in (('arxiv', arxiv_articles), ('pubmed', pubmed_articles)):
+        pending = [
+            a for a in articles
+            if paper_key(a, source) not in done and published_since(a, since)
+        ]
+        logger.info(f"\n[INDEX] Indicizzazione {len(pending)} articoli {source} "
+                    f"({len(articles) - len(pending)} saltati)...")
+        
+        # Tabelle e figure prima dell'articolo: il checkpoint arriva a blocco completo
+        for chunk in _chunks(pending):
+            keys = [paper_key(a, source) for a in chunk]
+            chunk_tables = [t for key in keys for t in tables_by_paper.get(key, [])]
+            chunk_figures = [f for key in keys for f in figures_by_paper.get(key, [])]
+            totals['tables'] += table_indexer.index_tables(chunk_tables)
+            totals['figures'] += figure_indexer.index_figures(chunk_figures)
+            totals['articles'] += paper_indexer.index_articles(chunk, source)
+            manifest.mark_done('index', keys)
+    
+    logger.info(f"  Indicizzati {totals['articles']} articoli, "
+                f"{totals['tables']} tabelle, {totals['figures']} figure")
     
     # Statistiche finali
     logger.info("\n" + "=" * 60)
@@ -401,8 +462,71 @@ def run_indexing(arxiv_articles, pubmed_articles, all_tables, all_figures):
     get_index_stats(es)
 
 
-def main():
-    """Esegue la pipeline completa."""
+def parse_stages(value):
+    """Converte "scrape,extract" nella lista di fasi (nell'ordine della pipeline)."""
+    stages = {s.strip() for s in value.split(',') if s.strip()}
+    unknown = stages - set(STAGES)
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(
+            f"fasi non valide: {', '.join(sorted(unknown)) or value} (ammesse: {','.join(STAGES)})"
+        )
+    return [s for s in STAGES if s in stages]
+
+
+def parse_since(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data non valida: {value} (formato YYYY-MM-DD)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pipeline del sistema di ricerca articoli scientifici"
+    )
+    parser.add_argument('--stages', type=parse_stages, default=list(STAGES),
+                        help="Fasi da eseguire, separate da virgola (default: scrape,extract,index)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Riprende dai checkpoint: salta gli articoli che hanno già completato la fase")
+    parser.add_argument('--since', type=parse_since,
+                        help="Solo articoli pubblicati a partire da questa data (YYYY-MM-DD)")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Elimina dati e checkpoint esistenti prima di iniziare")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Esegue scraping, estrazione e indicizzazione in parallelo")
+    parser.add_argument('--fetch-figures', action='store_true',
+                        help="Scarica le immagini delle figure e raggruppa i duplicati prima dell'indicizzazione")
+    parser.add_argument('--interactive', action='store_true',
+                        help="Chiede come procedere se esistono dati precedenti")
+    parser.add_argument('--profile-extraction', action='store_true',
+                        help="Misura tempi e allocazioni dell'estrazione per articolo e per fase")
+    parser.add_argument('--profile-top', type=int, default=10, metavar='N',
+                        help="Articoli più lenti nel report del profilo (default 10)")
+    parser.add_argument('--profile-memory', type=int, nargs='?', const=10, default=None, metavar='N',
+                        help="Traccia la memoria con tracemalloc un articolo ogni N (default 10)")
+    parser.add_argument('--profile-dump', metavar='FILE',
+                        help="Scrive il profilo cProfile dell'estrazione (leggibile con pstats)")
+    args = parser.parse_args(argv)
+    
+    # Le opzioni del profilo implicano --profile-extraction
+    if args.profile_memory is not None or args.profile_dump:
+        args.profile_extraction = True
+    
+    if args.fresh and args.resume:
+        parser.error("--fresh e --resume non possono essere usati insieme")
+    if args.streaming and args.stages != list(STAGES):
+        parser.error("--streaming esegue sempre tutte le fasi")
+    if args.profile_extraction and (args.streaming or 'extract' not in args.stages):
+        parser.error("--profile-extraction richiede la fase extract e non è disponibile con --streaming")
+    if args.streaming and args.fetch_figures:
+        parser.error("--fetch-figures non è disponibile con --streaming "
+                     "(usa python pipeline/figure_assets.py a pipeline conclusa)")
+    return args
+
+
+def main(argv=None):
+    """Esegue la pipeline (tutte le fasi o quelle indicate con --stages)."""
+    args = parse_args(argv)
     start_time = datetime.now()
     
     print("""
@@ -419,35 +543,66 @@ def main():
         (PAPERS_DIR / "arxiv").mkdir(exist_ok=True)
         (PAPERS_DIR / "pubmed").mkdir(exist_ok=True)
         
-        # Controlla dati esistenti
-        action = check_existing_data()
+        if args.interactive:
+            # Menu dei dati esistenti, tradotto nelle opzioni equivalenti
+            action = check_existing_data()
+            if action == 'continue':
+                args.resume = True
+            elif action == 'skip':
+                args.stages = ['extract', 'index']
+                args.resume = True
+        elif args.fresh:
+            delete_existing_data()
         
-        if action == 'skip':
-            # Usa dati esistenti
-            arxiv_articles, pubmed_articles = load_existing_articles()
-            
-            # Controlla se esistono già dati estratti
-            tables_path = DATA_DIR / "extracted_tables.json"
-            figures_path = DATA_DIR / "extracted_figures.json"
+        manifest = CheckpointManifest()
+        store = open_article_store()
+        logger.info(f"[INFO] Fasi: {','.join(args.stages)} | resume: {args.resume} | "
+                    f"since: {args.since or '-'}")
+        if args.resume:
+            done = manifest.summary()
+            logger.info("[INFO] Checkpoint: " + ", ".join(f"{s} {done.get(s, 0)}" for s in STAGES))
+        
+        if args.streaming:
+            # Scraping, estrazione e indicizzazione sovrapposti con code limitate
+            StreamingPipeline(
+                continue_mode=args.resume, manifest=manifest, since=args.since, store=store
+            ).run()
+        else:
+            if 'scrape' in args.stages:
+                arxiv_articles, pubmed_articles = run_scraping(
+                    continue_mode=args.resume, manifest=manifest, since=args.since, store=store
+                )
+            else:
+                arxiv_articles, pubmed_articles = load_existing_articles(store)
             
-            if tables_path.exists() and figures_path.exists():
+            if 'extract' in args.stages:
+                profiler = None
+                if args.profile_extraction:
+                    profiler = ExtractionProfiler(
+                        trace_memory=args.profile_memory is not None,
+                        memory_every=args.profile_memory or 10,
+                        cprofile=bool(args.profile_dump)
+                    )
+                    profiler.start()
+                all_tables, all_figures = run_extraction(
+                    arxiv_articles, pubmed_articles, manifest, resume=args.resume, since=args.since,
+                    profiler=profiler
+                )
+                if profiler is not None:
+                    profiler.stop()
+                    report_extraction_profile(profiler, args.profile_top, args.profile_dump)
+            elif 'index' in args.stages:
                 logger.info("\n[INFO] Caricamento tabelle e figure esistenti...")
-                with open(tables_path, 'r', encoding='utf-8') as f:
-                    all_tables = json.load(f)
-                with open(figures_path, 'r', encoding='utf-8') as f:
-                    all_figures = json.load(f)
-                logger.info(f"[OK] Caricate {len(all_tables)} tabelle e {len(all_figures)} figure")
-            else:
-                logger.info("\n[INFO] Dati estratti non trovati, eseguo estrazione...")
-                all_tables, all_figures = run_extraction(arxiv_articles, pubmed_articles)
-        else:
-            # Esegui scraping (fresh o continue)
-            arxiv_articles, pubmed_articles = run_scraping(continue_mode=(action == 'continue'))
-            # Estrazione sempre eseguita dopo scraping
-            all_tables, all_figures = run_extraction(arxiv_articles, pubmed_articles)
-        
-        # Indicizzazione
-        run_indexing(arxiv_articles, pubmed_articles, all_tables, all_figures)
+                all_tables, all_figures = load_extracted_data()
+            
+            if args.fetch_figures and ('extract' in args.stages or 'index' in args.stages):
+                all_figures = run_figure_assets(all_figures)
+            
+            if 'index' in args.stages:
+                run_indexing(
+                    arxiv_articles, pubmed_articles, all_tables, all_figures,
+                    manifest, resume=args.resume, since=args.since
+                )
         
         # Riepilogo
         elapsed = datetime.now() - start_time
@@ -464,7 +619,7 @@ def main():
         """)
         
     except KeyboardInterrupt:
-        logger.info("\n[WARN] Pipeline interrotta dall'utente")
+        logger.info("\n[WARN] Pipeline interrotta dall'utente (riprendi con --resume)")
     except Exception as e:
         logger.error(f"\n[ERROR] Errore nella pipeline: {e}")
         raise
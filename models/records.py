@@ -0,0 +1,219 @@
+"""
+Record compatti dei dati della pipeline.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Articoli, paragrafi, tabelle e figure viaggiavano come dizionari: ogni
+istanza ha la propria hash table (centinaia di byte anche con pochi campi).
+Qui sono dataclass con __slots__: gli attributi stanno in posizioni fisse
+dell'oggetto, senza __dict__ (circa metà della memoria, vedi
+benchmarks/records_memory_benchmark.py).
+
+    Paragraph      vista su un paragrafo di ParagraphStore (solo in estrazione)
+    TableRecord    tabelle estratte (extractors/table_extractor.py)
+    FigureRecord   figure estratte (extractors/figure_extractor.py)
+    ArticleRecord  metadati degli articoli (scraper e storage/article_store.py)
+
+TableRecord, FigureRecord e ArticleRecord restano utilizzabili come i
+dizionari di prima (record['caption'], record.get('url', ''), record['x'] = v),
+così indexer e moduli che ricevono anche dizionari letti dal JSON non cambiano.
+Un campo a None equivale a una chiave assente; chiavi sconosciute (file JSON
+di versioni precedenti o successive) sono conservate in `extra`.
+
+Serializzazione: to_dict() è generato per ogni classe (letterale dict sugli
+slot), from_dict() ricostruisce il record; json_default va passato a json.dump(default=...) per
+scrivere direttamente liste di record.
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Any, ClassVar, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class Paragraph:
+    """Paragrafo del documento (vista prodotta da extractors/paragraph_store.py)."""
+    index: int
+    text: str
+
+    @property
+    def text_lower(self) -> str:
+        return self.text.lower()
+
+
+class Record:
+    """Base dei record serializzabili, con accesso in stile dizionario."""
+
+    __slots__ = ()
+
+    # Impostati da _record() per ogni sottoclasse
+    _FIELDS: ClassVar[Tuple[str, ...]] = ()
+    _FIELD_SET: ClassVar[FrozenSet[str]] = frozenset()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dizionario dei campi (generato da _record() per ogni sottoclasse)."""
+        raise NotImplementedError
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        if isinstance(data, cls):
+            return data
+        known = cls._FIELD_SET
+        values = {key: value for key, value in data.items() if key in known}
+        extra = {key: value for key, value in data.items() if key not in known} if len(values) < len(data) else None
+        return cls(**values, extra=extra)
+
+    # ---------- compatibilità con i dizionari ----------
+
+    def __getitem__(self, key: str):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: str, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def pop(self, key: str, default=None):
+        value = self.get(key, default)
+        if key in self._FIELD_SET:
+            setattr(self, key, None)
+        elif self.extra:
+            self.extra.pop(key, None)
+        return value
+
+    def keys(self):
+        return self.to_dict().keys()
+
+
+def _to_dict_source(names: Tuple[str, ...], optional: FrozenSet[str]) -> str:
+    """
+    Sorgente di to_dict() per i campi dati: un letterale dict con accessi diretti
+    agli slot, molto più veloce di un ciclo generico (come fa dataclasses per __init__).
+    I campi opzionali compaiono solo se non sono None.
+    """
+    lines = [
+        "def to_dict(self):",
+        "    data = {" + ", ".join(f"{name!r}: self.{name}" for name in names if name not in optional) + "}"
+    ]
+    for name in names:
+        if name in optional:
+            lines.append(f"    if self.{name} is not None:")
+            lines.append(f"        data[{name!r}] = self.{name}")
+    lines += [
+        "    if self.extra:",
+        "        data.update(self.extra)",
+        "    return data",
+    ]
+    return "\n".join(lines)
+
+
+def _record(optional: Iterable[str] = (), all_optional: bool = False):
+    """
+    dataclass(slots=True) con l'elenco dei campi e to_dict() generato.
+    I campi in `optional` (o tutti, con all_optional) sono omessi da to_dict() se None.
+    """
+    def decorate(cls):
+        cls = dataclass(slots=True)(cls)
+        names = tuple(f.name for f in fields(cls) if f.name != 'extra')
+        namespace: Dict[str, Any] = {}
+        exec(_to_dict_source(names, frozenset(names if all_optional else optional)), namespace)
+        cls._FIELDS = names
+        cls._FIELD_SET = frozenset(names)
+        cls.to_dict = namespace['to_dict']
+        cls.to_dict.__qualname__ = f"{cls.__name__}.to_dict"
+        return cls
+    return decorate
+
+
+@_record()
+class TableRecord(Record):
+    table_id: str = ''
+    paper_id: str = ''
+    source: str = ''
+    caption: str = ''
+    body: str = ''
+    structure: Optional[Dict] = None
+    mentions: List[str] = field(default_factory=list)
+    context_paragraphs: List[str] = field(default_factory=list)
+    position: int = 0
+    terms: List[str] = field(default_factory=list)
+    extra: Optional[Dict[str, Any]] = None
+
+
+@_record(optional=('panel', 'subcaption', 'media_type',
+                   'asset_id', 'phash', 'canonical_asset', 'cluster_size'))
+class FigureRecord(Record):
+    figure_id: str = ''
+    paper_id: str = ''
+    source: str = ''
+    url: str = ''
+    caption: str = ''
+    mentions: List[str] = field(default_factory=list)
+    context_paragraphs: List[str] = field(default_factory=list)
+    position: int = 0
+    # Pannello di una figura con sotto-figure (numero e didascalia propria)
+    panel: Optional[int] = None
+    subcaption: Optional[str] = None
+    # None per <img>, "object" per <object>/<embed>, "svg" per un SVG inline
+    media_type: Optional[str] = None
+    # Immagine scaricata (pipeline/figure_assets.py)
+    asset_id: Optional[str] = None
+    phash: Optional[str] = None
+    canonical_asset: Optional[str] = None
+    cluster_size: Optional[int] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+# I campi degli articoli dipendono dalla fonte: nel JSON solo quelli valorizzati
+@_record(all_optional=True)
+class ArticleRecord(Record):
+    source: Optional[str] = None
+    title: Optional[str] = None
+    authors: Optional[List[str]] = None
+    abstract: Optional[str] = None
+    date: Optional[str] = None
+    url: Optional[str] = None
+    # arXiv
+    arxiv_id: Optional[str] = None
+    updated: Optional[str] = None
+    categories: Optional[List[str]] = None
+    html_url: Optional[str] = None
+    pdf_url: Optional[str] = None
+    abs_url: Optional[str] = None
+    # PubMed
+    pmc_id: Optional[str] = None
+    pmid: Optional[str] = None
+    xml_path: Optional[str] = None
+    # Download e testo completo
+    html_path: Optional[str] = None
+    html_available: Optional[bool] = None
+    full_text_ref: Optional[str] = None
+    full_text: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+def json_default(obj):
+    """Hook per json.dump: serializza i record come dizionari."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def as_dict(obj) -> Dict[str, Any]:
+    """Copia come dizionario di un record o di un dizionario."""
+    return obj.to_dict() if isinstance(obj, Record) else dict(obj)
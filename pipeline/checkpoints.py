@@ -0,0 +1,128 @@
+"""
+Checkpoint della pipeline: quali articoli hanno completato quale fase.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Il manifest (data/pipeline_manifest.json) registra, per ogni fase
+(scrape, extract, index), gli articoli completati con l'istante di completamento:
+
+    {"version": 1, "stages": {"scrape": {"arxiv:2401.12345": "2026-01-15T10:00:00+00:00"}}}
+
+Le fasi salvano i propri dati su disco prima di aggiornare il manifest, quindi
+con --resume un'esecuzione interrotta riparte dagli articoli non ancora completati.
+"""
+
+import os
+import sys
+import re
+import json
+import threading
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR
+from storage.article_store import article_id
+
+MANIFEST_FILE = "pipeline_manifest.json"
+MANIFEST_VERSION = 1
+
+STAGES = ("scrape", "extract", "index")
+
+# Date arXiv ("2024-01-15") e PubMed ("2023 Jan 5", "2023 Jan", "2023")
+DATE_PATTERN = re.compile(r'(\d{4})(?:[-\s]([A-Za-z]{3}|\d{1,2}))?(?:[-\s](\d{1,2}))?')
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+)}
+
+
+def paper_key(article: Dict, source: str) -> str:
+    """Chiave dell'articolo nel manifest ("arxiv:2401.12345", "pubmed:PMC123")."""
+    return f"{source}:{article_id(article, source)}"
+
+
+def parse_article_date(value: str) -> Optional[date]:
+    """Data di pubblicazione di un articolo; mese e giorno mancanti valgono 1."""
+    match = DATE_PATTERN.match((value or '').strip())
+    if not match:
+        return None
+    year, month, day = match.groups()
+    if month is None:
+        month_num = 1
+    elif month.isdigit():
+        month_num = int(month)
+    else:
+        month_num = MONTHS.get(month.lower(), 1)
+    try:
+        return date(int(year), month_num, int(day) if day else 1)
+    except ValueError:
+        return date(int(year), 1, 1)
+
+
+def published_since(article: Dict, since: Optional[date]) -> bool:
+    """True se l'articolo è stato pubblicato a partire da `since` (senza data: incluso)."""
+    if since is None:
+        return True
+    published = parse_article_date(article.get('date', ''))
+    return published is None or published >= since
+
+
+class CheckpointManifest:
+    """Manifest JSON con gli articoli completati per ogni fase."""
+
+    def __init__(self, path=None):
+        self.path = str(path or DATA_DIR / MANIFEST_FILE)
+        self.stages: Dict[str, Dict[str, str]] = {stage: {} for stage in STAGES}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[WARN] Manifest non leggibile ({self.path}): {e}")
+            return
+        for stage, done in data.get('stages', {}).items():
+            self.stages.setdefault(stage, {}).update(done)
+
+    def save(self):
+        """Scrittura atomica: un'interruzione non lascia il manifest a metà."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "stages": self.stages
+            }, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def done(self, stage: str) -> Set[str]:
+        with self._lock:
+            return set(self.stages.get(stage, {}))
+
+    def is_done(self, stage: str, key: str) -> bool:
+        with self._lock:
+            return key in self.stages.get(stage, {})
+
+    def mark_done(self, stage: str, keys: Iterable[str]):
+        """
+        Registra gli articoli completati e salva subito il manifest.
+        Le fasi successive di quegli articoli vanno rifatte (i loro dati sono cambiati).
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        keys = list(keys)
+        later = STAGES[STAGES.index(stage) + 1:] if stage in STAGES else ()
+        with self._lock:
+            completed = self.stages.setdefault(stage, {})
+            for key in keys:
+                completed[key] = now
+                for next_stage in later:
+                    self.stages.get(next_stage, {}).pop(key, None)
+            self.save()
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {stage: len(done) for stage, done in self.stages.items()}
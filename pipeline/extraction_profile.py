@@ -0,0 +1,272 @@
+"""
+Profilazione dell'estrazione di tabelle e figure.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+ExtractionProfiler misura, per ogni documento, il tempo delle fasi
+dell'estrazione (pipeline/streaming.extract_article):
+
+    read        lettura e decompressione del file scaricato
+    parse       parsing lxml (per il JATS comprende i paragrafi)
+    paragraphs  ParagraphStore del documento HTML
+    tables      tabelle (corpo, caption, struttura colonnare)
+    figures     figure (immagini, caption, pannelli)
+    mentions    ricerca delle menzioni (TableExtractor/FigureExtractor)
+    context     ricerca dei paragrafi di contesto
+    json_write  scrittura dei file JSON (fuori dai documenti)
+
+I tempi sono esclusivi: "tables" non comprende mentions e context, misurati a
+parte. Per ogni fase si conta anche la variazione dei blocchi di memoria
+allocati (sys.getallocatedblocks, costo trascurabile); con trace_memory un
+documento ogni memory_every è eseguito sotto tracemalloc per la memoria netta
+di ogni fase e il picco del documento (tracemalloc rallenta molto il codice
+tracciato, per questo è campionato). Con cprofile=True l'intera estrazione
+gira sotto cProfile e dump_stats() scrive il file per pstats/snakeviz.
+
+Uso:
+    python main.py --stages extract --profile-extraction
+    python main.py --stages extract --profile-extraction --profile-top 20 \\
+        --profile-memory 5 --profile-dump data/extraction.pstats
+    python pipeline/extraction_profile.py --limit 200 --memory 10 --dump extraction.pstats
+"""
+
+import os
+import sys
+import json
+import time
+import cProfile
+import argparse
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ARXIV_DATA_DIR, PUBMED_DATA_DIR, DATA_DIR
+
+STAGES = ('read', 'parse', 'paragraphs', 'tables', 'figures', 'mentions', 'context', 'json_write')
+PROFILE_FILE = "extraction_profile.json"
+
+# Metodi degli extractor misurati come fasi da instrument()
+INSTRUMENTED_METHODS = {
+    '_extract_paragraphs': 'paragraphs',
+    '_find_mentions': 'mentions',
+    '_find_context_paragraphs': 'context',
+}
+
+
+def no_stage(name: str):
+    """Contesto vuoto da usare al posto di profiler.stage quando non si profila."""
+    return nullcontext()
+
+
+def _new_stats() -> Dict[str, float]:
+    return {'ms': 0.0, 'calls': 0, 'blocks': 0}
+
+
+class ExtractionProfiler:
+    """Tempi e allocazioni per documento e per fase dell'estrazione."""
+
+    def __init__(self, trace_memory: bool = False, memory_every: int = 10, cprofile: bool = False):
+        self.trace_memory = trace_memory
+        self.memory_every = max(1, memory_every)
+        self.documents: List[Dict] = []
+        # Totali per fase su tutti i documenti (e fasi globali come json_write)
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self._stack: List[list] = []
+        self._document: Optional[Dict] = None
+        self._tracing = False
+        self._profile = cProfile.Profile() if cprofile else None
+
+    # ---------- raccolta ----------
+
+    def start(self):
+        """Avvia cProfile (se richiesto) per tutta l'estrazione."""
+        if self._profile is not None:
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+
+    @contextmanager
+    def document(self, paper_id: str, source: str = ''):
+        """Misura un documento; le fasi eseguite all'interno gli sono attribuite."""
+        record = {'paper_id': paper_id, 'source': source, 'stages': {}}
+        self._document = record
+        # Non interferisce con un tracemalloc già attivo (es. python -X tracemalloc)
+        self._tracing = (self.trace_memory and len(self.documents) % self.memory_every == 0
+                         and not tracemalloc.is_tracing())
+        if self._tracing:
+            tracemalloc.start()
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            with self.stage('other'):
+                yield record
+        finally:
+            record['ms'] = (time.perf_counter() - start) * 1000
+            record['blocks'] = sys.getallocatedblocks() - blocks
+            if self._tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                record['peak_kb'] = peak / 1024
+                record['retained_kb'] = current / 1024
+            self._tracing = False
+            self._document = None
+            self.documents.append(record)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Misura una fase (tempo esclusivo: le fasi annidate sono sottratte)."""
+        # [nome, inizio, ms figli, blocchi iniziali, blocchi figli, byte iniziali, byte figli]
+        frame = [name, time.perf_counter(), 0.0, sys.getallocatedblocks(), 0,
+                 tracemalloc.get_traced_memory()[0] if self._tracing else 0, 0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = (time.perf_counter() - frame[1]) * 1000
+            blocks = sys.getallocatedblocks() - frame[3]
+            traced = tracemalloc.get_traced_memory()[0] - frame[5] if self._tracing else 0
+            if self._stack:
+                parent = self._stack[-1]
+                parent[2] += elapsed
+                parent[4] += blocks
+                parent[6] += traced
+            self._add(name, elapsed - frame[2], blocks - frame[4], traced - frame[6])
+
+    def _add(self, name: str, ms: float, blocks: int, traced: int):
+        targets = [self.totals.setdefault(name, _new_stats())]
+        if self._document is not None:
+            targets.append(self._document['stages'].setdefault(name, _new_stats()))
+        for stats in targets:
+            stats['ms'] += ms
+            stats['calls'] += 1
+            stats['blocks'] += blocks
+            if self._tracing:
+                stats['kb'] = stats.get('kb', 0.0) + traced / 1024
+
+    def instrument(self, *extractors):
+        """Misura paragrafi, menzioni e contesto degli extractor (sostituisce i metodi dell'istanza)."""
+        for extractor in extractors:
+            for method_name, stage_name in INSTRUMENTED_METHODS.items():
+                method = getattr(extractor, method_name, None)
+                if method is not None:
+                    setattr(extractor, method_name, self._timed(method, stage_name))
+        return extractors[0] if len(extractors) == 1 else extractors
+
+    def _timed(self, method, stage_name: str):
+        def timed(*args, **kwargs):
+            with self.stage(stage_name):
+                return method(*args, **kwargs)
+        timed.__wrapped__ = method
+        return timed
+
+    # ---------- risultati ----------
+
+    def slowest(self, top: int = 10) -> List[Dict]:
+        return sorted(self.documents, key=lambda d: d['ms'], reverse=True)[:top]
+
+    def report(self, top: int = 10) -> List[str]:
+        """Righe del report: totali per fase e documenti più lenti."""
+        if not self.documents:
+            return ["[STATS] Profilo estrazione: nessun documento"]
+        total_ms = sum(stats['ms'] for stats in self.totals.values()) or 1.0
+        order = [name for name in STAGES + ('other',) if name in self.totals]
+        lines = [
+            f"[STATS] Profilo estrazione: {len(self.documents)} documenti, {total_ms / 1000:.2f} s",
+            "   " + ", ".join(f"{name} {self.totals[name]['ms'] / 1000:.2f} s "
+                              f"({self.totals[name]['ms'] / total_ms:.0%})" for name in order),
+            f"[STATS] {min(top, len(self.documents))} documenti più lenti:",
+        ]
+        for rank, doc in enumerate(self.slowest(top), 1):
+            stages = sorted(doc['stages'].items(), key=lambda item: item[1]['ms'], reverse=True)
+            detail = " | ".join(f"{name} {stats['ms']:.1f}" for name, stats in stages if stats['ms'] >= 0.1)
+            memory = f" | picco {doc['peak_kb'] / 1024:.1f} MB" if 'peak_kb' in doc else ""
+            lines.append(f"   {rank:>2}. {doc['paper_id']} ({doc['source']}) {doc['ms']:.1f} ms | "
+                         f"{detail} | blocchi {doc['blocks']:+d}{memory}")
+        return lines
+
+    def to_dict(self, top: int = 10) -> Dict:
+        return {
+            'documents': len(self.documents),
+            'totals': self.totals,
+            'slowest': self.slowest(top),
+        }
+
+    def save(self, path, top: int = 10):
+        """Scrive totali e documenti più lenti in JSON (per confronti tra commit)."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(top), f, ensure_ascii=False, indent=2)
+
+    def dump_stats(self, path) -> bool:
+        """Scrive il profilo cProfile (leggibile con pstats); False se cProfile non era attivo."""
+        if self._profile is None:
+            return False
+        self._profile.dump_stats(str(path))
+        return True
+
+
+def profile_raw_files(limit: Optional[int] = None, profiler: Optional[ExtractionProfiler] = None,
+                      top: int = 10) -> ExtractionProfiler:
+    """Profila l'estrazione sui file già scaricati (senza archivio articoli né manifest)."""
+    from storage.raw_archive import list_raw
+    from extractors.table_extractor import TableExtractor
+    from extractors.figure_extractor import FigureExtractor
+    from pipeline.streaming import extract_article
+    from models.records import json_default
+
+    profiler = profiler or ExtractionProfiler()
+    table_extractor, figure_extractor = profiler.instrument(TableExtractor(), FigureExtractor())
+    files = [('arxiv', paper_id, path) for paper_id, path in list_raw(ARXIV_DATA_DIR, ('.html',))]
+    files += [('pubmed', paper_id, path) for paper_id, path in list_raw(PUBMED_DATA_DIR)]
+    if limit:
+        files = files[:limit]
+    print(f"[INFO] Profilazione estrazione su {len(files)} documenti...")
+
+    tables, figures = [], []
+    profiler.start()
+    for source, paper_id, path in files:
+        with profiler.document(paper_id, source):
+            try:
+                found_tables, found_figures = extract_article(
+                    {'html_path': str(path)}, source, table_extractor, figure_extractor, profiler
+                )
+            except Exception as e:
+                print(f"[WARN] Errore con {path}: {e}")
+                continue
+        tables.extend(found_tables)
+        figures.extend(found_figures)
+    with profiler.stage('json_write'), open(os.devnull, 'w', encoding='utf-8') as f:
+        json.dump([tables, figures], f, ensure_ascii=False, indent=2, default=json_default)
+    profiler.stop()
+
+    for line in profiler.report(top):
+        print(line)
+    return profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profilazione dell'estrazione sui file scaricati")
+    parser.add_argument('--limit', type=int, default=None, help="Numero massimo di documenti")
+    parser.add_argument('--top', type=int, default=10, help="Documenti più lenti nel report")
+    parser.add_argument('--memory', type=int, nargs='?', const=10, default=None, metavar='N',
+                        help="Traccia la memoria con tracemalloc un documento ogni N (default 10)")
+    parser.add_argument('--dump', default=None, help="File in cui scrivere il profilo cProfile")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Extraction Profiler - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+    profiler = ExtractionProfiler(trace_memory=args.memory is not None, memory_every=args.memory or 10,
+                                  cprofile=args.dump is not None)
+    profile_raw_files(args.limit, profiler, args.top)
+    profiler.save(DATA_DIR / PROFILE_FILE, args.top)
+    print(f"[OK] Profilo salvato in {DATA_DIR / PROFILE_FILE}")
+    if args.dump and profiler.dump_stats(args.dump):
+        print(f"[OK] Profilo cProfile in {args.dump} (python -m pstats {args.dump})")
+
+
+if __name__ == "__main__":
+    main()
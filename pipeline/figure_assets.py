@@ -0,0 +1,218 @@
+"""
+Download delle immagini delle figure e deduplicazione percettiva.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Fase opzionale tra estrazione e indicizzazione (python main.py --fetch-figures,
+oppure python pipeline/figure_assets.py sul file delle figure già estratte):
+
+1. Ogni URL distinto viene scaricato una sola volta, in parallelo, tramite il
+   client HTTP condiviso (scrapers/http_client.py): rate limit e circuit
+   breaker per host valgono anche per le immagini.
+2. L'immagine è salvata in storage/asset_store.py (hash SHA-256 del
+   contenuto -> asset_id) e ne viene calcolato il pHash
+   (extractors/image_hash.py).
+3. Le figure sono raggruppate: stesso asset_id, oppure pHash a distanza di
+   Hamming <= PHASH_MAX_DISTANCE. Le coppie candidate vengono da un LSH a
+   bande: con d <= PHASH_MAX_DISTANCE bit diversi e d + 1 bande, almeno una
+   banda coincide (piccionaia), quindi nessuna coppia vicina viene persa senza
+   confrontare tutte le coppie.
+
+Campi aggiunti a ogni figura scaricata:
+- asset_id: hash del contenuto dell'immagine
+- phash: hash percettivo (assente se il formato non è decodificabile)
+- canonical_asset: asset più frequente del gruppo (link all'immagine canonica)
+- cluster_size: figure nel gruppo (1 = figura unica)
+"""
+
+import os
+import sys
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR, FIGURE_FETCH_WORKERS, PHASH_MAX_DISTANCE
+from scrapers.http_client import get_http_client
+from storage.asset_store import FigureAssetStore, is_image
+from extractors.image_hash import phash, hamming
+from models.records import FigureRecord, json_default
+
+FIGURES_FILE = "extracted_figures.json"
+
+# Immagini più grandi non vengono salvate (probabili PDF/archivi supplementari)
+MAX_ASSET_BYTES = 20 * 1024 * 1024
+HASH_BITS = 64
+
+
+class FigureAssetFetcher:
+    """Scarica le immagini delle figure (una volta per URL) e le salva nell'archivio."""
+
+    def __init__(self, store: Optional[FigureAssetStore] = None, client=None,
+                 workers: int = FIGURE_FETCH_WORKERS):
+        self.store = store or FigureAssetStore()
+        self.client = client or get_http_client()
+        self.workers = workers
+
+    def fetch(self, url: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Scarica un'immagine.
+
+        Returns:
+            (asset_id, phash o None), oppure None se il download non è riuscito
+        """
+        response = self.client.get(url)
+        if response is None or response.status_code != 200:
+            return None
+        # Gli URL ricostruiti (es. PMC bin/<href>.jpg) possono dare pagine HTML con 200
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith('image/'):
+            return None
+        data = response.content
+        if not data or len(data) > MAX_ASSET_BYTES or not is_image(data):
+            return None
+        return self.store.put(data), phash(data)
+
+    def fetch_all(self, figures: List[FigureRecord]) -> Dict[str, int]:
+        """
+        Imposta asset_id e phash sulle figure, scaricando ogni URL distinto una volta.
+        Le figure con un asset già presente nell'archivio non vengono riscaricate.
+        """
+        # dict: URL distinti nell'ordine delle figure (gli SVG inline non hanno un file)
+        urls = list(dict.fromkeys(
+            figure.url for figure in figures
+            if figure.url and figure.media_type != 'svg'
+            and not (figure.asset_id and figure.asset_id in self.store)
+        ))
+        if not urls:
+            return {'urls': 0, 'downloaded': 0, 'failed': 0}
+
+        results: Dict[str, Tuple[str, Optional[str]]] = {}
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(urls)))) as executor:
+            futures = {executor.submit(self.fetch, url): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[WARN] Errore download {futures[future]}: {e}")
+                    result = None
+                if result is None:
+                    failed += 1
+                else:
+                    results[futures[future]] = result
+
+        for figure in figures:
+            result = results.get(figure.url) if figure.media_type != 'svg' else None
+            if result is not None:
+                figure.asset_id, figure.phash = result
+        return {'urls': len(urls), 'downloaded': len(results), 'failed': failed}
+
+
+def _bands(max_distance: int) -> List[Tuple[int, int]]:
+    """(shift, maschera) delle max_distance + 1 bande in cui è diviso l'hash."""
+    count = max(1, min(HASH_BITS, max_distance + 1))
+    bounds = [HASH_BITS * i // count for i in range(count + 1)]
+    return [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+
+
+def near_duplicate_pairs(hashes: List[str], max_distance: int = PHASH_MAX_DISTANCE) -> List[Tuple[int, int]]:
+    """Coppie di indici con pHash a distanza <= max_distance (LSH a bande + verifica)."""
+    values = [int(h, 16) for h in hashes]
+    pairs = set()
+    for shift, mask in _bands(max_distance):
+        buckets: Dict[int, List[int]] = {}
+        for i, value in enumerate(values):
+            buckets.setdefault((value >> shift) & mask, []).append(i)
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    pair = (members[a], members[b])
+                    if pair not in pairs and hamming(hashes[pair[0]], hashes[pair[1]]) <= max_distance:
+                        pairs.add(pair)
+    return sorted(pairs)
+
+
+def cluster_figures(figures: List[FigureRecord], max_distance: int = PHASH_MAX_DISTANCE) -> int:
+    """
+    Raggruppa le figure scaricate per contenuto identico o pHash vicino e
+    imposta canonical_asset e cluster_size.
+
+    Returns:
+        Numero di gruppi con più di una figura
+    """
+    # Union-find sugli asset distinti (figure con lo stesso asset sono già unite)
+    assets = sorted({f.asset_id for f in figures if f.asset_id})
+    parent = {asset: asset for asset in assets}
+
+    def find(asset):
+        while parent[asset] != asset:
+            parent[asset] = parent[parent[asset]]
+            asset = parent[asset]
+        return asset
+
+    hashes = {}
+    for figure in figures:
+        if figure.asset_id and figure.phash:
+            hashes[figure.asset_id] = figure.phash
+    hashed = sorted(hashes)
+    for a, b in near_duplicate_pairs([hashes[asset] for asset in hashed], max_distance):
+        root_a, root_b = find(hashed[a]), find(hashed[b])
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    members: Dict[str, Counter] = {}
+    for figure in figures:
+        if figure.asset_id:
+            members.setdefault(find(figure.asset_id), Counter())[figure.asset_id] += 1
+
+    # Asset canonico: il più usato del gruppo (a parità, il minore: risultato stabile)
+    canonical = {root: min(counts, key=lambda asset: (-counts[asset], asset))
+                 for root, counts in members.items()}
+    for figure in figures:
+        if figure.asset_id:
+            root = find(figure.asset_id)
+            figure.canonical_asset = canonical[root]
+            figure.cluster_size = sum(members[root].values())
+    return sum(1 for counts in members.values() if sum(counts.values()) > 1)
+
+
+def process_figures(figures: List[FigureRecord],
+                    fetcher: Optional[FigureAssetFetcher] = None) -> List[FigureRecord]:
+    """Scarica le immagini e raggruppa le figure duplicate (modifica le figure in place)."""
+    fetcher = fetcher or FigureAssetFetcher()
+    print(f"[INFO] Download immagini di {len(figures)} figure...")
+    stats = fetcher.fetch_all(figures)
+    print(f"[OK] URL da scaricare: {stats['urls']}, scaricati: {stats['downloaded']}, "
+          f"falliti: {stats['failed']}")
+
+    clusters = cluster_figures(figures)
+    with_asset = [f for f in figures if f.asset_id]
+    canonical = {f.canonical_asset for f in with_asset}
+    print(f"[STATS] {len(with_asset)} figure con immagine, {len(canonical)} immagini canoniche, "
+          f"{clusters} gruppi di duplicati")
+    return figures
+
+
+def main():
+    print("=" * 60)
+    print("Figure Asset Fetcher - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+
+    figures_path = DATA_DIR / FIGURES_FILE
+    if not figures_path.exists():
+        print(f"[WARN] File non trovato: {figures_path}")
+        print("   Esegui prima: python main.py --stages extract")
+        return
+
+    with open(figures_path, 'r', encoding='utf-8') as f:
+        figures = [FigureRecord.from_dict(item) for item in json.load(f)]
+    process_figures(figures)
+    with open(figures_path, 'w', encoding='utf-8') as f:
+        json.dump(figures, f, ensure_ascii=False, indent=2, default=json_default)
+    print(f"[OK] Figure aggiornate in {figures_path}")
+
+
+if __name__ == "__main__":
+    main()
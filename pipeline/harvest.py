@@ -0,0 +1,192 @@
+"""
+Raccolta incrementale degli articoli per keyword.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Per ogni (fonte, keyword) l'archivio conserva un high-water mark: per PubMed
+la data in cui è iniziata l'ultima raccolta completa, per arXiv la data di
+sottomissione più recente vista meno ARXIV_LISTING_LAG_DAYS (un articolo
+sottomesso prima della raccolta può comparire nell'elenco solo dopo).
+Le esecuzioni successive chiedono solo gli articoli più recenti:
+
+- arXiv: sortBy=submittedDate, interrotta al primo articolo più vecchio del mark
+- PubMed: esearch con datetype=edat e mindate=mark
+
+Il mark avanza solo se la ricerca è completa (nessun risultato troncato da
+max_results) e va salvato dopo il download degli articoli trovati.
+
+KeywordScheduler esegue in parallelo le ricerche di tutte le keyword (di
+entrambe le fonti) e unisce i risultati tramite un insieme condiviso di id già
+visti, così un articolo trovato da più keyword viene scaricato una sola volta.
+Il budget di richieste per host è rispettato da scrapers/rate_limiter.py.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SEARCH_WORKERS, ARXIV_LISTING_LAG_DAYS
+from storage.article_store import ArticleStore, article_id
+
+# Risultati per keyword
+ARXIV_MAX_RESULTS = 50
+PUBMED_MAX_RESULTS = 500
+MAX_RESULTS = {'arxiv': ARXIV_MAX_RESULTS, 'pubmed': PUBMED_MAX_RESULTS}
+
+
+def harvest_date() -> str:
+    """Data (UTC) di inizio della raccolta, usata come nuovo mark."""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def arxiv_mark(articles: List[Dict], floor: str, lag_days: int = ARXIV_LISTING_LAG_DAYS) -> str:
+    """
+    Mark arXiv: sottomissione più recente tra gli articoli (al più `floor`, la data
+    della raccolta) meno `lag_days`.
+    """
+    dates = [a['date'] for a in articles if a.get('date')]
+    newest = min(max(dates), floor) if dates else floor
+    return (date.fromisoformat(newest) - timedelta(days=lag_days)).isoformat()
+
+
+def harvest_keyword(scraper, source: str, keyword: str, store: ArticleStore,
+                    incremental: bool, max_results: int) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Cerca gli articoli di una keyword, in modo incrementale se esiste un mark.
+
+    Returns:
+        (articoli, nuovo mark o None se il mark non deve avanzare)
+    """
+    started = harvest_date()
+    mark = store.high_water(source, keyword) if incremental else None
+
+    if mark is None:
+        # Prima raccolta (o completa): ricerca per rilevanza, poi solo i nuovi arrivi
+        if source == 'arxiv':
+            articles = scraper.search_articles(keyword, max_results=max_results)
+            # Risultati per rilevanza: il mark parte dalla data della raccolta
+            started = arxiv_mark([], started)
+        else:
+            articles = scraper.search_via_api(keyword, max_results=max_results)
+        # Nessun risultato (o ricerca fallita): nessun mark, si riprova per intero
+        return articles, started if articles else None
+
+    articles, complete = scraper.search_new_articles(keyword, mark, max_results=max_results)
+    if not complete:
+        print(f"[WARN] Raccolta incrementale di '{keyword}' ({source}) troncata a "
+              f"{max_results} risultati: il mark resta al {mark}")
+        return articles, None
+    if source == 'arxiv':
+        # Senza nuovi articoli il mark non avanza: non c'è una sottomissione da cui partire
+        return articles, max(mark, arxiv_mark(articles, started)) if articles else mark
+    return articles, started
+
+
+class KeywordScheduler:
+    """
+    Ricerche di tutte le keyword in parallelo, con deduplicazione globale.
+    Gli id già in archivio (o già visti) non vengono restituiti.
+    """
+
+    def __init__(self, scrapers: Dict, store: ArticleStore, incremental: bool = False,
+                 seen: Optional[Dict[str, Set[str]]] = None, workers: int = SEARCH_WORKERS):
+        self.scrapers = scrapers
+        self.store = store
+        self.incremental = incremental
+        self.workers = workers
+        self.seen: Dict[str, Set[str]] = {source: set() for source in scrapers}
+        for source, ids in (seen or {}).items():
+            self.seen[source] = set(ids)
+        self._lock = threading.Lock()
+        self.marks: Dict[Tuple[str, str], str] = {}
+        # Statistiche: risultati totali, id già in archivio, keyword che hanno trovato ogni id
+        self.hits = Counter()
+        self.known = Counter()
+        self.found_by: Dict[str, Dict[str, Set[str]]] = {source: {} for source in scrapers}
+
+    def merge(self, source: str, keyword: str, articles: List[Dict]) -> List[Dict]:
+        """Unisce i risultati di una keyword nell'insieme condiviso degli id visti."""
+        new_articles = []
+        with self._lock:
+            for article in articles:
+                aid = article_id(article, source)
+                if not aid:
+                    continue
+                self.hits[source] += 1
+                keywords = self.found_by[source].setdefault(aid, set())
+                keywords.add(keyword)
+                if aid in self.seen[source]:
+                    if len(keywords) == 1:
+                        self.known[source] += 1
+                    continue
+                self.seen[source].add(aid)
+                new_articles.append(article)
+        return new_articles
+
+    def record_mark(self, source: str, keyword: str, mark: Optional[str]):
+        """Nuovo mark della keyword, da salvare dopo il download degli articoli."""
+        if mark:
+            with self._lock:
+                self.marks[(source, keyword)] = mark
+
+    def save_marks(self):
+        for (source, keyword), mark in self.marks.items():
+            self.store.set_high_water(source, keyword, mark)
+
+    def run(self, keywords: Dict[str, List[str]]) -> Dict[str, List[Dict]]:
+        """
+        Esegue le ricerche (fonte, keyword) in parallelo.
+
+        Returns:
+            Articoli nuovi per fonte, senza duplicati
+        """
+        results: Dict[str, List[Dict]] = {source: [] for source in self.scrapers}
+        jobs = [(source, keyword) for source, words in keywords.items() for keyword in words]
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(jobs)))) as executor:
+            futures = {
+                executor.submit(
+                    harvest_keyword, self.scrapers[source], source, keyword, self.store,
+                    self.incremental, MAX_RESULTS[source]
+                ): (source, keyword)
+                for source, keyword in jobs
+            }
+            for future in as_completed(futures):
+                source, keyword = futures[future]
+                try:
+                    articles, mark = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Ricerca '{keyword}' ({source}) fallita: {e}")
+                    continue
+                self.record_mark(source, keyword, mark)
+                results[source].extend(self.merge(source, keyword, articles))
+        return results
+
+    def overlap(self, source: str) -> Dict[Tuple[str, str], int]:
+        """Articoli trovati da entrambe le keyword, per ogni coppia di keyword."""
+        pairs = Counter()
+        for keywords in self.found_by[source].values():
+            for pair in combinations(sorted(keywords), 2):
+                pairs[pair] += 1
+        return dict(pairs)
+
+    def report(self) -> List[str]:
+        """Righe di riepilogo: sovrapposizione tra keyword e download evitati."""
+        lines = []
+        for source in self.scrapers:
+            unique = len(self.found_by[source])
+            duplicates = self.hits[source] - unique
+            lines.append(
+                f"[STATS] {source}: {self.hits[source]} risultati, {unique} articoli distinti, "
+                f"{duplicates} duplicati tra keyword, {self.known[source]} già in archivio "
+                f"-> {duplicates + self.known[source]} download evitati"
+            )
+            for (first, second), count in sorted(self.overlap(source).items()):
+                lines.append(f"[STATS]   '{first}' ∩ '{second}': {count} articoli in comune")
+        return lines
@@ -0,0 +1,548 @@
+"""
+Pipeline in streaming: scraping, estrazione e indicizzazione sovrapposti.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Invece di eseguire le tre fasi in sequenza, ogni fase è un gruppo di thread
+collegato alla successiva da una coda limitata (backpressure):
+
+    ricerca keyword -> download articoli -> estrazione tabelle/figure -> bulk indexer
+
+Un articolo scaricato passa subito all'estrazione e i documenti estratti
+vengono inviati a Elasticsearch a blocchi, mentre altri download sono in corso.
+Se una fase è più lenta, le code si riempiono e le fasi precedenti si fermano
+invece di accumulare dati in memoria. Il tempo totale tende a quello della
+fase più lenta invece che alla somma delle tre.
+
+Gli articoli scaricati vengono salvati subito nell'archivio SQLite; ogni
+CHECKPOINT_CHUNK_SIZE articoli l'ultima fase scrive gli stessi file JSON della
+pipeline a fasi (tabelle, figure) e registra nel manifest gli articoli estratti
+e indicizzati, così un'esecuzione interrotta riprende con --resume. Al termine
+viene scritto l'indice locale.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from datetime import date
+from pathlib import Path
+from queue import Queue
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from elasticsearch import helpers
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    DATA_DIR, ARXIV_KEYWORDS, PUBMED_KEYWORDS,
+    PIPELINE_QUEUE_SIZE, EXTRACT_WORKERS, BULK_CHUNK_SIZE, SEARCH_WORKERS, CHECKPOINT_CHUNK_SIZE
+)
+from scrapers import arxiv_scraper, pubmed_scraper
+from scrapers.arxiv_scraper import ArxivScraper
+from scrapers.pubmed_scraper import PubMedScraper
+from scrapers.http_client import get_http_client
+from extractors.table_extractor import TableExtractor
+from extractors.figure_extractor import FigureExtractor
+from extractors.jats_extractor import JatsDocument, is_jats
+from extractors.paragraph_store import ParagraphStore
+from indexers.elasticsearch_setup import get_elasticsearch_client, create_indices
+from indexers.paper_indexer import PaperIndexer
+from indexers.table_indexer import TableIndexer
+from indexers.figure_indexer import FigureIndexer
+from pipeline.extraction_profile import ExtractionProfiler, no_stage
+from pipeline.checkpoints import CheckpointManifest, article_id, paper_key, published_since
+from search.local_index import (
+    write_local_indices, TABLES_FILE, FIGURES_FILE
+)
+from storage.article_store import ArticleStore, open_article_store
+from storage.raw_archive import find_raw, read_raw, raw_id, parse_document
+from models.records import TableRecord, FigureRecord, ArticleRecord, json_default
+from pipeline.harvest import (
+    harvest_keyword, KeywordScheduler, ARXIV_MAX_RESULTS, PUBMED_MAX_RESULTS
+)
+
+logger = logging.getLogger(__name__)
+
+# Segnale di fine flusso per i worker di una fase
+_DONE = object()
+
+
+def extract_article(article: Dict, source: str, table_extractor: TableExtractor,
+                    figure_extractor: FigureExtractor,
+                    profiler: Optional[ExtractionProfiler] = None) -> Tuple[List[TableRecord], List[FigureRecord]]:
+    """
+    Estrae tabelle e figure dal file scaricato di un articolo.
+
+    Args:
+        profiler: se presente, misura le fasi (pipeline/extraction_profile.py)
+
+    Returns:
+        (tabelle, figure); liste vuote se l'articolo non ha un file HTML/XML
+    """
+    if 'html_path' not in article:
+        return [], []
+
+    html_path = Path(article['html_path'])
+    if find_raw(html_path) is None:
+        return [], []
+
+    if source == 'arxiv':
+        paper_id = article.get('arxiv_id', raw_id(html_path))
+        base_url = f"https://arxiv.org/html/{paper_id}/"
+    else:
+        paper_id = article.get('pmc_id', article.get('pmid', raw_id(html_path)))
+        base_url = f"https://pmc.ncbi.nlm.nih.gov/articles/{paper_id}/"
+
+    stage = profiler.stage if profiler is not None else no_stage
+
+    # Bytes decompressi passati direttamente a lxml
+    with stage('read'):
+        html_content = read_raw(html_path)
+
+    # XML JATS (PubMed): un solo parsing condiviso da tabelle e figure
+    if is_jats(html_content):
+        try:
+            with stage('parse'):
+                document = JatsDocument(html_content)
+        except Exception:
+            return [], []
+        with stage('tables'):
+            tables = table_extractor.extract_from_jats(document, paper_id, source)
+        with stage('figures'):
+            figures = figure_extractor.extract_from_jats(document, paper_id, source, base_url)
+        return tables, figures
+
+    # HTML: un solo parsing e un solo ParagraphStore condivisi da tabelle e figure
+    try:
+        with stage('parse'):
+            doc = parse_document(html_content)
+    except Exception:
+        return [], []
+    with stage('paragraphs'):
+        paragraphs = ParagraphStore.from_html(doc)
+    with stage('tables'):
+        tables = table_extractor.extract_from_tree(doc, paper_id, source, paragraphs)
+    with stage('figures'):
+        figures = figure_extractor.extract_from_tree(doc, paper_id, source, base_url, paragraphs)
+    return tables, figures
+
+
+class Stage:
+    """
+    Gruppo di thread che consumano una coda e scrivono i risultati nella
+    coda successiva. `handler(item)` restituisce gli elementi da inoltrare.
+    """
+
+    def __init__(self, name: str, handler: Callable, inbox: Queue,
+                 outbox: Optional[Queue] = None, workers: int = 1):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.threads: List[threading.Thread] = []
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0  # Tempo di lavoro (esclusa l'attesa sulle code)
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                break
+
+            start = time.perf_counter()
+            try:
+                results = list(self.handler(item) or ())
+                failed = False
+            except Exception as e:
+                logger.warning(f"  [{self.name}] Errore: {e}")
+                results, failed = [], True
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.processed += 1
+                self.errors += failed
+                self.busy_time += elapsed
+
+            # put() blocca se la fase successiva è indietro (backpressure)
+            if self.outbox is not None:
+                for result in results:
+                    self.outbox.put(result)
+
+    def close(self):
+        """Segnala la fine dell'input e attende i worker."""
+        for _ in self.threads:
+            self.inbox.put(_DONE)
+        for thread in self.threads:
+            thread.join()
+
+
+class BulkIndexer:
+    """
+    Ultima fase: prepara i documenti con gli indexer esistenti e li invia a
+    Elasticsearch a blocchi di BULK_CHUNK_SIZE. Raccoglie anche i dati per i file JSON.
+    """
+
+    def __init__(self, es=None, chunk_size: int = BULK_CHUNK_SIZE, text_store=None):
+        self.es = es
+        self.chunk_size = chunk_size
+        self.paper_indexer = PaperIndexer(connect=False, text_store=text_store)
+        self.table_indexer = TableIndexer(connect=False)
+        self.figure_indexer = FigureIndexer(connect=False)
+        self.buffer: List[Dict] = []
+        self.indexed = 0
+        self.failed = 0
+        self.articles: Dict[str, List[ArticleRecord]] = {'arxiv': [], 'pubmed': []}
+        self.tables: List[TableRecord] = []
+        self.figures: List[FigureRecord] = []
+        # Articoli con almeno un documento rifiutato da Elasticsearch (non vanno nel manifest)
+        self.failed_keys: Set[str] = set()
+        self._doc_keys: Dict[str, str] = {}  # _id dei documenti in attesa -> chiave dell'articolo
+
+    def collect(self, tables: List[TableRecord], figures: List[FigureRecord]):
+        """Aggiunge tabelle e figure ai file JSON e ai conteggi dei facet has_tables/has_figures."""
+        self.tables.extend(tables)
+        self.figures.extend(figures)
+        for table in tables:
+            self.paper_indexer.table_counts[table['paper_id']] += 1
+        for figure in figures:
+            self.paper_indexer.figure_counts[figure['paper_id']] += 1
+
+    def add(self, source: str, article: ArticleRecord, tables: List[TableRecord],
+            figures: List[FigureRecord], collect: bool = True, send: bool = True):
+        """
+        Registra un articolo elaborato.
+
+        Args:
+            collect: False se tabelle e figure sono già state raccolte (estratte in
+                     un'esecuzione precedente, vedi collect())
+            send: False se l'articolo è già indicizzato in Elasticsearch
+        """
+        self.articles[source].append(article)
+        if collect:
+            self.collect(tables, figures)
+        if not send or self.es is None:
+            return
+
+        documents = []
+        if source == 'arxiv' and article.get('arxiv_id'):
+            documents.append(self.paper_indexer.prepare_arxiv_document(article))
+        elif source == 'pubmed' and article.get('pmc_id'):
+            documents.append(self.paper_indexer.prepare_pubmed_document(article))
+        documents.extend(self.table_indexer.prepare_document(t) for t in tables)
+        documents.extend(self.figure_indexer.prepare_document(f) for f in figures)
+
+        key = paper_key(article, source)
+        for document in documents:
+            self._doc_keys[document['_id']] = key
+        self.buffer.extend(documents)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Invia a Elasticsearch i documenti in attesa."""
+        documents, self.buffer = self.buffer, []
+        doc_keys, self._doc_keys = self._doc_keys, {}
+        if not documents or self.es is None:
+            return
+        for success, info in helpers.streaming_bulk(
+            self.es,
+            documents,
+            chunk_size=self.chunk_size,
+            raise_on_error=False
+        ):
+            if success:
+                self.indexed += 1
+            else:
+                self.failed += 1
+                result = next(iter(info.values()), {})
+                key = doc_keys.get(result.get('_id'))
+                if key is not None:
+                    self.failed_keys.add(key)
+
+
+class StreamingPipeline:
+    """
+    Scraping, estrazione e indicizzazione eseguiti in parallelo con code limitate.
+    """
+
+    def __init__(self, continue_mode: bool = False, es=None, index_to_es: bool = True,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, extract_workers: int = EXTRACT_WORKERS,
+                 arxiv: ArxivScraper = None, pubmed: PubMedScraper = None,
+                 manifest: CheckpointManifest = None, since: date = None,
+                 store: ArticleStore = None):
+        self.continue_mode = continue_mode
+        self.manifest = manifest
+        self.store = store or open_article_store()
+        self.since = since
+        self.index_to_es = index_to_es
+        self.es = es
+        self.queue_size = queue_size
+        self.extract_workers = extract_workers
+        self.arxiv = arxiv or ArxivScraper()
+        self.pubmed = pubmed or PubMedScraper()
+        self.table_extractor = TableExtractor()
+        self.figure_extractor = FigureExtractor()
+        self.existing: List[Tuple[str, Dict]] = []
+        # Articoli in archivio da riscaricare (download fallito o interrotto)
+        self.retry: Dict[str, List[Tuple[str, Dict]]] = {'arxiv': [], 'pubmed': []}
+        # Articoli già estratti (chiave -> tabelle, figure dai file JSON) e già indicizzati
+        self.kept: Dict[str, Tuple[List[TableRecord], List[FigureRecord]]] = {}
+        self.indexed: Set[str] = set()
+        self.indexer: Optional[BulkIndexer] = None
+        # Articoli elaborati dall'ultimo checkpoint
+        self._pending: Dict[str, List[str]] = {'extract': [], 'index': []}
+        # Deduplicazione tra keyword, statistiche e high-water mark (salvati a fine esecuzione)
+        self.scheduler = KeywordScheduler(
+            {'arxiv': self.arxiv, 'pubmed': self.pubmed}, self.store, incremental=continue_mode
+        )
+        self.seen: Dict[str, set] = self.scheduler.seen
+
+    def _load_existing(self):
+        """
+        In modalità continue gli articoli già salvati non vengono riscaricati,
+        salvo quelli senza file scaricato o non completati nel manifest.
+        Quelli che il manifest dà per estratti non sono rielaborati (tabelle e
+        figure dai file JSON) e quelli già indicizzati non sono reinviati a
+        Elasticsearch; gli altri passano da estrazione e indicizzazione.
+        """
+        extracted = self._previous_extraction()
+        scraped = self.manifest.done('scrape') if self.manifest is not None else None
+        for source in ('arxiv', 'pubmed'):
+            articles = self.store.load(source)
+            if not articles:
+                continue
+            for article in articles:
+                key = paper_key(article, source)
+                if not article.get('html_path') or (scraped is not None and key not in scraped):
+                    self.retry[source].append((source, article))
+                    continue
+                if key in extracted:
+                    self.kept[key] = extracted[key]
+                self.existing.append((source, article))
+            self.seen[source].update(article_id(a, source) for a in articles)
+            logger.info(f"[INFO] Trovati {len(articles)} articoli {source} esistenti")
+            if self.retry[source]:
+                logger.info(f"[INFO] {len(self.retry[source])} articoli {source} da riscaricare")
+        if self.manifest is not None:
+            self.indexed = self.manifest.done('index') & set(self.kept)
+        if self.kept:
+            logger.info(f"[INFO] {len(self.kept)} articoli già estratti, {len(self.indexed)} già indicizzati")
+
+    def _previous_extraction(self) -> Dict[str, Tuple[List[TableRecord], List[FigureRecord]]]:
+        """Tabelle e figure degli articoli estratti secondo il manifest (vuoto senza i file JSON)."""
+        tables_path, figures_path = DATA_DIR / TABLES_FILE, DATA_DIR / FIGURES_FILE
+        if self.manifest is None or not (tables_path.exists() and figures_path.exists()):
+            return {}
+        extracted = {key: ([], []) for key in self.manifest.done('extract')}
+        for path, record_type, slot in ((tables_path, TableRecord, 0), (figures_path, FigureRecord, 1)):
+            with open(path, 'r', encoding='utf-8') as f:
+                for item in json.load(f):
+                    record = record_type.from_dict(item)
+                    key = f"{record.get('source')}:{record.get('paper_id')}"
+                    if key in extracted:
+                        extracted[key][slot].append(record)
+        return extracted
+
+    # ---------- handler delle fasi ----------
+
+    def _search(self, source: str) -> Callable:
+        def handler(keyword: str) -> List[Tuple[str, Dict]]:
+            logger.info(f"  [{source}] Cercando: {keyword}")
+            # In modalità continue solo gli articoli successivi all'ultima raccolta della keyword
+            articles, mark = harvest_keyword(
+                self.arxiv if source == 'arxiv' else self.pubmed, source, keyword, self.store,
+                incremental=self.continue_mode,
+                max_results=ARXIV_MAX_RESULTS if source == 'arxiv' else PUBMED_MAX_RESULTS
+            )
+            self.scheduler.record_mark(source, keyword, mark)
+
+            new_articles = [
+                (source, article) for article in self.scheduler.merge(source, keyword, articles)
+                if published_since(article, self.since)
+            ]
+            logger.info(f"  [{source}] {keyword}: {len(new_articles)} nuovi articoli")
+            return new_articles
+        return handler
+
+    def _download_arxiv(self, item):
+        source, article = item
+        # Il rate limit per host è del client HTTP condiviso: nessuna pausa nel worker
+        result = self.arxiv.download_html_article(article)
+        if result:
+            article['html_path'] = result
+        else:
+            article['html_available'] = False
+        self.store.upsert(source, [article])
+        # Solo i download riusciti: gli altri saranno ritentati in modalità continue
+        if result:
+            self._mark_done('scrape', [paper_key(article, source)])
+        return [item]
+
+    def _download_pubmed(self, item):
+        source, article = item
+        result = self.pubmed.download_article(article)
+        self.store.upsert(source, [article])
+        if result:
+            self._mark_done('scrape', [paper_key(article, source)])
+        return [item]
+
+    def _extract(self, item):
+        source, article = item
+        kept = self.kept.get(paper_key(article, source))
+        if kept is not None:
+            # Estratto in un'esecuzione precedente
+            return [(source, article) + kept]
+        tables, figures = extract_article(article, source, self.table_extractor, self.figure_extractor)
+        return [(source, article, tables, figures)]
+
+    def _index(self, item):
+        """Ultima fase (un solo thread): raccolta, invio a Elasticsearch e checkpoint a blocchi."""
+        source, article, tables, figures = item
+        key = paper_key(article, source)
+        extracted = key not in self.kept
+        send = self.indexer.es is not None and (extracted or key not in self.indexed)
+        self.indexer.add(source, article, tables, figures, collect=extracted, send=send)
+        if extracted:
+            self._pending['extract'].append(key)
+        if send:
+            self._pending['index'].append(key)
+        if max(len(keys) for keys in self._pending.values()) >= CHECKPOINT_CHUNK_SIZE:
+            self._checkpoint()
+        return ()
+
+    def _checkpoint(self):
+        """
+        Invia i documenti in attesa e salva tabelle e figure, poi registra nel
+        manifest gli articoli elaborati dall'ultimo checkpoint (i dati prima del manifest).
+        """
+        self.indexer.flush()
+        self._save(self.indexer)
+        pending, self._pending = self._pending, {'extract': [], 'index': []}
+        self._mark_done('extract', pending['extract'])
+        self._mark_done('index', [key for key in pending['index'] if key not in self.indexer.failed_keys])
+
+    def _mark_done(self, stage: str, keys: List[str]):
+        if self.manifest is not None and keys:
+            self.manifest.mark_done(stage, keys)
+
+    # ---------- esecuzione ----------
+
+    def _save(self, indexer: BulkIndexer):
+        """Scrive tabelle e figure come la pipeline a fasi (gli articoli sono già in archivio)."""
+        outputs = (
+            (TABLES_FILE, indexer.tables),
+            (FIGURES_FILE, indexer.figures)
+        )
+        for name, data in outputs:
+            with open(DATA_DIR / name, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
+
+    def run(self) -> Tuple[List[ArticleRecord], List[ArticleRecord], List[TableRecord], List[FigureRecord]]:
+        """
+        Esegue la pipeline.
+
+        Returns:
+            (articoli arXiv, articoli PubMed, tabelle, figure)
+        """
+        logger.info("=" * 60)
+        logger.info("PIPELINE STREAMING: SCRAPING + ESTRAZIONE + INDICIZZAZIONE")
+        logger.info("=" * 60)
+        start_time = time.perf_counter()
+
+        if self.continue_mode:
+            self._load_existing()
+
+        if self.index_to_es and self.es is None:
+            self.es = get_elasticsearch_client()
+        if self.es is not None:
+            create_indices(self.es)
+
+        indexer = self.indexer = BulkIndexer(self.es if self.index_to_es else None, text_store=self.store.texts)
+        # Tabelle e figure degli articoli non rielaborati restano nei file JSON
+        for tables, figures in self.kept.values():
+            indexer.collect(tables, figures)
+
+        # Code limitate tra le fasi; le keyword sono note in anticipo
+        keywords = {'arxiv': Queue(), 'pubmed': Queue()}
+        for keyword in ARXIV_KEYWORDS:
+            keywords['arxiv'].put(keyword)
+        for keyword in PUBMED_KEYWORDS:
+            keywords['pubmed'].put(keyword)
+        existing = Queue()
+        for item in self.existing:
+            existing.put(item)
+        retry = {'arxiv': Queue(), 'pubmed': Queue()}
+        for source, items in self.retry.items():
+            for item in items:
+                retry[source].put(item)
+        downloads = {'arxiv': Queue(self.queue_size), 'pubmed': Queue(self.queue_size)}
+        to_extract = Queue(self.queue_size)
+        to_index = Queue(self.queue_size)
+
+        searches = [
+            # Keyword della stessa fonte cercate in parallelo (nel rate limit dell'host)
+            Stage("search-arxiv", self._search('arxiv'), keywords['arxiv'], downloads['arxiv'],
+                  workers=max(1, min(SEARCH_WORKERS, len(ARXIV_KEYWORDS)))),
+            Stage("search-pubmed", self._search('pubmed'), keywords['pubmed'], downloads['pubmed'],
+                  workers=max(1, min(SEARCH_WORKERS, len(PUBMED_KEYWORDS)))),
+            # Articoli in archivio da riscaricare, accodati ai download come quelli trovati
+            Stage("retry-arxiv", lambda item: [item], retry['arxiv'], downloads['arxiv']),
+            Stage("retry-pubmed", lambda item: [item], retry['pubmed'], downloads['pubmed'])
+        ]
+        download_stages = [
+            Stage("download-arxiv", self._download_arxiv, downloads['arxiv'], to_extract,
+                  workers=arxiv_scraper.MAX_WORKERS),
+            Stage("download-pubmed", self._download_pubmed, downloads['pubmed'], to_extract,
+                  workers=pubmed_scraper.MAX_WORKERS),
+            Stage("existing", lambda item: [item], existing, to_extract)
+        ]
+        extract_stage = Stage("extract", self._extract, to_extract, to_index, workers=self.extract_workers)
+        index_stage = Stage("index", self._index, to_index)
+        stages = searches + download_stages + [extract_stage, index_stage]
+
+        for stage in stages:
+            stage.start()
+
+        # Chiusura a cascata: ogni fase termina quando la precedente ha finito
+        for stage in stages:
+            stage.close()
+        self._checkpoint()
+        counts = write_local_indices()
+
+        # Mark della raccolta incrementale solo se nessun articolo trovato è andato perso
+        if not any(stage.errors for stage in searches + download_stages):
+            self.scheduler.save_marks()
+        else:
+            logger.warning("[WARN] Errori in ricerca/download: mark della raccolta incrementale non aggiornati")
+
+        elapsed = time.perf_counter() - start_time
+        logger.info("\n[STATS] Fasi della pipeline (tempo di lavoro vs tempo totale)")
+        for stage in stages:
+            logger.info(
+                f"  {stage.name:<16} {stage.processed:>5} elementi, {stage.errors:>3} errori, "
+                f"{stage.busy_time:>8.1f}s di lavoro su {stage.workers} thread"
+            )
+        logger.info(f"  Indicizzati in Elasticsearch: {indexer.indexed}, falliti: {indexer.failed}")
+        for line in self.scheduler.report() + get_http_client().report():
+            logger.info(line)
+        for index_name, count in counts.items():
+            logger.info(f"  Indice locale {index_name}: {count} documenti")
+        logger.info(f"[OK] Pipeline streaming completata in {elapsed:.1f}s")
+
+        return (
+            indexer.articles['arxiv'],
+            indexer.articles['pubmed'],
+            indexer.tables,
+            indexer.figures
+        )
@@ -9,11 +9,10 @@ Ingegneria dei Dati 2025/2026 - Homework 5
 
 import os
 import sys
-import json
 import time
 import re
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import quote_plus
 import xml.etree.ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -22,16 +21,17 @@ import threading
 import requests
 from tqdm import tqdm
 
-# Ignora warning BeautifulSoup per XML
-import warnings
-from bs4 import XMLParsedAsHTMLWarning
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
-
 # Aggiungi il path principale al PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
-    ARXIV_KEYWORDS, ARXIV_DATA_DIR, HEADERS, REQUEST_DELAY, REQUEST_TIMEOUT, MAX_RETRIES
+    ARXIV_KEYWORDS, ARXIV_DATA_DIR, MAX_RETRIES
 )
+from storage.article_store import open_article_store
+from storage.text_store import FullTextStore
+from storage.raw_archive import write_raw
+from models.records import ArticleRecord
+from scrapers.http_client import get_http_client
+from extractors.text_extractor import arxiv_full_text
 
 # API ufficiale arXiv
 ARXIV_API_URL = "https://export.arxiv.org/api/query"
@@ -53,10 +53,10 @@ class ArxivScraper:
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+        self.http = get_http_client()
+        self.session = self.http.session
         self.articles: List[Dict] = []
-        self.articles_metadata_file = os.path.join(str(ARXIV_DATA_DIR), "articles_metadata.json")
+        self.text_store = FullTextStore()
     
     def search_articles(self, query: str, max_results: int = 200) -> List[Dict]:
         """
@@ -69,14 +69,36 @@ class ArxivScraper:
         Returns:
             Lista di dizionari con i metadati degli articoli
         """
+        articles, _ = self._search(query, max_results)
+        return articles
+    
+    def search_new_articles(self, query: str, submitted_since: str,
+                            max_results: int = 200) -> Tuple[List[Dict], bool]:
+        """
+        Ricerca incrementale: articoli sottomessi da `submitted_since` (YYYY-MM-DD) in poi.
+        Ordina per data di sottomissione e si ferma al primo articolo più vecchio.
+        
+        Returns:
+            (articoli, completa): completa=False se max_results è stato raggiunto
+            prima di arrivare a `submitted_since` (restano articoli non recuperati)
+        """
+        return self._search(query, max_results, submitted_since)
+    
+    def _search(self, query: str, max_results: int,
+                submitted_since: Optional[str] = None) -> Tuple[List[Dict], bool]:
+        """Paginazione sull'API: per rilevanza, o per data di sottomissione se incrementale."""
         articles = []
         start = 0
         batch_size = 100  # Max consentito dall'API
+        complete = False
         
-        print(f"\n[INFO] Ricerca articoli via API per: '{query}'")
+        if submitted_since:
+            print(f"\n[INFO] Ricerca incrementale via API per: '{query}' (dal {submitted_since})")
+        else:
+            print(f"\n[INFO] Ricerca articoli via API per: '{query}'")
         
         with tqdm(total=max_results, desc="Ricerca articoli") as pbar:
-            while len(articles) < max_results:
+            while len(articles) < max_results and not complete:
                 # Costruisci query per l'API
                 # Cerca nel titolo E nell'abstract
                 search_query = f'all:"{query}"'
@@ -85,7 +107,7 @@ class ArxivScraper:
                     'search_query': search_query,
                     'start': start,
                     'max_results': min(batch_size, max_results - len(articles)),
-                    'sortBy': 'relevance',
+                    'sortBy': 'submittedDate' if submitted_since else 'relevance',
                     'sortOrder': 'descending'
                 }
                 
@@ -99,24 +121,27 @@ class ArxivScraper:
                     
                     if not batch_articles:
                         print(f"\n[INFO] Nessun altro risultato dopo {len(articles)} articoli")
+                        complete = True
                         break
                     
                     for article in batch_articles:
+                        # Ordinamento per data: il primo articolo più vecchio chiude la ricerca
+                        if submitted_since and article['date'] and article['date'] < submitted_since:
+                            complete = True
+                            break
                         if len(articles) >= max_results:
                             break
                         articles.append(article)
                         pbar.update(1)
                     
                     start += batch_size
-                    
-                    # Rispetta rate limit API (3 secondi tra richieste)
-                    time.sleep(3)
+                    # Rate limit API (3 secondi tra richieste): gestito dal client HTTP condiviso
                     
                 except Exception as e:
                     print(f"\n[ERROR] Errore durante la ricerca: {e}")
                     break
         
-        return articles
+        return articles, complete
     
     def _parse_api_response(self, xml_content: str) -> List[Dict]:
         """Parse la risposta XML dell'API arXiv."""
@@ -135,7 +160,7 @@ class ArxivScraper:
         
         return articles
     
-    def _parse_entry(self, entry) -> Optional[Dict]:
+    def _parse_entry(self, entry) -> Optional[ArticleRecord]:
         """Estrae i metadati da un entry Atom."""
         try:
             # ID (es: http://arxiv.org/abs/2301.12345v1)
@@ -201,19 +226,19 @@ class ArxivScraper:
             html_url = f"https://arxiv.org/html/{arxiv_id_base}"
             abs_url = f"https://arxiv.org/abs/{arxiv_id_base}"
             
-            return {
-                'arxiv_id': arxiv_id_base,
-                'title': title,
-                'authors': authors,
-                'abstract': abstract,
-                'date': date,
-                'updated': updated,
-                'categories': categories,
-                'html_url': html_url,
-                'pdf_url': pdf_url,
-                'abs_url': abs_url,
-                'source': 'arxiv'
-            }
+            return ArticleRecord(
+                arxiv_id=arxiv_id_base,
+                title=title,
+                authors=authors,
+                abstract=abstract,
+                date=date,
+                updated=updated,
+                categories=categories,
+                html_url=html_url,
+                pdf_url=pdf_url,
+                abs_url=abs_url,
+                source='arxiv'
+            )
             
         except Exception as e:
             print(f"\n[WARN] Errore parsing entry: {e}")
@@ -243,19 +268,15 @@ class ArxivScraper:
             if 'text/html' not in content_type:
                 return None
             
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'lxml')
+            # Parsing lxml dei bytes originali: None se la pagina non ha contenuto valido
+            full_text = arxiv_full_text(response.content)
             
-            # Verifica se è una pagina valida con contenuto
-            if soup.find('div', class_='ltx_page_content') or soup.find('article'):
-                # Salva l'HTML
-                html_file = os.path.join(str(ARXIV_DATA_DIR), f"{arxiv_id}.html")
-                with open(html_file, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
+            if full_text is not None:
+                # Salva l'HTML compresso, con i bytes originali della risposta
+                html_file = write_raw(os.path.join(str(ARXIV_DATA_DIR), f"{arxiv_id}.html"), response.content)
                 
-                # Estrai il testo completo e salvalo nell'articolo
-                full_text = self._extract_full_text(soup)
-                article['full_text'] = full_text
+                # Testo completo: nel blob store compresso, nell'articolo solo il riferimento
+                article['full_text_ref'] = self.text_store.put(full_text)
                 article['html_available'] = True
                 
                 return html_file
@@ -284,14 +305,13 @@ class ArxivScraper:
         
         def download_one(article):
             nonlocal successful, failed
+            # Il rate limit per host è del client HTTP condiviso: nessuna pausa nel worker
             result = self.download_html_article(article)
-            time.sleep(1)  # Rate limit: 1 secondo tra richieste
             with lock:
                 if result:
                     article['html_path'] = result
                     successful += 1
                 else:
-                    article['full_text'] = article.get('abstract', '')
                     article['html_available'] = False
                     failed += 1
             return article
@@ -306,55 +326,9 @@ class ArxivScraper:
         print(f"[OK] Download completato: {successful} con HTML, {failed} solo abstract")
         return articles
     
-    def _extract_full_text(self, soup) -> str:
-        """Estrae il testo completo dall'HTML dell'articolo."""
-        # Rimuovi script e style
-        for element in soup(['script', 'style', 'nav', 'header', 'footer']):
-            element.decompose()
-        
-        # Cerca il contenuto principale
-        main_content = soup.find('div', class_='ltx_page_content')
-        if not main_content:
-            main_content = soup.find('article')
-        if not main_content:
-            main_content = soup.find('body')
-        
-        if main_content:
-            text = main_content.get_text(separator=' ', strip=True)
-            # Pulisci spazi multipli
-            text = re.sub(r'\s+', ' ', text)
-            return text
-        
-        return ""
-    
     def _make_request(self, url: str, params: dict = None, retries: int = MAX_RETRIES) -> Optional[requests.Response]:
-        """Effettua una richiesta HTTP con retry."""
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
-                
-                if response.status_code == 200:
-                    return response
-                elif response.status_code == 404:
-                    return response  # 404 gestito dal chiamante
-                else:
-                    response.raise_for_status()
-                    
-            except requests.exceptions.HTTPError as e:
-                if attempt < retries - 1:
-                    wait_time = REQUEST_DELAY * (attempt + 1)
-                    print(f"\n[WARN] Retry {attempt + 1}/{retries} dopo {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"\n[ERROR] Richiesta fallita: {e}")
-                    return None
-            except requests.exceptions.RequestException as e:
-                if attempt < retries - 1:
-                    time.sleep(REQUEST_DELAY * (attempt + 1))
-                else:
-                    print(f"\n[ERROR] Richiesta fallita dopo {retries} tentativi: {url}")
-                    return None
-        return None
+        """Richiesta HTTP tramite il client condiviso (rate limit, backoff, circuit breaker)."""
+        return self.http.get(url, params=params, retries=retries)
     
     def run(self, max_per_keyword: int = 100):
         """
@@ -388,35 +362,32 @@ class ArxivScraper:
         print("\n[INFO] Tentativo download HTML (se disponibile)...")
         html_available = 0
         
+        store = open_article_store()
         with tqdm(total=len(all_articles), desc="Download HTML") as pbar:
             for article in all_articles:
-                full_text = self.download_html_article(article)
+                html_file = self.download_html_article(article)
                 
-                if full_text:
-                    article['full_text'] = full_text
-                    article['html_available'] = True
+                if html_file:
+                    article['html_path'] = html_file
                     html_available += 1
                 else:
-                    article['full_text'] = article['abstract']  # Fallback
-                    article['html_available'] = False
+                    article['html_available'] = False  # Gli indexer useranno l'abstract
                 
+                # Una riga per articolo nell'archivio (nessuna riscrittura completa)
+                store.upsert('arxiv', [article])
                 pbar.update(1)
                 time.sleep(0.5)  # Rate limit gentile per HTML
         
         self.articles = all_articles
         
-        # Salva i metadati
-        print(f"\n[INFO] Salvataggio metadati...")
-        with open(self.articles_metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(all_articles, f, indent=2, ensure_ascii=False)
-        
         # Statistiche finali
         print("\n" + "=" * 60)
         print("[OK] Scraping completato!")
         print(f"   Articoli totali: {len(all_articles)}")
         print(f"   Con HTML disponibile: {html_available}")
         print(f"   Solo abstract: {len(all_articles) - html_available}")
-        print(f"   Dati salvati in: {ARXIV_DATA_DIR}")
+        print(f"   File salvati in: {ARXIV_DATA_DIR}")
+        print(f"   Metadati in: {store.path}")
         print("=" * 60)
         
         return all_articles
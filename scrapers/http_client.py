@@ -0,0 +1,238 @@
+"""
+Client HTTP condiviso dagli scraper (arXiv, PubMed).
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Per ogni host:
+- rate limit: intervallo minimo tra richieste (scrapers/rate_limiter.py)
+- circuit breaker: dopo CIRCUIT_FAILURE_THRESHOLD errori consecutivi l'host
+  viene saltato per CIRCUIT_COOLDOWN secondi, poi una sola richiesta di prova
+  decide se riaprire il traffico; i thread non restano bloccati sui timeout
+- backoff esponenziale con jitter tra i tentativi, o il Retry-After del server
+- concorrenza AIMD: +1/limite a ogni successo, dimezzata su 429/503
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    HEADERS, REQUEST_TIMEOUT, MAX_RETRIES,
+    BACKOFF_BASE, BACKOFF_MAX, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN,
+    HOST_INITIAL_CONCURRENCY, HOST_MAX_CONCURRENCY
+)
+from scrapers.rate_limiter import RATE_LIMITER
+
+# Risposte restituite al chiamante senza ritentare (404: articolo senza HTML, gestito dagli scraper)
+ACCEPTED_STATUSES = {200, 404}
+# Segnali di sovraccarico: riducono la concorrenza dell'host
+THROTTLE_STATUSES = {429, 503}
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff esponenziale con full jitter: uniforme in [0, BASE * 2^attempt]."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """Secondi indicati dall'header Retry-After (numero o data HTTP), se presente."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostState:
+    """Circuit breaker e limite di concorrenza AIMD di un host."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self._cond = threading.Condition()
+        # Circuit breaker
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.trips = 0
+        # AIMD
+        self.limit = float(HOST_INITIAL_CONCURRENCY)
+        self.active = 0
+        self.last_decrease = 0.0
+        # Statistiche
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    # ---------- circuit breaker ----------
+
+    def allow(self) -> bool:
+        """False se il circuito è aperto (o un'altra richiesta di prova è in corso)."""
+        with self._cond:
+            if self.failures < CIRCUIT_FAILURE_THRESHOLD:
+                return True
+            if time.monotonic() < self.open_until or self.probing:
+                return False
+            self.probing = True  # semiaperto: passa solo questa richiesta
+            return True
+
+    def record_success(self):
+        with self._cond:
+            self.failures = 0
+            self.probing = False
+            # Aumento additivo: circa +1 ogni `limit` successi
+            self.limit = min(float(HOST_MAX_CONCURRENCY), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def record_failure(self, throttled: bool = False):
+        with self._cond:
+            self.failures += 1
+            self.errors += 1
+            self.probing = False
+            if self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+                if self.open_until <= time.monotonic():
+                    self.trips += 1
+                self.open_until = time.monotonic() + CIRCUIT_COOLDOWN
+            if throttled:
+                self.throttled += 1
+                # Diminuzione moltiplicativa, al più una volta per finestra di REQUEST_TIMEOUT
+                now = time.monotonic()
+                if now - self.last_decrease > REQUEST_TIMEOUT:
+                    self.limit = max(1.0, self.limit / 2)
+                    self.last_decrease = now
+
+    # ---------- concorrenza ----------
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+            self.requests += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+
+class HttpClient:
+    """Sessione HTTP condivisa con retry, backoff, circuit breaker e AIMD per host."""
+
+    def __init__(self, headers: Optional[Dict] = None):
+        self.session = requests.Session()
+        self.session.headers.update(headers or HEADERS)
+        adapter = HTTPAdapter(pool_maxsize=HOST_MAX_CONCURRENCY * 2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, url: str) -> HostState:
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostState(host)
+            return self._hosts[host]
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None,
+                data: Optional[Dict] = None, retries: int = MAX_RETRIES) -> Optional[requests.Response]:
+        """
+        Esegue la richiesta con retry.
+
+        Returns:
+            La risposta (200 o 404), None se l'host è in errore o i tentativi sono esauriti
+        """
+        state = self._state(url)
+        for attempt in range(retries):
+            if not state.allow():
+                print(f"\n[WARN] Circuito aperto per {state.host}: richiesta saltata")
+                return None
+
+            # Prima lo slot di concorrenza, poi quello temporale: chi attende uno slot
+            # libero non parte a ridosso di un altro ignorando l'intervallo dell'host
+            state.acquire()
+            try:
+                RATE_LIMITER.wait(url)
+                response = self.session.request(method, url, params=params, data=data,
+                                                timeout=REQUEST_TIMEOUT)
+            except requests.exceptions.RequestException as e:
+                state.record_failure()
+                delay = backoff_delay(attempt)
+                error = f"{type(e).__name__}"
+            else:
+                if response.status_code in ACCEPTED_STATUSES:
+                    state.record_success()
+                    return response
+                if response.status_code < 500 and response.status_code not in THROTTLE_STATUSES:
+                    # Errore del client (400, 403...): ritentare non serve
+                    state.record_success()
+                    print(f"\n[ERROR] Richiesta rifiutata ({response.status_code}): {url}")
+                    return None
+                throttled = response.status_code in THROTTLE_STATUSES
+                state.record_failure(throttled=throttled)
+                server_delay = retry_after(response)
+                if server_delay is not None:
+                    delay = min(BACKOFF_MAX, server_delay)
+                    # Il Retry-After vale per tutti i thread che usano l'host
+                    RATE_LIMITER.defer(url, delay)
+                else:
+                    delay = backoff_delay(attempt)
+                error = f"HTTP {response.status_code}"
+            finally:
+                state.release()
+
+            if attempt < retries - 1:
+                print(f"\n[WARN] {error} da {state.host}: retry {attempt + 1}/{retries} tra {delay:.1f}s")
+                time.sleep(delay)
+
+        print(f"\n[ERROR] Richiesta fallita dopo {retries} tentativi: {url}")
+        return None
+
+    def get(self, url: str, params: Optional[Dict] = None, retries: int = MAX_RETRIES):
+        return self.request('GET', url, params=params, retries=retries)
+
+    def post(self, url: str, data: Dict, retries: int = MAX_RETRIES):
+        return self.request('POST', url, data=data, retries=retries)
+
+    def report(self) -> List[str]:
+        """Righe di riepilogo per host."""
+        lines = []
+        with self._lock:
+            states = list(self._hosts.values())
+        for state in states:
+            lines.append(
+                f"[STATS] {state.host}: {state.requests} richieste, {state.errors} errori, "
+                f"{state.throttled} 429/503, circuito aperto {state.trips} volte, "
+                f"concorrenza finale {int(state.limit)}"
+            )
+        return lines
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Client condiviso dal processo (una sola sessione e uno stato per host)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
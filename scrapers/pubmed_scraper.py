@@ -5,11 +5,10 @@ Ingegneria dei Dati 2025/2026 - Homework 5
 
 import os
 import sys
-import json
 import time
 import re
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin, quote_plus
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
@@ -23,12 +22,29 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
     PUBMED_BASE_URL, PUBMED_SEARCH_URL, PUBMED_KEYWORDS,
     PUBMED_DATA_DIR, PUBMED_MIN_ARTICLES,
-    HEADERS, REQUEST_DELAY, REQUEST_TIMEOUT, MAX_RETRIES
+    REQUEST_DELAY, MAX_RETRIES
 )
+from storage.article_store import open_article_store
+from storage.text_store import FullTextStore
+from storage.raw_archive import write_raw
+from models.records import ArticleRecord
+from scrapers.http_client import get_http_client
+from extractors.text_extractor import jats_document
 
 # Numero di thread per il download parallelo (ridotto per rispettare rate limits)
 MAX_WORKERS = 5
 
+# E-utilities NCBI (ricerca e metadati tramite history server)
+EUTILS_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+ESEARCH_URL = f"{EUTILS_BASE_URL}/esearch.fcgi"
+ESUMMARY_URL = f"{EUTILS_BASE_URL}/esummary.fcgi"
+EFETCH_URL = f"{EUTILS_BASE_URL}/efetch.fcgi"
+# Record per richiesta esummary (il massimo consentito è 10000)
+ESUMMARY_PAGE_SIZE = 500
+
+# Estremo superiore delle ricerche per data (mindate richiede anche maxdate)
+EUTILS_MAX_DATE = "3000/12/31"
+
 
 class PubMedScraper:
     """
@@ -36,10 +52,10 @@ class PubMedScraper:
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+        self.http = get_http_client()
+        self.session = self.http.session
         self.articles: List[Dict] = []
-        self.articles_metadata_file = os.path.join(PUBMED_DATA_DIR, "articles_metadata.json")
+        self.text_store = FullTextStore()
     
     def search_articles(self, query: str, max_results: int = 600) -> List[Dict]:
         """
@@ -117,7 +133,7 @@ class PubMedScraper:
         
         return articles
     
-    def _parse_search_result(self, result) -> Optional[Dict]:
+    def _parse_search_result(self, result) -> Optional[ArticleRecord]:
         """Estrae i metadati di un articolo dal risultato di ricerca."""
         try:
             # Cerca il link all'articolo
@@ -157,15 +173,15 @@ class PubMedScraper:
             # URL dell'articolo
             article_url = f"https://pmc.ncbi.nlm.nih.gov/articles/{pmc_id}/"
             
-            return {
-                'pmc_id': pmc_id,
-                'title': title,
-                'authors': authors,
-                'abstract': abstract,
-                'date': date,
-                'url': article_url,
-                'source': 'pubmed'
-            }
+            return ArticleRecord(
+                pmc_id=pmc_id,
+                title=title,
+                authors=authors,
+                abstract=abstract,
+                date=date,
+                url=article_url,
+                source='pubmed'
+            )
             
         except Exception as e:
             return None
@@ -186,62 +202,36 @@ class PubMedScraper:
         
         try:
             # Usa l'API efetch per recuperare il full-text XML
-            efetch_url = (
-                f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-                f"?db=pmc&id={numeric_id}&rettype=full&retmode=xml"
-            )
+            efetch_url = f"{EFETCH_URL}?db=pmc&id={numeric_id}&rettype=full&retmode=xml"
             
             response = self._make_request(efetch_url)
             
             if response is None or response.status_code != 200:
                 return None
             
-            xml_content = response.text
+            xml_content = response.content
             
             # Verifica che sia un XML valido con contenuto
-            if '<article' not in xml_content and '<pmc-articleset' not in xml_content:
+            if b'<article' not in xml_content and b'<pmc-articleset' not in xml_content:
                 return None
             
-            # Parsing XML per estrarre testo
-            soup = BeautifulSoup(xml_content, 'lxml-xml')
+            # Parsing lxml.etree dei bytes: abstract, autori e testo del body
+            document = jats_document(xml_content)
             
             # Estrai abstract se non presente
-            if not article.get('abstract'):
-                abstract_elem = soup.find('abstract')
-                if abstract_elem:
-                    article['abstract'] = abstract_elem.get_text(separator=' ', strip=True)
+            if not article.get('abstract') and document['abstract']:
+                article['abstract'] = document['abstract']
             
             # Estrai autori se non presenti
-            if not article.get('authors') or len(article.get('authors', [])) == 0:
-                contrib_group = soup.find('contrib-group')
-                if contrib_group:
-                    authors = []
-                    for contrib in contrib_group.find_all('contrib', {'contrib-type': 'author'}):
-                        name_elem = contrib.find('name')
-                        if name_elem:
-                            surname = name_elem.find('surname')
-                            given = name_elem.find('given-names')
-                            if surname and given:
-                                authors.append(f"{given.get_text(strip=True)} {surname.get_text(strip=True)}")
-                            elif surname:
-                                authors.append(surname.get_text(strip=True))
-                    if authors:
-                        article['authors'] = authors
+            if not article.get('authors') and document['authors']:
+                article['authors'] = document['authors']
             
-            # Estrai testo completo dal body
-            body = soup.find('body')
-            if body:
-                full_text = body.get_text(separator=' ', strip=True)
-                # Rimuovi spazi multipli
-                full_text = re.sub(r'\s+', ' ', full_text)
-                article['full_text'] = full_text
-            else:
-                article['full_text'] = article.get('abstract', '')
+            # Testo completo: nel blob store compresso, nell'articolo solo il riferimento
+            if document['full_text'] is not None:
+                article['full_text_ref'] = self.text_store.put(document['full_text'])
             
-            # Salva l'XML (che può essere usato per estrazione tabelle/figure)
-            xml_file = os.path.join(str(PUBMED_DATA_DIR), f"{pmc_id}.xml")
-            with open(xml_file, 'w', encoding='utf-8') as f:
-                f.write(xml_content)
+            # Salva l'XML compresso (usato per estrazione tabelle/figure)
+            xml_file = write_raw(os.path.join(str(PUBMED_DATA_DIR), f"{pmc_id}.xml"), response.content)
             
             article['html_path'] = xml_file  # Anche se è XML, lo trattiamo come file di contenuto
             article['xml_path'] = xml_file
@@ -295,118 +285,139 @@ class PubMedScraper:
                             with lock:
                                 failed += 1
                         pbar.update(1)
-                time.sleep(0.3)  # Pausa tra batch
         
         print(f"[OK] Download completato: {successful} successi, {failed} falliti")
         return articles
     
-    def _extract_full_text(self, soup: BeautifulSoup) -> str:
-        """Estrae il testo completo dall'HTML dell'articolo."""
-        # Rimuovi elementi non testuali
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-            element.decompose()
-        
-        # Cerca il contenuto principale
-        main_content = soup.find('div', class_='article-full-text')
-        if not main_content:
-            main_content = soup.find('div', class_='jig-ncbi-full-text')
-        if not main_content:
-            main_content = soup.find('article')
-        if not main_content:
-            main_content = soup.find('div', id='maincontent')
-        if not main_content:
-            main_content = soup.find('body')
-        
-        if main_content:
-            text = main_content.get_text(separator=' ', strip=True)
-            text = re.sub(r'\s+', ' ', text)
-            return text
-        
-        return ""
-    
-    def _make_request(self, url: str, retries: int = MAX_RETRIES) -> Optional[requests.Response]:
-        """Effettua una richiesta HTTP con retry."""
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-                response.raise_for_status()
-                return response
-            except requests.exceptions.RequestException as e:
-                if attempt < retries - 1:
-                    time.sleep(REQUEST_DELAY * (attempt + 1))
-                else:
-                    return None
-        return None
+    def _make_request(self, url: str, retries: int = MAX_RETRIES,
+                      data: Optional[Dict] = None) -> Optional[requests.Response]:
+        """Richiesta HTTP tramite il client condiviso (POST se sono indicati i parametri `data`)."""
+        if data is not None:
+            return self.http.post(url, data=data, retries=retries)
+        return self.http.get(url, retries=retries)
     
     def search_via_api(self, query: str, max_results: int = 600) -> List[Dict]:
         """
         Cerca articoli usando l'API E-utilities di NCBI.
         Metodo alternativo più affidabile.
         """
-        articles = []
+        articles, _ = self._search_api(query, max_results)
+        return articles
+    
+    def search_new_articles(self, query: str, entered_since: str,
+                            max_results: int = 600) -> Tuple[List[Dict], bool]:
+        """
+        Ricerca incrementale: articoli entrati in PMC da `entered_since` (YYYY-MM-DD) in poi
+        (datetype=edat, mindate/maxdate di esearch).
         
-        print(f"\n[INFO] Ricerca via NCBI API per: '{query}'")
+        Returns:
+            (articoli, completa): completa=False se i risultati superano max_results
+        """
+        return self._search_api(query, max_results, entered_since)
+    
+    def _search_api(self, query: str, max_results: int,
+                    entered_since: Optional[str] = None) -> Tuple[List[Dict], bool]:
+        """esearch sul history server (eventualmente limitata per data di ingresso) + esummary a pagine."""
+        articles = []
+        complete = False
         
-        # Step 1: Cerca gli ID
-        esearch_url = (
-            f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-            f"?db=pmc&term={quote_plus(query)}+AND+open+access[filter]"
-            f"&retmax={max_results}&retmode=json"
-        )
+        print(f"\n[INFO] Ricerca via NCBI API per: '{query}'"
+              + (f" (dal {entered_since})" if entered_since else ""))
         
         try:
-            response = self._make_request(esearch_url)
-            if response is None:
-                return articles
+            history = self._esearch_history(query, entered_since)
+            if history is None:
+                return articles, complete
             
-            data = response.json()
-            id_list = data.get('esearchresult', {}).get('idlist', [])
+            total = min(history['count'], max_results)
+            complete = history['count'] <= max_results
+            print(f"   Trovati {history['count']} articoli (recupero {total})")
             
-            print(f"   Trovati {len(id_list)} ID articoli")
-            
-            # Step 2: Recupera i dettagli
-            if id_list:
-                # Processa in batch
-                batch_size = 50
-                with tqdm(total=len(id_list), desc="Recupero metadati") as pbar:
-                    for i in range(0, len(id_list), batch_size):
-                        batch = id_list[i:i+batch_size]
-                        ids_str = ','.join(batch)
-                        
-                        esummary_url = (
-                            f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
-                            f"?db=pmc&id={ids_str}&retmode=json"
-                        )
-                        
-                        response = self._make_request(esummary_url)
-                        if response:
-                            summary_data = response.json()
-                            results = summary_data.get('result', {})
-                            
-                            for pmc_uid in batch:
-                                if pmc_uid in results:
-                                    item = results[pmc_uid]
-                                    pmc_id = f"PMC{pmc_uid}"
-                                    
-                                    article = {
-                                        'pmc_id': pmc_id,
-                                        'title': item.get('title', 'No title'),
-                                        'authors': [a.get('name', '') for a in item.get('authors', [])],
-                                        'abstract': '',
-                                        'date': item.get('pubdate', ''),
-                                        'url': f"https://pmc.ncbi.nlm.nih.gov/articles/{pmc_id}/",
-                                        'source': 'pubmed'
-                                    }
-                                    articles.append(article)
-                                
-                                pbar.update(1)
-                        
-                        time.sleep(REQUEST_DELAY)
+            # Step 2: Recupera i dettagli a pagine dal history server
+            with tqdm(total=total, desc="Recupero metadati") as pbar:
+                for page in self._iter_summary_pages(history, total):
+                    if page is None:
+                        complete = False  # pagina di metadati persa: ricerca da ripetere
+                        continue
+                    articles.extend(page)
+                    pbar.update(len(page))
             
         except Exception as e:
             print(f"\n[ERROR] Errore API: {e}")
+            complete = False
         
-        return articles
+        return articles, complete
+    
+    def _esearch_history(self, query: str, entered_since: Optional[str] = None) -> Optional[Dict]:
+        """
+        Step 1: esearch con usehistory=y. Gli ID restano sul server NCBI:
+        la risposta contiene solo il conteggio e i riferimenti WebEnv/query_key.
+        """
+        params = {
+            'db': 'pmc',
+            'term': f"{query} AND open access[filter]",
+            'usehistory': 'y',
+            'retmax': 0,
+            'retmode': 'json'
+        }
+        if entered_since:
+            # E-utilities richiede sia mindate che maxdate
+            params.update({
+                'datetype': 'edat',
+                'mindate': entered_since.replace('-', '/'),
+                'maxdate': EUTILS_MAX_DATE
+            })
+        
+        response = self._make_request(ESEARCH_URL, data=params)
+        if response is None:
+            return None
+        result = response.json().get('esearchresult', {})
+        if 'webenv' not in result:
+            print(f"[WARN] esearch senza WebEnv: {result.get('ERROR', result.get('errorlist', ''))}")
+            return None
+        return {
+            'count': int(result.get('count', 0)),
+            'webenv': result['webenv'],
+            'query_key': result['querykey']
+        }
+    
+    def _iter_summary_pages(self, history: Dict, total: int) -> Iterator[Optional[List[Dict]]]:
+        """
+        esummary paginato con WebEnv/query_key e retstart/retmax (POST, nessun elenco di ID nell'URL).
+        Restituisce una pagina di articoli alla volta, None per le pagine non recuperate.
+        """
+        for retstart in range(0, total, ESUMMARY_PAGE_SIZE):
+            params = {
+                'db': 'pmc',
+                'WebEnv': history['webenv'],
+                'query_key': history['query_key'],
+                'retstart': retstart,
+                'retmax': min(ESUMMARY_PAGE_SIZE, total - retstart),
+                'retmode': 'json'
+            }
+            response = self._make_request(ESUMMARY_URL, data=params)
+            if response is None:
+                yield None
+            else:
+                results = response.json().get('result', {})
+                yield [
+                    self._summary_to_article(uid, results[uid])
+                    for uid in results.get('uids', [])
+                    if uid in results
+                ]
+    
+    def _summary_to_article(self, pmc_uid: str, item: Dict) -> ArticleRecord:
+        """Metadati dell'articolo da un record esummary."""
+        pmc_id = f"PMC{pmc_uid}"
+        return ArticleRecord(
+            pmc_id=pmc_id,
+            title=item.get('title', 'No title'),
+            authors=[a.get('name', '') for a in item.get('authors', [])],
+            abstract='',
+            date=item.get('pubdate', ''),
+            url=f"https://pmc.ncbi.nlm.nih.gov/articles/{pmc_id}/",
+            source='pubmed'
+        )
     
     def run(self, min_articles: int = PUBMED_MIN_ARTICLES):
         """
@@ -447,27 +458,26 @@ class PubMedScraper:
         print("\n[INFO] Download articoli completi...")
         successful_downloads = 0
         
+        store = open_article_store()
         with tqdm(total=len(all_articles), desc="Download articoli") as pbar:
             for article in all_articles:
                 if self.download_article(article):
                     successful_downloads += 1
                 
+                # Una riga per articolo nell'archivio (nessuna riscrittura completa)
+                store.upsert('pubmed', [article])
                 pbar.update(1)
                 time.sleep(REQUEST_DELAY)
         
         self.articles = all_articles
         
-        # Salva i metadati
-        print(f"\n[INFO] Salvataggio metadati...")
-        with open(self.articles_metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(all_articles, f, indent=2, ensure_ascii=False)
-        
         # Statistiche finali
         print("\n" + "=" * 60)
         print("[OK] Scraping completato!")
         print(f"   Articoli totali: {len(all_articles)}")
         print(f"   Download riusciti: {successful_downloads}")
-        print(f"   Dati salvati in: {PUBMED_DATA_DIR}")
+        print(f"   File salvati in: {PUBMED_DATA_DIR}")
+        print(f"   Metadati in: {store.path}")
         print("=" * 60)
         
         return all_articles
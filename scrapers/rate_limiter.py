@@ -0,0 +1,54 @@
+"""
+Rate limit per host condiviso tra scraper e thread.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Ogni host ha un intervallo minimo tra due richieste (HOST_MIN_INTERVALS in
+config.py). I thread prenotano il proprio turno sotto lock e aspettano fuori,
+quindi più ricerche in parallelo sullo stesso host restano nel budget
+consentito (es. 1 richiesta ogni 3 s per l'API arXiv).
+"""
+
+import os
+import sys
+import time
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import HOST_MIN_INTERVALS
+
+
+class HostRateLimiter:
+    """Intervallo minimo tra richieste allo stesso host."""
+
+    def __init__(self, intervals: Dict[str, float]):
+        self.intervals = dict(intervals)
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.waited: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        """Blocca fino al prossimo turno libero per l'host dell'URL."""
+        host = urlsplit(url).hostname or ''
+        interval = self.intervals.get(host, 0.0)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + interval
+            self.requests[host] = self.requests.get(host, 0) + 1
+            self.waited[host] = self.waited.get(host, 0.0) + (slot - now)
+        if slot > now:
+            time.sleep(slot - now)
+
+    def defer(self, url: str, seconds: float):
+        """Nessuna richiesta all'host per `seconds` (es. Retry-After ricevuto da un thread)."""
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            self._next_slot[host] = max(self._next_slot.get(host, 0.0), time.monotonic() + seconds)
+
+
+# Istanza condivisa da tutti gli scraper del processo
+RATE_LIMITER = HostRateLimiter(HOST_MIN_INTERVALS)
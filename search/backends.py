@@ -0,0 +1,569 @@
+"""
+Backend di ricerca comuni a interfaccia web e CLI.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+- ElasticsearchBackend: query DSL su Elasticsearch
+- LocalBackend: indice invertito locale con BM25 (nessun nodo ES richiesto)
+
+Entrambi restituiscono risposte nello stesso formato di Elasticsearch
+({"hits": {"hits": [...], "total": {"value": n}}, "aggregations": {...}}),
+quindi il codice di visualizzazione non dipende dal backend.
+"""
+
+import bisect
+import os
+import re
+import sys
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from elasticsearch import Elasticsearch
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ELASTICSEARCH_URL, SEARCH_BACKEND
+from search.local_index import Bm25Scorer, open_local_indices, parse_field_boosts, tokenize, top_k
+
+HIGHLIGHT_FRAGMENT_SIZE = 200
+
+
+class SearchBackend:
+    """Interfaccia comune dei backend di ricerca."""
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        raise NotImplementedError
+
+    def search(self, index: str, query: str, fields: List[str], size: int = 20,
+               filters: List[Dict] = None, aggs: Dict = None) -> Dict:
+        """Ricerca full-text multi-campo con filtri e aggregazioni opzionali."""
+        raise NotImplementedError
+
+    def boolean_search(self, index: str, must_terms: List[str], should_terms: List[str],
+                       must_not_terms: List[str], size: int = 20,
+                       filters: List[Dict] = None, aggs: Dict = None) -> Dict:
+        """Ricerca booleana (AND / OR / NOT) su tutti i campi."""
+        raise NotImplementedError
+
+    def suggest(self, targets: List[Tuple[str, str, List[str]]], prefix: str, size: int,
+                source_filter: str = None) -> List[Dict]:
+        """Autocompletamento: una risposta per ogni (indice, campo, campi _source)."""
+        raise NotImplementedError
+
+    def index_exists(self, index: str) -> bool:
+        raise NotImplementedError
+
+    def count(self, index: str) -> int:
+        raise NotImplementedError
+
+    def count_by_source(self, index: str) -> Tuple[int, Dict[str, int]]:
+        """Totale documenti e conteggio per fonte (arxiv / pubmed)."""
+        raise NotImplementedError
+
+    def get(self, index: str, doc_id: str) -> Dict:
+        """Restituisce il _source di un documento (KeyError se non esiste)."""
+        raise NotImplementedError
+
+    def find_by_paper(self, index: str, paper_id: str, source_fields: List[str] = None,
+                      size: int = 100) -> List[Dict]:
+        """Documenti (tabelle/figure) di un articolo, ordinati per posizione."""
+        raise NotImplementedError
+
+
+# ============== ELASTICSEARCH ==============
+
+class ElasticsearchBackend(SearchBackend):
+    """Backend basato su Elasticsearch."""
+
+    name = "elasticsearch"
+
+    def __init__(self, es: Elasticsearch = None):
+        self.es = es or Elasticsearch(ELASTICSEARCH_URL)
+
+    def is_available(self) -> bool:
+        try:
+            return self.es.options(request_timeout=2, max_retries=0).ping()
+        except Exception:
+            return False
+
+    def build_search_body(self, query: str, fields: List[str], size: int = 20,
+                          filters: List[Dict] = None, aggs: Dict = None) -> Dict:
+        """Costruisce la query multi_match (best_fields) con filtri e highlight."""
+        if query:
+            base_query = {
+                "multi_match": {
+                    "query": query,
+                    "fields": fields,
+                    "type": "best_fields",
+                    "fuzziness": "AUTO"
+                }
+            }
+        else:
+            # Solo filtri (es. predicati numerici sulle tabelle): tutti i documenti che li soddisfano
+            base_query = {"match_all": {}}
+
+        # I filtri vanno nel contesto filter: niente score e cache lato ES
+        if filters:
+            query_body = {
+                "bool": {
+                    "must": base_query,
+                    "filter": list(filters)
+                }
+            }
+        else:
+            query_body = base_query
+
+        body = {
+            "query": query_body,
+            "size": size,
+            "highlight": {
+                "fields": {field.split('^')[0]: {"fragment_size": HIGHLIGHT_FRAGMENT_SIZE} for field in fields},
+                "pre_tags": ["<mark>"],
+                "post_tags": ["</mark>"]
+            }
+        }
+        if aggs:
+            body["aggs"] = aggs
+        return body
+
+    def build_boolean_body(self, must_terms: List[str], should_terms: List[str],
+                           must_not_terms: List[str], size: int = 20,
+                           filters: List[Dict] = None, aggs: Dict = None) -> Dict:
+        """Costruisce la bool query per la ricerca booleana."""
+        bool_query = {"bool": {}}
+
+        if must_terms:
+            bool_query["bool"]["must"] = [
+                {"multi_match": {"query": term, "fields": ["*"]}}
+                for term in must_terms
+            ]
+
+        if should_terms:
+            bool_query["bool"]["should"] = [
+                {"multi_match": {"query": term, "fields": ["*"]}}
+                for term in should_terms
+            ]
+            bool_query["bool"]["minimum_should_match"] = 1
+
+        if must_not_terms:
+            bool_query["bool"]["must_not"] = [
+                {"multi_match": {"query": term, "fields": ["*"]}}
+                for term in must_not_terms
+            ]
+
+        if filters:
+            bool_query["bool"]["filter"] = list(filters)
+
+        body = {
+            "query": bool_query,
+            "size": size,
+            "highlight": {
+                "fields": {"*": {}},
+                "pre_tags": ["<mark>"],
+                "post_tags": ["</mark>"]
+            }
+        }
+        if aggs:
+            body["aggs"] = aggs
+        return body
+
+    def build_suggest_body(self, prefix: str, field: str, source_fields: List[str], size: int,
+                           source_filter: str = None) -> Dict:
+        """Costruisce la query bool_prefix sui sottocampi search_as_you_type."""
+        query = {
+            "multi_match": {
+                "query": prefix,
+                "type": "bool_prefix",
+                "fields": [field, f"{field}._2gram", f"{field}._3gram"]
+            }
+        }
+        if source_filter and source_filter != 'all':
+            query = {"bool": {"must": query, "filter": {"term": {"source": source_filter}}}}
+
+        return {
+            "query": query,
+            "size": size,
+            "_source": source_fields,
+            "track_total_hits": False
+        }
+
+    def search(self, index, query, fields, size=20, filters=None, aggs=None):
+        body = self.build_search_body(query, fields, size, filters, aggs)
+        return self.es.search(index=index, body=body)
+
+    def boolean_search(self, index, must_terms, should_terms, must_not_terms, size=20,
+                       filters=None, aggs=None):
+        body = self.build_boolean_body(must_terms, should_terms, must_not_terms, size, filters, aggs)
+        return self.es.search(index=index, body=body)
+
+    def suggest(self, targets, prefix, size, source_filter=None):
+        # Una sola richiesta msearch per tutti gli indici richiesti
+        searches = []
+        for index, field, source_fields in targets:
+            searches.append({"index": index})
+            searches.append(self.build_suggest_body(prefix, field, source_fields, size, source_filter))
+        return self.es.msearch(body=searches)['responses']
+
+    def index_exists(self, index):
+        return bool(self.es.indices.exists(index=index))
+
+    def count(self, index):
+        return self.es.count(index=index)['count']
+
+    def count_by_source(self, index):
+        response = self.es.search(
+            index=index,
+            body={
+                "size": 0,
+                "track_total_hits": True,
+                "aggs": {"source": {"terms": {"field": "source", "size": 10}}}
+            }
+        )
+        total = response['hits']['total']['value']
+        by_source = {b['key']: b['doc_count'] for b in response['aggregations']['source']['buckets']}
+        return total, by_source
+
+    def get(self, index, doc_id):
+        return self.es.get(index=index, id=doc_id)['_source']
+
+    def find_by_paper(self, index, paper_id, source_fields=None, size=100):
+        body = {
+            "query": {"term": {"paper_id": paper_id}},
+            "size": size,
+            # panel ordina i pannelli della stessa figura (assente per le tabelle)
+            "sort": [{"position": {"order": "asc"}},
+                     {"panel": {"order": "asc", "missing": "_first", "unmapped_type": "integer"}}]
+        }
+        if source_fields:
+            body["_source"] = source_fields
+        response = self.es.search(index=index, body=body)
+        return [hit['_source'] for hit in response['hits']['hits']]
+
+
+# ============== INDICE LOCALE ==============
+
+def _field_values(source: Dict, field: str) -> List:
+    value = source.get(field)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _matches_filter(source: Dict, clause: Dict) -> bool:
+    """
+    Valuta le clausole filter usate dall'applicazione: term, terms, range,
+    exists, match (sui token, come text_analyzer), bool e nested.
+    """
+    if "nested" in clause:
+        # Ogni oggetto nested è un documento a sé: la query deve valere per lo stesso oggetto
+        path = clause["nested"]["path"]
+        prefix = f"{path}."
+        query = _strip_path(clause["nested"]["query"], prefix)
+        return any(
+            isinstance(item, dict) and _matches_filter(item, query)
+            for item in _field_values(source, path)
+        )
+    if "bool" in clause:
+        spec = clause["bool"]
+        for key in ("must", "filter"):
+            if not all(_matches_filter(source, c) for c in _as_list(spec.get(key))):
+                return False
+        if any(_matches_filter(source, c) for c in _as_list(spec.get("must_not"))):
+            return False
+        should = _as_list(spec.get("should"))
+        if should:
+            matched = sum(1 for c in should if _matches_filter(source, c))
+            if matched < spec.get("minimum_should_match", 1):
+                return False
+        return True
+    if "exists" in clause:
+        return any(v is not None for v in _field_values(source, clause["exists"]["field"]))
+    if "match" in clause:
+        field, spec = next(iter(clause["match"].items()))
+        if not isinstance(spec, dict):
+            spec = {"query": spec}
+        wanted = set(tokenize(spec["query"]))
+        present = set()
+        for v in _field_values(source, field):
+            present.update(tokenize(str(v)))
+        if spec.get("operator", "or") == "and":
+            return wanted <= present
+        return bool(wanted & present)
+    if "term" in clause:
+        field, value = next(iter(clause["term"].items()))
+        return any(str(v) == str(value) for v in _field_values(source, field))
+    if "terms" in clause:
+        field, values = next(iter(clause["terms"].items()))
+        wanted = {str(v) for v in values}
+        return any(str(v) in wanted for v in _field_values(source, field))
+    if "range" in clause:
+        field, bounds = next(iter(clause["range"].items()))
+        checks = {
+            "gt": lambda v, b: v > b, "gte": lambda v, b: v >= b,
+            "lt": lambda v, b: v < b, "lte": lambda v, b: v <= b
+        }
+        for v in _field_values(source, field):
+            try:
+                if all(checks[op](float(v), float(b)) for op, b in bounds.items() if op in checks):
+                    return True
+            except (TypeError, ValueError):
+                continue
+        return False
+    return True
+
+
+def _as_list(value) -> List:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _strip_path(clause, prefix: str):
+    """Toglie il prefisso del path nested dai nomi dei campi ("measurements.value" -> "value")."""
+    if isinstance(clause, list):
+        return [_strip_path(c, prefix) for c in clause]
+    if not isinstance(clause, dict):
+        return clause
+    stripped = {}
+    for key, value in clause.items():
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+        if key == "field" and isinstance(value, str) and value.startswith(prefix):
+            value = value[len(prefix):]
+        stripped[key] = _strip_path(value, prefix)
+    return stripped
+
+
+def _to_arrays(scores: Dict[int, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Dizionario doc_num -> score come coppia di array NumPy."""
+    return (
+        np.fromiter(scores.keys(), dtype=np.int64, count=len(scores)),
+        np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+    )
+
+
+def _highlight(text: str, terms: set) -> Optional[str]:
+    """Frammento di testo attorno al primo termine trovato, con <mark>."""
+    if not text or not terms:
+        return None
+    if isinstance(text, list):
+        text = ' '.join(str(t) for t in text)
+
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(t) for t in sorted(terms)) + r')\b', re.IGNORECASE)
+    match = pattern.search(text)
+    if not match:
+        return None
+
+    start = max(0, match.start() - HIGHLIGHT_FRAGMENT_SIZE // 4)
+    fragment = text[start:start + HIGHLIGHT_FRAGMENT_SIZE]
+    return pattern.sub(r'<mark>\1</mark>', fragment)
+
+
+class LocalBackend(SearchBackend):
+    """Backend basato sull'indice invertito locale (BM25)."""
+
+    name = "local"
+
+    def __init__(self, indices: Dict[str, Bm25Scorer]):
+        self.indices = indices
+
+    @classmethod
+    def open(cls) -> 'LocalBackend':
+        """Apre (o costruisce) l'indice locale dai dati della pipeline."""
+        return cls(open_local_indices())
+
+    def is_available(self) -> bool:
+        return any(len(index) for index in self.indices.values())
+
+    def _index(self, index: str) -> Bm25Scorer:
+        if index not in self.indices:
+            raise KeyError(f"Indice locale non trovato: {index}")
+        return self.indices[index]
+
+    def _filtered(self, local: Bm25Scorer, docs: np.ndarray, scores: np.ndarray,
+                  filters: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        if not filters or not len(docs):
+            return docs, scores
+        keep = np.fromiter(
+            (all(_matches_filter(local.sources[d], clause) for clause in filters) for d in docs.tolist()),
+            dtype=bool, count=len(docs)
+        )
+        return docs[keep], scores[keep]
+
+    def _aggregate(self, local: Bm25Scorer, doc_nums: List[int], aggs: Dict) -> Dict:
+        """Calcola le aggregazioni terms/filter sui documenti trovati."""
+        results = {}
+        for name, agg in (aggs or {}).items():
+            if "terms" in agg:
+                spec = agg["terms"]
+                counts = Counter()
+                for doc_num in doc_nums:
+                    counts.update(_field_values(local.sources[doc_num], spec["field"]))
+                if spec.get("order", {}).get("_key") == "desc":
+                    items = sorted(counts.items(), key=lambda kv: kv[0], reverse=True)
+                else:
+                    items = counts.most_common()
+                results[name] = {
+                    "buckets": [{"key": k, "doc_count": c} for k, c in items[:spec.get("size", 10)]]
+                }
+            elif "filter" in agg:
+                results[name] = {
+                    "doc_count": sum(1 for d in doc_nums if _matches_filter(local.sources[d], agg["filter"]))
+                }
+        return results
+
+    def _response(self, local: Bm25Scorer, docs: np.ndarray, scores: np.ndarray, size: int,
+                  aggs: Dict, highlight_terms: set, fields: Dict[str, float]) -> Dict:
+        top_docs, top_scores = top_k(docs, scores, size)
+
+        hits = []
+        for doc_num, score in zip(top_docs.tolist(), top_scores.tolist()):
+            source = local.sources[doc_num]
+            highlight = {}
+            for field in fields:
+                fragment = _highlight(source.get(field, ''), highlight_terms)
+                if fragment:
+                    highlight[field] = [fragment]
+            hits.append({
+                "_index": local.name,
+                "_id": local.doc_ids[doc_num],
+                "_score": score,
+                "_source": source,
+                "highlight": highlight
+            })
+
+        response = {"hits": {"total": {"value": len(docs)}, "hits": hits}}
+        if aggs:
+            response["aggregations"] = self._aggregate(local, docs.tolist(), aggs)
+        return response
+
+    def search(self, index, query, fields, size=20, filters=None, aggs=None):
+        local = self._index(index)
+        field_boosts = parse_field_boosts(fields)
+        terms = tokenize(query)
+
+        if query:
+            # Come multi_match: una query di sole stopword/punteggiatura non trova nulla
+            docs, scores = local.score_arrays(terms, field_boosts)
+        else:
+            # match_all (solo predicati numerici): score costante, decidono i filtri
+            docs = np.arange(len(local), dtype=np.int64)
+            scores = np.ones(len(local), dtype=np.float64)
+        docs, scores = self._filtered(local, docs, scores, filters)
+        return self._response(local, docs, scores, size, aggs, set(terms), field_boosts)
+
+    def boolean_search(self, index, must_terms, should_terms, must_not_terms, size=20,
+                       filters=None, aggs=None):
+        local = self._index(index)
+        fields = local.field_boosts
+
+        must = [local.score(tokenize(t), fields) for t in must_terms or []]
+        should = [local.score(tokenize(t), fields) for t in should_terms or []]
+        excluded = set()
+        for t in must_not_terms or []:
+            excluded.update(local.score(tokenize(t), fields))
+
+        if must:
+            candidates = set.intersection(*(set(s) for s in must))
+        else:
+            candidates = set().union(*(set(s) for s in should)) if should else set()
+        if must and should:
+            candidates &= set().union(*(set(s) for s in should))
+        candidates -= excluded
+
+        scores = {
+            doc_num: sum(s.get(doc_num, 0.0) for s in must + should)
+            for doc_num in candidates
+        }
+        docs, scores = self._filtered(local, *_to_arrays(scores), filters)
+
+        highlight_terms = set()
+        for t in (must_terms or []) + (should_terms or []):
+            highlight_terms.update(tokenize(t))
+        return self._response(local, docs, scores, size, aggs, highlight_terms, fields)
+
+    def suggest(self, targets, prefix, size, source_filter=None):
+        responses = []
+        tokens = tokenize(prefix)
+        for index, field, source_fields in targets:
+            local = self.indices.get(index)
+            base_field = field.split('.')[0]
+            if local is None or not tokens:
+                responses.append({"hits": {"hits": []}})
+                continue
+
+            # L'ultimo token è un prefisso: espandilo sul vocabolario ordinato del campo
+            vocabulary = local.vocabulary(base_field)
+            last = tokens[-1]
+            start = bisect.bisect_left(vocabulary, last)
+            expansions = []
+            for term in vocabulary[start:start + 50]:
+                if not term.startswith(last):
+                    break
+                expansions.append(term)
+
+            # Ogni token completo deve comparire: intersezione sui doc_num ordinati
+            boosts = {base_field: 1.0}
+            docs, scores = local.score_arrays(expansions, boosts)
+            for term in tokens[:-1]:
+                term_docs, term_scores = local.score_arrays([term], boosts)
+                docs, mine, theirs = np.intersect1d(docs, term_docs, assume_unique=True, return_indices=True)
+                scores = scores[mine] + term_scores[theirs]
+
+            if source_filter and source_filter != 'all':
+                docs, scores = self._filtered(local, docs, scores, [{"term": {"source": source_filter}}])
+
+            top_docs, top_scores = top_k(docs, scores, size)
+            responses.append({"hits": {"hits": [
+                {
+                    "_id": local.doc_ids[d],
+                    "_score": s,
+                    "_source": {f: local.sources[d].get(f) for f in source_fields}
+                }
+                for d, s in zip(top_docs.tolist(), top_scores.tolist())
+            ]}})
+        return responses
+
+    def index_exists(self, index):
+        return index in self.indices
+
+    def count(self, index):
+        return len(self._index(index))
+
+    def count_by_source(self, index):
+        local = self._index(index)
+        return len(local), local.keyword_counts('source')
+
+    def get(self, index, doc_id):
+        source = self._index(index).get_document(doc_id)
+        if source is None:
+            raise KeyError(f"Documento non trovato: {doc_id}")
+        return source
+
+    def find_by_paper(self, index, paper_id, source_fields=None, size=100):
+        local = self._index(index)
+        docs = [local.sources[doc_num] for doc_num in local.docs_with('paper_id', paper_id)]
+        # Stesso ordine di Elasticsearch: posizione, poi pannello (assente prima)
+        docs.sort(key=lambda s: (s.get('position', 0), s.get('panel') or 0))
+        if source_fields:
+            docs = [{f: s.get(f) for f in source_fields if f in s} for s in docs]
+        return docs[:size]
+
+
+def get_search_backend(mode: str = SEARCH_BACKEND) -> SearchBackend:
+    """
+    Restituisce il backend di ricerca configurato.
+
+    Args:
+        mode: "auto" (Elasticsearch se raggiungibile, altrimenti locale),
+              "elasticsearch" oppure "local"
+    """
+    if mode in ("auto", "elasticsearch"):
+        backend = ElasticsearchBackend()
+        if mode == "elasticsearch" or backend.is_available():
+            return backend
+        print(f"[WARN] Elasticsearch non raggiungibile ({ELASTICSEARCH_URL}), uso l'indice locale")
+
+    return LocalBackend.open()
@@ -0,0 +1,397 @@
+"""
+Indice invertito locale con ranking BM25 (fallback senza Elasticsearch).
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+L'indice viene costruito dai file prodotti dalla pipeline:
+- articles.db (archivio SQLite degli articoli)
+- extracted_tables.json (tabelle)
+- extracted_figures.json (figure)
+
+I documenti sono gli stessi `_source` inviati a Elasticsearch dagli indexer,
+così web e CLI possono mostrare i risultati senza differenze.
+Le posting list sono array compatti (doc id + term frequency) per campo;
+lo scoring BM25 è vettorizzato su NumPy e la selezione dei top-k usa argpartition.
+Su disco l'indice è salvato nel formato binario di search/mmap_index.py.
+"""
+
+import os
+import sys
+import json
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    DATA_DIR, LOCAL_INDEX_DIR, STOPWORDS,
+    INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES,
+    PAPER_FIELDS, TABLE_FIELDS, FIGURE_FIELDS
+)
+from storage.article_store import open_article_store, store_path
+
+# File sorgente della pipeline (vedi main.py)
+TABLES_FILE = "extracted_tables.json"
+FIGURES_FILE = "extracted_figures.json"
+
+# Parametri BM25 (default di Elasticsearch)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Campi keyword con posting list dedicate (lookup per articolo e conteggi per fonte)
+KEYWORD_FIELDS = ("source", "paper_id")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizza come il text_analyzer di Elasticsearch (lowercase + stopwords)."""
+    if not text:
+        return []
+    if isinstance(text, list):
+        text = ' '.join(str(t) for t in text)
+    return [t for t in TOKEN_PATTERN.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def parse_field_boosts(fields: List[str]) -> Dict[str, float]:
+    """Converte ["title^3", "abstract"] in {"title": 3.0, "abstract": 1.0}."""
+    boosts = {}
+    for field in fields:
+        name, _, boost = field.partition('^')
+        boosts[name] = float(boost) if boost else 1.0
+    return boosts
+
+
+_EMPTY_DOCS = np.empty(0, dtype=np.int64)
+_EMPTY_SCORES = np.empty(0, dtype=np.float64)
+
+
+def reduce_by_doc(doc_parts: List[np.ndarray], score_parts: List[np.ndarray],
+                  ufunc: np.ufunc) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unisce più posting list (doc_num ordinati + score) combinando gli score
+    dello stesso documento con `ufunc` (np.add tra termini, np.maximum tra campi).
+    """
+    if not doc_parts:
+        return _EMPTY_DOCS, _EMPTY_SCORES
+    if len(doc_parts) == 1:
+        return doc_parts[0].astype(np.int64, copy=False), score_parts[0]
+
+    docs = np.concatenate(doc_parts).astype(np.int64, copy=False)
+    scores = np.concatenate(score_parts)
+    order = np.argsort(docs, kind='stable')
+    docs, scores = docs[order], scores[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], docs[1:] != docs[:-1])))
+    return docs[starts], ufunc.reduceat(scores, starts)
+
+
+def top_k(docs: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    I k documenti con score più alto, in ordine decrescente
+    (a parità di score, doc_num crescente).
+
+    argpartition seleziona i candidati in tempo lineare: si ordinano solo i k scelti.
+    """
+    if k <= 0 or not len(docs):
+        return _EMPTY_DOCS, _EMPTY_SCORES
+    if k < len(docs):
+        selected = np.argpartition(-scores, k - 1)[:k]
+    else:
+        selected = np.arange(len(docs))
+    selected = selected[np.lexsort((docs[selected], -scores[selected]))]
+    return docs[selected], scores[selected]
+
+
+class Bm25Scorer:
+    """
+    Scoring BM25 comune all'indice in memoria (LocalIndex) e a quello
+    su disco (MmapIndex). Le sottoclassi forniscono posting list e norme.
+    """
+
+    name: str
+    field_boosts: Dict[str, float]
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def postings_for(self, field: str, term: str) -> Optional[Tuple[Sequence[int], Sequence[int]]]:
+        """(doc_num ordinati, term frequency) del termine nel campo, o None."""
+        raise NotImplementedError
+
+    def field_lengths(self, field: str) -> Sequence[int]:
+        """Lunghezza in token del campo per ogni documento (norme BM25)."""
+        raise NotImplementedError
+
+    def average_length(self, field: str) -> float:
+        raise NotImplementedError
+
+    def _field_scores(self, field: str, terms: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Score BM25 dei documenti su un singolo campo, vettorizzato per termine."""
+        n_docs = len(self)
+        if field not in self.field_boosts or not n_docs:
+            return _EMPTY_DOCS, _EMPTY_SCORES
+
+        lengths = np.asarray(self.field_lengths(field))
+        avg_length = self.average_length(field) or 1.0
+
+        doc_parts, score_parts = [], []
+        for term in terms:
+            entry = self.postings_for(field, term)
+            if entry is None:
+                continue
+            docs = np.asarray(entry[0])
+            tfs = np.asarray(entry[1], dtype=np.float64)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / avg_length)
+            doc_parts.append(docs)
+            score_parts.append(idf * tfs * (BM25_K1 + 1) / (tfs + norm))
+
+        return reduce_by_doc(doc_parts, score_parts, np.add)
+
+    def score_arrays(self, terms: List[str],
+                     fields: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score BM25 multi-campo stile best_fields: per ogni documento
+        vale il campo migliore (score del campo moltiplicato per il boost).
+        Restituisce (doc_num ordinati, score) come array NumPy.
+        """
+        fields = fields or self.field_boosts
+        unique_terms = sorted(set(terms))
+
+        doc_parts, score_parts = [], []
+        for field, boost in fields.items():
+            docs, scores = self._field_scores(field, unique_terms)
+            if len(docs):
+                doc_parts.append(docs)
+                score_parts.append(scores * boost)
+
+        return reduce_by_doc(doc_parts, score_parts, np.maximum)
+
+    def score(self, terms: List[str], fields: Optional[Dict[str, float]] = None) -> Dict[int, float]:
+        """Come score_arrays, ma come dizionario doc_num -> score."""
+        docs, scores = self.score_arrays(terms, fields)
+        return dict(zip(docs.tolist(), scores.tolist()))
+
+
+class LocalIndex(Bm25Scorer):
+    """
+    Indice invertito in memoria per un singolo "indice" (papers, tables, figures).
+    Usato per la costruzione; la lettura avviene tramite MmapIndex.
+
+    Per ogni campo mantiene:
+    - postings[field][term] = (array doc_num, array tf)
+    - doc_lengths[field] = array con la lunghezza (in token) di ogni documento
+    """
+
+    def __init__(self, name: str, fields: List[str]):
+        self.name = name
+        self.field_boosts = parse_field_boosts(fields)
+        self.doc_ids: List[str] = []
+        self.sources: List[Dict] = []
+        self.postings: Dict[str, Dict[str, Tuple[array, array]]] = {f: {} for f in self.field_boosts}
+        self.doc_lengths: Dict[str, array] = {f: array('I') for f in self.field_boosts}
+        self.total_lengths: Dict[str, int] = {f: 0 for f in self.field_boosts}
+        self._id_to_num: Dict[str, int] = {}
+        self._vocabulary: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add_document(self, doc_id: str, source: Dict):
+        """Aggiunge un documento all'indice (gli id duplicati vengono ignorati)."""
+        if doc_id in self._id_to_num:
+            return
+
+        doc_num = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.sources.append(source)
+        self._id_to_num[doc_id] = doc_num
+
+        for field in self.field_boosts:
+            tokens = tokenize(source.get(field, ''))
+            self.doc_lengths[field].append(len(tokens))
+            self.total_lengths[field] += len(tokens)
+
+            field_postings = self.postings[field]
+            for term, tf in Counter(tokens).items():
+                entry = field_postings.get(term)
+                if entry is None:
+                    entry = field_postings[term] = (array('I'), array('I'))
+                entry[0].append(doc_num)
+                entry[1].append(tf)
+
+        self._vocabulary.clear()
+
+    def postings_for(self, field, term):
+        return self.postings.get(field, {}).get(term)
+
+    def field_lengths(self, field):
+        return self.doc_lengths[field]
+
+    def average_length(self, field):
+        return self.total_lengths[field] / len(self) if len(self) else 0.0
+
+    def get_document(self, doc_id: str) -> Optional[Dict]:
+        """Restituisce il _source di un documento o None."""
+        doc_num = self._id_to_num.get(doc_id)
+        return self.sources[doc_num] if doc_num is not None else None
+
+    def vocabulary(self, field: str) -> List[str]:
+        """Termini del campo in ordine lessicografico (per i prefissi)."""
+        if field not in self._vocabulary:
+            self._vocabulary[field] = sorted(self.postings.get(field, {}))
+        return self._vocabulary[field]
+
+    def keyword_postings(self, field: str) -> Dict[str, List[int]]:
+        """Valore keyword -> documenti che lo contengono."""
+        postings: Dict[str, List[int]] = {}
+        for doc_num, source in enumerate(self.sources):
+            value = source.get(field)
+            if value is not None:
+                postings.setdefault(str(value), []).append(doc_num)
+        return postings
+
+    def docs_with(self, field: str, value: str) -> List[int]:
+        return self.keyword_postings(field).get(str(value), [])
+
+    def keyword_counts(self, field: str) -> Dict[str, int]:
+        return {value: len(docs) for value, docs in self.keyword_postings(field).items()}
+
+
+# ============== COSTRUZIONE DAI FILE DELLA PIPELINE ==============
+
+def _load_json(path) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def source_files(data_dir=DATA_DIR) -> List[str]:
+    """File da cui viene costruito l'indice locale (archivio articoli, tabelle, figure)."""
+    db_path = store_path(data_dir)
+    return [
+        db_path,
+        f"{db_path}-wal",
+        os.path.join(str(data_dir), TABLES_FILE),
+        os.path.join(str(data_dir), FIGURES_FILE)
+    ]
+
+
+def build_local_indices(data_dir=DATA_DIR) -> Dict[str, LocalIndex]:
+    """
+    Costruisce gli indici locali (papers, tables, figures) dai file JSON,
+    preparando i documenti con gli stessi indexer usati per Elasticsearch.
+    """
+    from indexers.paper_indexer import PaperIndexer
+    from indexers.table_indexer import TableIndexer
+    from indexers.figure_indexer import FigureIndexer
+
+    tables_path = os.path.join(str(data_dir), TABLES_FILE)
+    figures_path = os.path.join(str(data_dir), FIGURES_FILE)
+    tables = _load_json(tables_path)
+    figures = _load_json(figures_path)
+
+    papers_index = LocalIndex(INDEX_PAPERS, PAPER_FIELDS)
+    tables_index = LocalIndex(INDEX_TABLES, TABLE_FIELDS)
+    figures_index = LocalIndex(INDEX_FIGURES, FIGURE_FIELDS)
+
+    with open_article_store(data_dir) as store:
+        # Testi completi letti dal blob store della stessa directory dati
+        paper_indexer = PaperIndexer(connect=False, text_store=store.texts)
+        paper_indexer.set_asset_counts(tables, figures)
+        for article in store.iter_articles('arxiv'):
+            if article.get('arxiv_id'):
+                doc = paper_indexer.prepare_arxiv_document(article)
+                papers_index.add_document(doc['_id'], doc['_source'])
+        for article in store.iter_articles('pubmed'):
+            if article.get('pmc_id'):
+                doc = paper_indexer.prepare_pubmed_document(article)
+                papers_index.add_document(doc['_id'], doc['_source'])
+
+    table_indexer = TableIndexer(connect=False)
+    for table in tables:
+        doc = table_indexer.prepare_document(table)
+        tables_index.add_document(doc['_id'], doc['_source'])
+
+    figure_indexer = FigureIndexer(connect=False)
+    for figure in figures:
+        doc = figure_indexer.prepare_document(figure)
+        figures_index.add_document(doc['_id'], doc['_source'])
+
+    return {
+        INDEX_PAPERS: papers_index,
+        INDEX_TABLES: tables_index,
+        INDEX_FIGURES: figures_index
+    }
+
+
+def index_path(name: str, index_dir=LOCAL_INDEX_DIR) -> str:
+    return os.path.join(str(index_dir), f"{name}.bin")
+
+
+def save_local_indices(indices: Dict[str, LocalIndex], index_dir=LOCAL_INDEX_DIR):
+    """Scrive gli indici nel formato binario memory-mapped."""
+    from search.mmap_index import write_mmap_index
+
+    os.makedirs(str(index_dir), exist_ok=True)
+    for name, index in indices.items():
+        write_mmap_index(index, index_path(name, index_dir))
+
+
+def write_local_indices(data_dir=DATA_DIR, index_dir=LOCAL_INDEX_DIR) -> Dict[str, int]:
+    """Costruisce e salva l'indice locale; restituisce i documenti per indice."""
+    indices = build_local_indices(data_dir)
+    save_local_indices(indices, index_dir)
+    return {name: len(index) for name, index in indices.items()}
+
+
+def is_stale(index_dir=LOCAL_INDEX_DIR, data_dir=DATA_DIR) -> bool:
+    """True se l'indice salvato manca o è più vecchio dei file sorgente."""
+    paths = [index_path(name, index_dir) for name in (INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES)]
+    if not all(os.path.exists(p) for p in paths):
+        return True
+    built_at = min(os.path.getmtime(p) for p in paths)
+    return any(
+        os.path.exists(src) and os.path.getmtime(src) > built_at
+        for src in source_files(data_dir)
+    )
+
+
+def open_local_indices(index_dir=LOCAL_INDEX_DIR, data_dir=DATA_DIR) -> Dict:
+    """
+    Apre gli indici su disco tramite mmap (avvio immediato, page cache
+    condivisa tra processi), ricostruendoli se mancano o non aggiornati.
+    """
+    from search.mmap_index import MmapIndex
+
+    if is_stale(index_dir, data_dir):
+        print("[INFO] Costruzione indice locale dai file JSON...")
+        write_local_indices(data_dir, index_dir)
+
+    return {
+        name: MmapIndex(index_path(name, index_dir))
+        for name in (INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES)
+    }
+
+
+def main():
+    """Ricostruisce l'indice locale dai file della pipeline."""
+    print("=" * 60)
+    print("Local Index Builder - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+
+    counts = write_local_indices()
+
+    for name, count in counts.items():
+        print(f"   {name}: {count} documenti")
+    print(f"[OK] Indice locale salvato in: {LOCAL_INDEX_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Formato binario read-optimized dell'indice locale, aperto tramite mmap.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Struttura del file (<indice>.bin):
+
+    MAGIC | sezioni dati (allineate a 8 byte) | footer JSON | offset footer | lunghezza footer | MAGIC
+
+Per ogni campo testuale:
+- dizionario dei termini ordinato: blob UTF-8 + tabella degli offset
+- postings_offsets: inizio delle posting list di ogni termine
+- doc_deltas: doc id delta-encoded all'interno di ogni posting list
+- tfs: term frequency
+- lengths: norme per campo (lunghezza in token di ogni documento)
+
+Per i campi keyword (source, paper_id) lo stesso dizionario con le sole posting list.
+I documenti (_id e _source JSON) sono in blob con tabella degli offset, più una
+permutazione degli id ordinati per la ricerca binaria.
+
+L'apertura legge solo il footer: tutto il resto viene paginato dal sistema
+operativo su richiesta ed è condiviso tra i processi (es. worker Flask).
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search.local_index import Bm25Scorer, LocalIndex, KEYWORD_FIELDS
+
+MAGIC = b'HW5LIDX1'
+FORMAT_VERSION = 1
+TRAILER = struct.Struct('<QQ')  # offset e lunghezza del footer JSON
+
+
+def _compact_array(values: Sequence[int]) -> array:
+    """Array con il tipo intero più piccolo che contiene tutti i valori."""
+    maximum = max(values, default=0)
+    for typecode in ('B', 'H', 'I', 'Q'):
+        if maximum < 1 << (8 * array(typecode).itemsize):
+            return array(typecode, values)
+    raise ValueError("Valore troppo grande per l'indice")
+
+
+class _SectionWriter:
+    """Accoda sezioni binarie al file, allineate a 8 byte."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = 0
+
+    def write(self, data: bytes) -> int:
+        padding = (-self.offset) % 8
+        if padding:
+            self.f.write(b'\0' * padding)
+            self.offset += padding
+        start = self.offset
+        self.f.write(data)
+        self.offset += len(data)
+        return start
+
+    def write_array(self, values: array) -> Dict:
+        start = self.write(values.tobytes())
+        return {"offset": start, "count": len(values), "typecode": values.typecode}
+
+    def write_blob(self, parts: List[bytes]) -> Dict:
+        """Concatena le parti e restituisce blob + tabella degli offset."""
+        offsets = [0]
+        for part in parts:
+            offsets.append(offsets[-1] + len(part))
+        blob_offset = self.write(b''.join(parts))
+        return {
+            "blob": {"offset": blob_offset, "length": offsets[-1]},
+            "offsets": self.write_array(_compact_array(offsets))
+        }
+
+
+def _write_term_dictionary(writer: _SectionWriter, postings: Dict[str, Sequence[int]],
+                           tfs: Optional[Dict[str, Sequence[int]]] = None) -> Dict:
+    """Scrive dizionario ordinato e posting list delta-encoded."""
+    terms = sorted(postings)
+    deltas: List[int] = []
+    frequencies: List[int] = []
+    posting_offsets = [0]
+
+    for term in terms:
+        previous = 0
+        for doc_num in postings[term]:
+            deltas.append(doc_num - previous)
+            previous = doc_num
+        if tfs is not None:
+            frequencies.extend(tfs[term])
+        posting_offsets.append(len(deltas))
+
+    section = {
+        "n_terms": len(terms),
+        "terms": writer.write_blob([t.encode('utf-8') for t in terms]),
+        "postings_offsets": writer.write_array(_compact_array(posting_offsets)),
+        "doc_deltas": writer.write_array(_compact_array(deltas))
+    }
+    if tfs is not None:
+        section["tfs"] = writer.write_array(_compact_array(frequencies))
+    return section
+
+
+def write_mmap_index(index: LocalIndex, path: str):
+    """Serializza un LocalIndex nel formato binario (scrittura atomica)."""
+    # Nome temporaneo per processo/thread: scritture concorrenti non si sovrascrivono
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        writer = _SectionWriter(f)
+        writer.offset = len(MAGIC)
+
+        footer = {
+            "version": FORMAT_VERSION,
+            "name": index.name,
+            "n_docs": len(index),
+            "field_boosts": index.field_boosts,
+            "fields": {},
+            "keywords": {}
+        }
+
+        for field in index.field_boosts:
+            field_postings = index.postings[field]
+            section = _write_term_dictionary(
+                writer,
+                {term: entry[0] for term, entry in field_postings.items()},
+                {term: entry[1] for term, entry in field_postings.items()}
+            )
+            section["lengths"] = writer.write_array(_compact_array(index.doc_lengths[field]))
+            section["total_length"] = index.total_lengths[field]
+            footer["fields"][field] = section
+
+        for field in KEYWORD_FIELDS:
+            footer["keywords"][field] = _write_term_dictionary(writer, index.keyword_postings(field))
+
+        footer["doc_ids"] = writer.write_blob([doc_id.encode('utf-8') for doc_id in index.doc_ids])
+        footer["sources"] = writer.write_blob([
+            json.dumps(source, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            for source in index.sources
+        ])
+        id_order = sorted(range(len(index)), key=lambda i: index.doc_ids[i].encode('utf-8'))
+        footer["id_order"] = writer.write_array(_compact_array(id_order))
+
+        footer_bytes = json.dumps(footer).encode('utf-8')
+        footer_offset = writer.write(footer_bytes)
+        f.write(TRAILER.pack(footer_offset, len(footer_bytes)))
+        f.write(MAGIC)
+
+    os.replace(tmp_path, path)
+
+
+class _BlobSequence(Sequence):
+    """Sequenza di elementi (bytes) letti da blob + tabella degli offset."""
+
+    def __init__(self, view: memoryview, offsets: Sequence[int], blob_start: int):
+        self._view = view
+        self._offsets = offsets
+        self._blob_start = blob_start
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._view[self._blob_start + self._offsets[i]:self._blob_start + self._offsets[i + 1]].tobytes()
+
+    def _decode(self, raw: bytes):
+        return raw.decode('utf-8')
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._decode(self.raw(j)) for j in range(*i.indices(len(self)))]
+        return self._decode(self.raw(i))
+
+
+class _SourceSequence(_BlobSequence):
+    """I _source dei documenti, decodificati dal JSON solo quando richiesti."""
+
+    def _decode(self, raw: bytes):
+        return json.loads(raw)
+
+
+class _TermDictionary:
+    """Dizionario ordinato dei termini con ricerca binaria sui bytes."""
+
+    def __init__(self, index: 'MmapIndex', section: Dict):
+        self.terms = index._blob(section["terms"])
+        self.postings_offsets = index._array(section["postings_offsets"])
+        self.doc_deltas = index._array(section["doc_deltas"])
+        self.tfs = index._array(section["tfs"]) if "tfs" in section else None
+
+    def find(self, term: str) -> Optional[int]:
+        key = term.encode('utf-8')
+        lo, hi = 0, len(self.terms)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.terms.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.terms) and self.terms.raw(lo) == key:
+            return lo
+        return None
+
+    def docs(self, term_num: int) -> np.ndarray:
+        """Doc id della posting list (somma cumulativa dei delta)."""
+        start, end = self.postings_offsets[term_num], self.postings_offsets[term_num + 1]
+        return np.cumsum(self.doc_deltas[start:end], dtype=np.int64)
+
+    def frequencies(self, term_num: int) -> Sequence[int]:
+        start, end = self.postings_offsets[term_num], self.postings_offsets[term_num + 1]
+        return self.tfs[start:end]
+
+
+class MmapIndex(Bm25Scorer):
+    """Indice locale in sola lettura, aperto tramite mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        if self._mmap[:len(MAGIC)] != MAGIC or self._mmap[-len(MAGIC):] != MAGIC:
+            self.close()
+            raise ValueError(f"File indice non valido: {path}")
+
+        trailer_start = len(self._mmap) - len(MAGIC) - TRAILER.size
+        footer_offset, footer_length = TRAILER.unpack_from(self._mmap, trailer_start)
+        footer = json.loads(self._mmap[footer_offset:footer_offset + footer_length])
+        if footer.get("version") != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Versione indice non supportata: {footer.get('version')}")
+
+        self.name = footer["name"]
+        self.field_boosts = footer["field_boosts"]
+        self._n_docs = footer["n_docs"]
+        self._fields = {f: _TermDictionary(self, s) for f, s in footer["fields"].items()}
+        self._lengths = {f: self._array(s["lengths"]) for f, s in footer["fields"].items()}
+        self._avg_lengths = {
+            f: (s["total_length"] / self._n_docs if self._n_docs else 0.0)
+            for f, s in footer["fields"].items()
+        }
+        self._keywords = {f: _TermDictionary(self, s) for f, s in footer["keywords"].items()}
+
+        self.doc_ids = self._blob(footer["doc_ids"])
+        self.sources = self._blob(footer["sources"], _SourceSequence)
+        self._id_order = self._array(footer["id_order"])
+
+    def _array(self, section: Dict) -> memoryview:
+        itemsize = array(section["typecode"]).itemsize
+        start = section["offset"]
+        return self._view[start:start + section["count"] * itemsize].cast(section["typecode"])
+
+    def _blob(self, section: Dict, cls=_BlobSequence) -> _BlobSequence:
+        return cls(self._view, self._array(section["offsets"]), section["blob"]["offset"])
+
+    def close(self):
+        """Rilascia mmap e file (le viste aperte vanno rilasciate prima)."""
+        for attr in ('_view', '_mmap', '_file'):
+            obj = getattr(self, attr, None)
+            if obj is not None:
+                try:
+                    if attr == '_view':
+                        obj.release()
+                    else:
+                        obj.close()
+                except (BufferError, ValueError):
+                    pass
+
+    def __len__(self) -> int:
+        return self._n_docs
+
+    def postings_for(self, field, term):
+        dictionary = self._fields.get(field)
+        if dictionary is None:
+            return None
+        term_num = dictionary.find(term)
+        if term_num is None:
+            return None
+        return dictionary.docs(term_num), dictionary.frequencies(term_num)
+
+    def field_lengths(self, field):
+        return self._lengths[field]
+
+    def average_length(self, field):
+        return self._avg_lengths.get(field, 0.0)
+
+    def get_document(self, doc_id: str) -> Optional[Dict]:
+        """Ricerca binaria dell'id sulla permutazione ordinata."""
+        key = doc_id.encode('utf-8')
+        lo, hi = 0, len(self._id_order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.doc_ids.raw(self._id_order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._id_order) and self.doc_ids.raw(self._id_order[lo]) == key:
+            return self.sources[self._id_order[lo]]
+        return None
+
+    def vocabulary(self, field: str) -> Sequence[str]:
+        """Termini del campo in ordine lessicografico (sequenza lazy, per bisect)."""
+        dictionary = self._fields.get(field)
+        return dictionary.terms if dictionary is not None else []
+
+    def docs_with(self, field: str, value: str) -> List[int]:
+        dictionary = self._keywords.get(field)
+        if dictionary is None:
+            return []
+        term_num = dictionary.find(str(value))
+        return dictionary.docs(term_num).tolist() if term_num is not None else []
+
+    def keyword_counts(self, field: str) -> Dict[str, int]:
+        dictionary = self._keywords.get(field)
+        if dictionary is None:
+            return {}
+        offsets = dictionary.postings_offsets
+        return {
+            dictionary.terms[i]: offsets[i + 1] - offsets[i]
+            for i in range(len(dictionary.terms))
+        }
@@ -0,0 +1,128 @@
+"""
+Predicati numerici nelle query sulle tabelle.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Una query sulle tabelle può contenere condizioni sui valori delle celle:
+
+    latency < 10 ms
+    "p99 latency" <= 20ms hash join
+    speedup > 2x
+    accuracy >= 90%
+
+Ogni predicato è <intestazione> <operatore> <numero>[unità]; l'intestazione è
+una parola o una frase tra virgolette. Il resto della query resta una
+ricerca full-text. Ogni predicato diventa una clausola filter nested su
+`measurements` (vedi indexers/table_indexer.py): match sull'intestazione
+della colonna e range sul valore, servita dall'indice BKD di Elasticsearch
+senza scorrere il testo delle tabelle. Valore e unità della query sono
+normalizzati come quelli indicizzati (10 ms -> 0.01 s).
+"""
+
+import os
+import re
+import sys
+import math
+from typing import Dict, List, Tuple
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extractors.table_model import UNIT_SCALES, normalize_unit
+
+MEASUREMENTS_PATH = "measurements"
+
+# Operatore della query -> parametro della range query
+OPERATORS = {
+    '<': 'lt', '<=': 'lte', '≤': 'lte',
+    '>': 'gt', '>=': 'gte', '≥': 'gte',
+    '=': 'eq', '==': 'eq'
+}
+
+# Unità riconosciute nella query (le altre parole restano testo); le unità
+# composte con "/" (MB/s, ops/s) sono sempre unità, come nelle celle
+QUERY_UNITS = set(UNIT_SCALES) | {'%'}
+
+# Unità senza scala: "speedup > 2x" vale anche per colonne senza unità ("2.1")
+DIMENSIONLESS_UNITS = ('x', '%')
+
+_PREDICATE = re.compile(
+    r'(?:"(?P<phrase>[^"]+)"|(?P<word>[^\s"<>=≤≥]+))\s*'
+    r'(?P<op><=|>=|==|<|>|=|≤|≥)\s*'
+    r'(?P<number>[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)'
+    r'(?:\s*(?P<unit>%|×|[A-Za-zµμ]+(?:/[A-Za-zµμ]+)*))?(?![\w./])'
+)
+
+
+def parse_table_query(query: str) -> Tuple[str, List[Dict]]:
+    """
+    Separa i predicati numerici dal testo della query.
+
+    Returns:
+        (testo residuo, predicati [{header, op, value, unit}])
+    """
+    predicates = []
+    text_parts = []
+    position = 0
+
+    for match in _PREDICATE.finditer(query):
+        unit = match.group('unit')
+        end = match.end()
+        if unit and unit not in QUERY_UNITS and '/' not in unit:
+            # Parola dopo il numero che non è un'unità: resta nel testo
+            end = match.start('unit')
+            unit = None
+        value, unit = normalize_unit(float(match.group('number')), unit)
+        if not math.isfinite(value):
+            continue  # "x > 1e400": non è un predicato (e non sarebbe JSON valido)
+        text_parts.append(query[position:match.start()])
+        position = end
+
+        predicates.append({
+            'header': match.group('phrase') or match.group('word'),
+            'op': OPERATORS[match.group('op')],
+            'value': value,
+            'unit': unit
+        })
+
+    text_parts.append(query[position:])
+    return ' '.join(' '.join(text_parts).split()), predicates
+
+
+def predicate_filter(predicate: Dict) -> Dict:
+    """Clausola filter nested per un predicato."""
+    field = f"{MEASUREMENTS_PATH}.value"
+    if predicate['op'] == 'eq':
+        value_clause = {"range": {field: {"gte": predicate['value'], "lte": predicate['value']}}}
+    else:
+        value_clause = {"range": {field: {predicate['op']: predicate['value']}}}
+
+    clauses = [
+        {"match": {f"{MEASUREMENTS_PATH}.header": {"query": predicate['header'], "operator": "and"}}},
+        value_clause
+    ]
+    unit_field = f"{MEASUREMENTS_PATH}.unit"
+    if predicate['unit'] in DIMENSIONLESS_UNITS:
+        clauses.append({"bool": {
+            "should": [
+                {"term": {unit_field: predicate['unit']}},
+                {"bool": {"must_not": {"exists": {"field": unit_field}}}}
+            ],
+            "minimum_should_match": 1
+        }})
+    elif predicate['unit']:
+        # Tempi e dimensioni: il confronto ha senso solo nella stessa unità base
+        clauses.append({"term": {unit_field: predicate['unit']}})
+
+    return {
+        "nested": {
+            "path": MEASUREMENTS_PATH,
+            "query": {"bool": {"filter": clauses}}
+        }
+    }
+
+
+def table_query_filters(query: str) -> Tuple[str, List[Dict], List[Dict]]:
+    """
+    Testo residuo, predicati e clausole filter di una query sulle tabelle.
+    """
+    text, predicates = parse_table_query(query)
+    return text, predicates, [predicate_filter(p) for p in predicates]
@@ -0,0 +1,271 @@
+"""
+Archivio SQLite dei metadati degli articoli (arXiv e PubMed).
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Sostituisce i file arxiv_metadata.json / pubmed_metadata.json, che venivano
+riletti e riscritti per intero a ogni salvataggio. La tabella articles ha una
+riga per articolo (chiave: fonte + arxiv_id/pmc_id) con i metadati in JSON,
+riletti come ArticleRecord (models/records.py); il testo completo è nel blob
+store compresso (storage/text_store.py) e i metadati ne conservano solo il
+riferimento (full_text_ref). La tabella
+harvest_marks registra per ogni keyword la data dell'ultima raccolta completa
+(high-water mark), da cui riparte la raccolta incrementale.
+
+Il database è in modalità WAL: le scritture (upsert) aggiungono solo le righe
+modificate e i lettori non vengono bloccati durante lo scraping.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR, ARTICLE_STORE_PATH, FULL_TEXT_DIR
+from storage.text_store import FullTextStore
+from models.records import ArticleRecord, as_dict
+
+# File JSON delle versioni precedenti (pipeline e scraper standalone), importati al primo avvio
+LEGACY_METADATA_FILES = {
+    'arxiv': ["arxiv_metadata.json", os.path.join("arxiv", "articles_metadata.json")],
+    'pubmed': ["pubmed_metadata.json", os.path.join("pubmed", "articles_metadata.json")]
+}
+
+# Righe lette per volta durante l'iterazione
+FETCH_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    source TEXT NOT NULL,
+    article_id TEXT NOT NULL,
+    title TEXT,
+    date TEXT,
+    metadata TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (source, article_id)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_date ON articles (source, date);
+CREATE TABLE IF NOT EXISTS harvest_marks (
+    source TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    high_water TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (source, keyword)
+);
+"""
+
+
+def article_id(article: Dict, source: str) -> Optional[str]:
+    """Identificativo dell'articolo: arxiv_id per arXiv, pmc_id (o pmid) per PubMed."""
+    if source == 'arxiv':
+        return article.get('arxiv_id')
+    return article.get('pmc_id') or article.get('pmid')
+
+
+def store_path(data_dir=DATA_DIR) -> str:
+    """Percorso del database per una directory dati."""
+    return os.path.join(str(data_dir), ARTICLE_STORE_PATH.name)
+
+
+class ArticleStore:
+    """
+    Archivio degli articoli su SQLite.
+    Thread-safe: una sola connessione, le operazioni sono serializzate da un lock.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or ARTICLE_STORE_PATH)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self.texts = FullTextStore(os.path.join(os.path.dirname(self.path), FULL_TEXT_DIR.name))
+        self._migrate_full_texts()
+
+    def _migrate_full_texts(self):
+        """Sposta nel blob store i testi della vecchia tabella full_texts."""
+        has_table = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'full_texts'"
+        ).fetchone()
+        if not has_table:
+            return
+        rows = self.conn.execute(
+            """
+            SELECT a.source, a.metadata, t.full_text FROM articles a
+            JOIN full_texts t ON t.source = a.source AND t.article_id = a.article_id
+            """
+        ).fetchall()
+        by_source: Dict[str, List[Dict]] = {}
+        for source, metadata, text in rows:
+            article = json.loads(metadata)
+            article['full_text'] = text
+            by_source.setdefault(source, []).append(article)
+        for source, articles in by_source.items():
+            self.upsert(source, articles)
+        self.conn.execute("DROP TABLE full_texts")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- scrittura ----------
+
+    def upsert(self, source: str, articles: Iterable[Dict]) -> int:
+        """
+        Inserisce o aggiorna gli articoli in un'unica transazione.
+        Il full_text, se presente, va nel blob store (nei metadati resta full_text_ref).
+
+        Returns:
+            Numero di articoli scritti
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for article in articles:
+            aid = article_id(article, source)
+            if not aid:
+                continue
+            metadata = self.texts.store_article_text(as_dict(article))
+            rows.append((
+                source, aid, article.get('title'), article.get('date'),
+                json.dumps(metadata, ensure_ascii=False), now
+            ))
+
+        if not rows:
+            return 0
+
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    """
+                    INSERT INTO articles (source, article_id, title, date, metadata, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (source, article_id) DO UPDATE SET
+                        title = excluded.title,
+                        date = excluded.date,
+                        metadata = excluded.metadata,
+                        updated_at = excluded.updated_at
+                    """,
+                    rows
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def clear(self):
+        """Elimina tutti gli articoli (e i mark della raccolta incrementale)."""
+        with self._lock:
+            self.conn.execute("DELETE FROM articles")
+            self.conn.execute("DELETE FROM harvest_marks")
+
+    def set_high_water(self, source: str, keyword: str, value: str):
+        """Registra la data (YYYY-MM-DD) fino a cui la keyword è stata raccolta."""
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO harvest_marks (source, keyword, high_water, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (source, keyword) DO UPDATE SET
+                    high_water = excluded.high_water,
+                    updated_at = excluded.updated_at
+                """,
+                (source, keyword, value, datetime.now(timezone.utc).isoformat())
+            )
+
+    def import_legacy_json(self, data_dir=DATA_DIR) -> Dict[str, int]:
+        """Importa i file metadata JSON delle versioni precedenti, se l'archivio è vuoto."""
+        imported = {}
+        for source, names in LEGACY_METADATA_FILES.items():
+            if self.count(source):
+                continue
+            for name in names:
+                path = os.path.join(str(data_dir), name)
+                if os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        imported[source] = self.upsert(source, json.load(f))
+                    break
+        return imported
+
+    # ---------- lettura ----------
+
+    def get(self, source: str, aid: str) -> Optional[ArticleRecord]:
+        """Restituisce i metadati di un articolo (lookup sulla chiave primaria) o None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT metadata FROM articles WHERE source = ? AND article_id = ?",
+                (source, aid)
+            ).fetchone()
+        return ArticleRecord.from_dict(json.loads(row[0])) if row else None
+
+    def get_full_text(self, source: str, aid: str) -> Optional[str]:
+        """Testo completo di un articolo, letto dal blob store."""
+        article = self.get(source, aid)
+        return self.texts.text_for(article) if article else None
+
+    def iter_articles(self, source: str) -> Iterator[ArticleRecord]:
+        """
+        Scorre gli articoli di una fonte in ordine di inserimento,
+        leggendo FETCH_SIZE righe per volta (nessun caricamento completo in memoria).
+        I testi completi non vengono letti: vedi self.texts.text_for(article).
+        """
+        query = """
+            SELECT rowid, metadata FROM articles
+            WHERE source = ? AND rowid > ? ORDER BY rowid LIMIT ?
+        """
+
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(query, (source, last_rowid, FETCH_SIZE)).fetchall()
+            if not rows:
+                return
+            for rowid, metadata in rows:
+                yield ArticleRecord.from_dict(json.loads(metadata))
+            last_rowid = rows[-1][0]
+
+    def load(self, source: str) -> List[ArticleRecord]:
+        """Tutti gli articoli di una fonte come lista (senza testi completi)."""
+        return list(self.iter_articles(source))
+
+    def high_water(self, source: str, keyword: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT high_water FROM harvest_marks WHERE source = ? AND keyword = ?",
+                (source, keyword)
+            ).fetchone()
+        return row[0] if row else None
+
+    def ids(self, source: str) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self.conn.execute(
+                "SELECT article_id FROM articles WHERE source = ?", (source,)
+            )}
+
+    def count(self, source: Optional[str] = None) -> int:
+        with self._lock:
+            if source is None:
+                return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM articles WHERE source = ?", (source,)
+            ).fetchone()[0]
+
+
+def open_article_store(data_dir=DATA_DIR) -> ArticleStore:
+    """Apre l'archivio della directory dati, importando i vecchi file JSON al primo avvio."""
+    store = ArticleStore(store_path(data_dir))
+    for source, count in store.import_legacy_json(data_dir).items():
+        print(f"[INFO] Importati {count} articoli {source} dai metadata JSON")
+    return store
@@ -0,0 +1,117 @@
+"""
+Archivio delle immagini delle figure.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Le immagini scaricate (pipeline/figure_assets.py) sono salvate una sola volta,
+indirizzate dall'hash SHA-256 del contenuto, con l'estensione ricavata dai
+primi byte del file:
+
+    data/figure_assets/9c/9c41...e0.png
+
+La stessa immagine usata da più articoli (versioni arXiv, loghi, figure
+riprese) occupa quindi un solo file e ha lo stesso asset_id. Le immagini
+sono già compresse: non c'è un codec come in storage/text_store.py.
+
+Si salvano solo immagini riconosciute dai primi byte (IMAGE_EXTENSIONS): le
+pagine HTML di errore restituite al posto di un'immagine non entrano
+nell'archivio, che web/app.py serve dalla propria origine.
+"""
+
+import os
+import sys
+import hashlib
+import threading
+from typing import Optional
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import FIGURE_ASSETS_DIR
+
+# Firma iniziale -> estensione
+MAGIC_EXTENSIONS = (
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'%PDF', '.pdf'),
+)
+EXTENSIONS = ('.png', '.jpg', '.gif', '.webp', '.svg', '.pdf', '.bin')
+# Formati accettati da put() e serviti dall'applicazione web
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.gif', '.webp', '.svg')
+
+
+def sniff_extension(data: bytes) -> str:
+    """Estensione del file dai primi byte ('.bin' se il formato non è riconosciuto)."""
+    for magic, extension in MAGIC_EXTENSIONS:
+        if data.startswith(magic):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    # SVG solo se il documento inizia come SVG: una pagina HTML con un <svg> inline non lo è
+    head = data[:1024].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if head.startswith((b'<svg', b'<?xml', b'<!doctype svg')) and b'<svg' in head and b'<html' not in head:
+        return '.svg'
+    return '.bin'
+
+
+def is_image(data: bytes) -> bool:
+    """True se i primi byte sono di un formato immagine accettato dall'archivio."""
+    return sniff_extension(data) in IMAGE_EXTENSIONS
+
+
+class FigureAssetStore:
+    """Blob store delle immagini delle figure, content-addressed."""
+
+    def __init__(self, root=None):
+        self.root = str(root or FIGURE_ASSETS_DIR)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}{extension}")
+
+    def find(self, digest: str) -> Optional[str]:
+        """Percorso dell'immagine, o None se non è nell'archivio."""
+        if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+            return None  # non è un hash: nessun percorso fuori dall'archivio
+        for extension in EXTENSIONS:
+            path = self._path(digest, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, data: bytes) -> str:
+        """
+        Scrive l'immagine (se non già presente) e restituisce il riferimento.
+
+        Returns:
+            Hash SHA-256 del contenuto, da salvare in figure['asset_id']
+
+        Raises:
+            ValueError: se il contenuto non è un'immagine (es. una pagina HTML)
+        """
+        extension = sniff_extension(data)
+        if extension not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Contenuto non riconosciuto come immagine ({extension})")
+        digest = hashlib.sha256(data).hexdigest()
+        if self.find(digest) is not None:
+            return digest
+
+        path = self._path(digest, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Scrittura atomica: thread concorrenti sulla stessa immagine scrivono gli stessi byte
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Contenuto dell'immagine, o None se non esiste."""
+        path = self.find(digest)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def __contains__(self, digest: str) -> bool:
+        return self.find(digest) is not None
@@ -0,0 +1,204 @@
+"""
+Archivio compresso dei documenti scaricati (HTML arXiv, XML PubMed).
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Ogni documento è salvato così come arriva dal server (bytes, senza decodifica)
+e compresso per file con lo stesso codec dei testi completi:
+
+    data/arxiv/2401.12345.html.zst     (zstandard, se installato)
+    data/pubmed/PMC123456.xml.gz       (gzip altrimenti)
+
+In lettura i bytes decompressi vanno direttamente a lxml, che rileva da solo
+la codifica (BOM, meta charset / dichiarazione XML): nessuna stringa Python
+intermedia. Le pagine HTML senza alcuna dichiarazione sono lette come UTF-8
+(libxml2 userebbe Latin-1).
+I file non compressi delle versioni precedenti restano leggibili; per
+comprimerli:
+
+    python storage/raw_archive.py
+"""
+
+import os
+import re
+import sys
+import threading
+from typing import List, Optional, Tuple, Union
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ARXIV_DATA_DIR, PUBMED_DATA_DIR
+from storage.text_store import CODECS
+
+RAW_EXTENSIONS = ('.html', '.xml')
+
+# Parser lxml per i bytes: UTF-8 se il documento non dichiara la codifica.
+# Un parser per thread (i parser lxml non vanno condivisi tra thread).
+_parsers = threading.local()
+
+# Codifica dichiarata nei primi byte: BOM, <meta charset>/http-equiv, <?xml encoding?>
+_BOMS = (b'\xef\xbb\xbf', b'\xff\xfe', b'\xfe\xff')
+_DECLARED_ENCODING = re.compile(rb'<meta[^>]+charset|<\?xml[^>]+encoding', re.IGNORECASE)
+DECLARATION_BYTES = 2048
+
+
+def _html_parser(declared: bool) -> lxml_html.HTMLParser:
+    """Parser che rispetta la codifica dichiarata, oppure UTF-8 per i documenti che non la dichiarano."""
+    name = 'html' if declared else 'html_utf8'
+    parser = getattr(_parsers, name, None)
+    if parser is None:
+        parser = lxml_html.HTMLParser() if declared else lxml_html.HTMLParser(encoding='utf-8')
+        setattr(_parsers, name, parser)
+    return parser
+
+
+def declares_encoding(content: bytes) -> bool:
+    """True se il documento indica la propria codifica (BOM o dichiarazione iniziale)."""
+    return content.startswith(_BOMS) or _DECLARED_ENCODING.search(content, 0, DECLARATION_BYTES) is not None
+
+
+def _xml_parser() -> etree.XMLParser:
+    parser = getattr(_parsers, 'xml', None)
+    if parser is None:
+        # recover: tollera XML malformato; niente entità esterne né rete
+        parser = _parsers.xml = etree.XMLParser(recover=True, resolve_entities=False,
+                                                no_network=True, huge_tree=True)
+    return parser
+
+
+def _split_codec(path: str) -> Tuple[str, Optional[str]]:
+    """('x.html.gz') -> ('x.html', '.gz'); file non compresso -> (path, None)."""
+    base, extension = os.path.splitext(path)
+    if extension in CODECS:
+        return base, extension
+    return path, None
+
+
+def raw_id(path: str) -> str:
+    """Id del documento dal nome del file ('2401.12345.html.gz' -> '2401.12345')."""
+    base, _ = _split_codec(os.path.basename(str(path)))
+    return os.path.splitext(base)[0]
+
+
+def find_raw(path: str) -> Optional[str]:
+    """
+    Percorso effettivo di un documento: `path` può essere il nome originale
+    (x.html) o già compresso (x.html.gz); None se non esiste.
+    """
+    base, _ = _split_codec(str(path))
+    for extension in CODECS:
+        if os.path.exists(base + extension):
+            return base + extension
+    return base if os.path.exists(base) else None
+
+
+def write_raw(path: str, content: bytes) -> str:
+    """
+    Salva il documento compresso (scrittura atomica).
+
+    Args:
+        path: Nome originale del file (es. data/arxiv/2401.12345.html)
+        content: Bytes ricevuti dal server
+
+    Returns:
+        Percorso del file compresso
+    """
+    base, _ = _split_codec(str(path))
+    extension = next(iter(CODECS))
+    compress, _ = CODECS[extension]
+    target = base + extension
+    tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(compress(content))
+    os.replace(tmp_path, target)
+    # Una copia non compressa di un download precedente è ormai obsoleta
+    if os.path.exists(base):
+        os.remove(base)
+    return target
+
+
+def read_raw(path: str) -> bytes:
+    """Bytes del documento, decompressi se necessario."""
+    actual = find_raw(path)
+    if actual is None:
+        raise FileNotFoundError(path)
+    _, extension = _split_codec(actual)
+    with open(actual, 'rb') as f:
+        data = f.read()
+    if extension is None:
+        return data
+    _, decompress = CODECS[extension]
+    return decompress(data)
+
+
+def parse_document(content: Union[bytes, str]):
+    """
+    Albero lxml di un documento HTML/XML.
+    I bytes vengono passati così come sono; le stringhe sono accettate per compatibilità.
+    """
+    if isinstance(content, bytes):
+        return lxml_html.fromstring(content, parser=_html_parser(declares_encoding(content)))
+    return lxml_html.fromstring(content)
+
+
+def parse_xml(content: Union[bytes, str]):
+    """Albero lxml.etree di un documento XML (es. JATS da efetch), con recupero degli errori."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return etree.fromstring(content, parser=_xml_parser())
+
+
+def list_raw(directory, extensions=RAW_EXTENSIONS) -> List[Tuple[str, str]]:
+    """
+    Documenti di una directory come (paper_id, percorso), compressi o no.
+    Se esistono entrambe le versioni dello stesso documento vale la compressa.
+    """
+    found = {}
+    if not os.path.isdir(str(directory)):
+        return []
+    for filename in sorted(os.listdir(str(directory))):
+        base, codec = _split_codec(filename)
+        if os.path.splitext(base)[1] not in extensions:
+            continue
+        stem = raw_id(filename)
+        if codec is not None or stem not in found:
+            found[stem] = os.path.join(str(directory), filename)
+    return sorted(found.items())
+
+
+def compress_directory(directory) -> Tuple[int, int, int]:
+    """
+    Comprime i documenti non compressi di una directory.
+
+    Returns:
+        (file compressi, bytes prima, bytes dopo)
+    """
+    count = before = after = 0
+    for _, path in list_raw(directory):
+        if _split_codec(path)[1] is not None:
+            continue
+        with open(path, 'rb') as f:
+            content = f.read()
+        target = write_raw(path, content)
+        count += 1
+        before += len(content)
+        after += os.path.getsize(target)
+    return count, before, after
+
+
+def main():
+    print("=" * 60)
+    print("Raw Archive - Ingegneria dei Dati Homework 5")
+    print("=" * 60)
+    for directory in (ARXIV_DATA_DIR, PUBMED_DATA_DIR):
+        count, before, after = compress_directory(directory)
+        if count:
+            print(f"[OK] {directory}: {count} file, {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+        else:
+            print(f"[INFO] {directory}: nessun file da comprimere")
+
+
+if __name__ == "__main__":
+    main()
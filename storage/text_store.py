@@ -0,0 +1,125 @@
+"""
+Archivio compresso dei testi completi degli articoli.
+Ingegneria dei Dati 2025/2026 - Homework 5
+
+Il testo completo non viaggia più nel dizionario dell'articolo: viene scritto
+una sola volta in un file compresso per articolo, indirizzato dall'hash SHA-256
+del contenuto, e l'articolo conserva solo il riferimento (campo full_text_ref):
+
+    data/full_texts/3f/3fa9...c2.zst      (zstandard, se installato)
+    data/full_texts/3f/3fa9...c2.gz       (gzip altrimenti)
+
+Gli indexer leggono il testo solo quando preparano il documento da inviare,
+quindi in memoria resta al massimo un blocco di testi alla volta.
+"""
+
+import os
+import sys
+import gzip
+import hashlib
+import threading
+from typing import Dict, Optional
+
+# Aggiungi il path principale al PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import FULL_TEXT_DIR
+
+try:
+    import zstandard
+except ImportError:  # dipendenza opzionale: si ripiega su gzip
+    zstandard = None
+
+# Livelli di compressione (testo: buon rapporto anche a livelli bassi)
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+REF_FIELD = 'full_text_ref'
+
+
+def _compress_zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def _decompress_zstd(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _compress_gzip(data: bytes) -> bytes:
+    # mtime=0: stesso testo, stessi byte su disco
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+# Estensione -> (compressione, decompressione); la prima disponibile è usata in scrittura
+CODECS = {}
+if zstandard is not None:
+    CODECS['.zst'] = (_compress_zstd, _decompress_zstd)
+CODECS['.gz'] = (_compress_gzip, gzip.decompress)
+
+
+class FullTextStore:
+    """Blob store dei testi completi, content-addressed e compresso."""
+
+    def __init__(self, root=None):
+        self.root = str(root or FULL_TEXT_DIR)
+        self.extension = next(iter(CODECS))
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}{extension}")
+
+    def _find(self, digest: str) -> Optional[str]:
+        """Percorso del blob, con qualunque codec sia stato scritto."""
+        for extension in CODECS:
+            path = self._path(digest, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, text: str) -> str:
+        """
+        Scrive il testo (se non già presente) e restituisce il riferimento.
+
+        Returns:
+            Hash SHA-256 del testo, da salvare in article['full_text_ref']
+        """
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if self._find(digest) is not None:
+            return digest
+
+        path = self._path(digest, self.extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compress, _ = CODECS[self.extension]
+        # Scrittura atomica: thread concorrenti sullo stesso testo scrivono gli stessi byte
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compress(data))
+        os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """Testo decompresso, o None se il blob non esiste."""
+        path = self._find(digest)
+        if path is None:
+            return None
+        _, decompress = CODECS[os.path.splitext(path)[1]]
+        with open(path, 'rb') as f:
+            return decompress(f.read()).decode('utf-8')
+
+    def __contains__(self, digest: str) -> bool:
+        return self._find(digest) is not None
+
+    def text_for(self, article: Dict) -> str:
+        """Testo completo dell'articolo; in mancanza del blob, l'abstract."""
+        if article.get('full_text'):
+            return article['full_text']
+        ref = article.get(REF_FIELD)
+        text = self.get(ref) if ref else None
+        return text if text is not None else article.get('abstract', '')
+
+    def store_article_text(self, article: Dict) -> Dict:
+        """Sposta article['full_text'] nel blob store, lasciando il riferimento."""
+        text = article.pop('full_text', None)
+        if text:
+            article[REF_FIELD] = self.put(text)
+        return article
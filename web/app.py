@@ -5,70 +5,209 @@ Ingegneria dei Dati 2025/2026 - Homework 5
 Funzionalità:
 - Ricerca articoli, tabelle e figure
 - Ricerca booleana
+- Predicati numerici sulle tabelle (es. "latency < 10 ms", "speedup > 2x")
+- Immagini delle figure servite dall'archivio locale (python main.py --fetch-figures)
 - Visualizzazione risultati con highlighting
 - API REST per integrazione
 """
 
 import os
 import sys
-from flask import Flask, render_template, request, jsonify
-from elasticsearch import Elasticsearch
+import time
+import threading
+from collections import OrderedDict
+from flask import Flask, render_template, request, jsonify, url_for, send_file, abort
 
 # Aggiungi il path principale al PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
-    ELASTICSEARCH_URL, INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES
+    ELASTICSEARCH_URL, INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES,
+    PAPER_FIELDS, TABLE_FIELDS, FIGURE_FIELDS,
+    SUGGEST_MIN_PREFIX, SUGGEST_MAX_RESULTS, SUGGEST_CACHE_SIZE, SUGGEST_CACHE_TTL
 )
+from search.backends import get_search_backend
+from search.table_query import table_query_filters
+from storage.asset_store import FigureAssetStore, IMAGE_EXTENSIONS
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', os.urandom(24).hex())
 
-# Connessione Elasticsearch
-es = Elasticsearch(ELASTICSEARCH_URL)
+# Backend di ricerca: Elasticsearch se raggiungibile, altrimenti indice locale BM25
+backend = get_search_backend()
 
-# Costanti per i campi di ricerca
-PAPER_FIELDS = ["title^3", "abstract^2", "full_text", "authors"]
-TABLE_FIELDS = ["caption^3", "body^2", "mentions", "context_paragraphs", "informative_terms^2"]
-FIGURE_FIELDS = ["caption^3", "mentions^2", "context_paragraphs", "informative_terms"]
+# Aggregazioni (facet) calcolate nella stessa richiesta dei risultati
+PAPER_FACETS = {
+    "source": {"terms": {"field": "source", "size": 10}},
+    "year": {"terms": {"field": "year", "size": 20, "order": {"_key": "desc"}}},
+    "author": {"terms": {"field": "author_names", "size": 10}},
+    "category": {"terms": {"field": "categories", "size": 15}},
+    "has_tables": {"filter": {"term": {"has_tables": True}}},
+    "has_figures": {"filter": {"term": {"has_figures": True}}}
+}
+TABLE_FACETS = {
+    "source": {"terms": {"field": "source", "size": 10}},
+    "paper": {"terms": {"field": "paper_id", "size": 10}}
+}
+FIGURE_FACETS = {
+    "source": {"terms": {"field": "source", "size": 10}},
+    "paper": {"terms": {"field": "paper_id", "size": 10}}
+}
 
+# Parametro URL di drill-down -> campo filtrato
+FACET_FILTER_FIELDS = {
+    "source": "source",
+    "year": "year",
+    "author": "author_names",
+    "category": "categories",
+    "paper": "paper_id",
+    "has_tables": "has_tables",
+    "has_figures": "has_figures"
+}
 
-def search_index(index: str, query: str, fields: list, size: int = 20, source_filter: str = None):
-    """Esegue una ricerca su un indice specifico."""
-    try:
-        # Costruisci la query base
-        base_query = {
-            "multi_match": {
-                "query": query,
-                "fields": fields,
-                "type": "best_fields",
-                "fuzziness": "AUTO"
-            }
-        }
+FACET_LABELS = {
+    "source": "Fonte",
+    "year": "Anno",
+    "author": "Autori",
+    "category": "Categorie arXiv",
+    "paper": "Articolo",
+    "has_tables": "Con tabelle",
+    "has_figures": "Con figure"
+}
+
+# Campi search_as_you_type per l'autocompletamento: (indice, campo, campi _source restituiti)
+SUGGEST_TARGETS = {
+    "papers": (INDEX_PAPERS, "title.suggest", ["title", "paper_id", "source"]),
+    "tables": (INDEX_TABLES, "caption.suggest", ["caption", "table_id", "paper_id", "source"]),
+    "figures": (INDEX_FIGURES, "caption.suggest", ["caption", "figure_id", "paper_id", "source"])
+}
+
+
+class SuggestCache:
+    """
+    Cache LRU in-process per i suggerimenti dei prefissi più frequenti.
+    Le voci scadono dopo `ttl` secondi per riflettere le nuove indicizzazioni.
+    """
+    
+    def __init__(self, max_size: int = SUGGEST_CACHE_SIZE, ttl: float = SUGGEST_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        """Restituisce il valore in cache o None se assente/scaduto."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, value):
+        """Inserisce un valore, eliminando il prefisso usato meno di recente."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+suggest_cache = SuggestCache()
+
+
+def build_facet_filters(args, facets: dict):
+    """
+    Converte i parametri di drill-down in clausole filter.
+    
+    Le clausole vanno nel contesto filter della bool query: non influenzano
+    lo score e vengono messe in cache da Elasticsearch tra una richiesta e l'altra.
+    
+    Returns:
+        (lista di clausole filter, dizionario parametro -> valori attivi)
+    """
+    filters = []
+    active = {}
+    
+    for param, field in FACET_FILTER_FIELDS.items():
+        if param not in facets:
+            continue
+        values = [v for v in args.getlist(param) if v and v != 'all']
+        if not values:
+            continue
+        active[param] = values
         
-        # Aggiungi filtro per fonte se specificato
-        if source_filter and source_filter != 'all':
-            query_body = {
-                "bool": {
-                    "must": base_query,
-                    "filter": {
-                        "term": {"source": source_filter}
-                    }
-                }
-            }
+        if "filter" in facets[param]:
+            # Facet booleano (es. has_tables=1)
+            filters.append({"term": {field: values[0] in ('1', 'true', 'on')}})
+        elif len(values) == 1:
+            filters.append({"term": {field: values[0]}})
         else:
-            query_body = base_query
+            filters.append({"terms": {field: values}})
+    
+    return filters, active
+
+
+def extract_facets(results: dict) -> dict:
+    """Converte le aggregazioni della risposta in conteggi {facet: [{value, count}]}."""
+    facets = {}
+    for name, agg in results.get('aggregations', {}).items():
+        if 'buckets' in agg:
+            facets[name] = [
+                {"value": b.get('key_as_string', b['key']), "count": b['doc_count']}
+                for b in agg['buckets']
+            ]
+        else:
+            facets[name] = agg.get('doc_count', 0)
+    return facets
+
+
+def format_facets(facets: dict, active: dict) -> list:
+    """Prepara i facet per il template, con i link di drill-down già costruiti."""
+    base_params = request.args.to_dict(flat=False)
+    groups = []
+    
+    for name, buckets in facets.items():
+        if isinstance(buckets, int):
+            buckets = [{"value": "1", "count": buckets}] if buckets else []
         
-        body = {
-            "query": query_body,
-            "size": size,
-            "highlight": {
-                "fields": {field.split('^')[0]: {"fragment_size": 200} for field in fields},
-                "pre_tags": ["<mark>"],
-                "post_tags": ["</mark>"]
-            }
-        }
+        items = []
+        for bucket in buckets:
+            value = str(bucket['value'])
+            params = {k: list(v) for k, v in base_params.items()}
+            selected = value in active.get(name, [])
+            if selected:
+                params[name] = [v for v in params.get(name, []) if v != value]
+            else:
+                params[name] = [v for v in params.get(name, []) if v != 'all'] + [value]
+            items.append({
+                "value": value,
+                "count": bucket['count'],
+                "active": selected,
+                "url": url_for('search', **params)
+            })
         
-        return es.search(index=index, body=body)
+        if items:
+            groups.append({"name": name, "label": FACET_LABELS.get(name, name), "items": items})
+    
+    return groups
+
+
+def search_index(index: str, query: str, fields: list, size: int = 20, source_filter: str = None,
+                 filters: list = None, aggs: dict = None):
+    """Esegue una ricerca su un indice specifico."""
+    try:
+        # Filtri: fonte (se specificata) + drill-down dei facet
+        filter_clauses = list(filters or [])
+        if source_filter and source_filter != 'all':
+            filter_clauses.append({"term": {"source": source_filter}})
+        
+        return backend.search(index, query, fields, size, filters=filter_clauses, aggs=aggs)
     except Exception as e:
         return {"error": str(e), "hits": {"hits": [], "total": {"value": 0}}}
 
@@ -104,47 +243,17 @@ def parse_boolean_query(query_str: str):
     return must_terms, should_terms, must_not_terms
 
 
-def boolean_search(index: str, must_terms: list, should_terms: list, must_not_terms: list, size: int = 20, source_filter: str = None):
+def boolean_search(index: str, must_terms: list, should_terms: list, must_not_terms: list, size: int = 20, source_filter: str = None,
+                   filters: list = None, aggs: dict = None):
     """Esegue una ricerca booleana."""
-    bool_query = {"bool": {}}
-    
-    if must_terms:
-        bool_query["bool"]["must"] = [
-            {"multi_match": {"query": term, "fields": ["*"]}}
-            for term in must_terms
-        ]
-    
-    if should_terms:
-        bool_query["bool"]["should"] = [
-            {"multi_match": {"query": term, "fields": ["*"]}}
-            for term in should_terms
-        ]
-        bool_query["bool"]["minimum_should_match"] = 1
-    
-    if must_not_terms:
-        bool_query["bool"]["must_not"] = [
-            {"multi_match": {"query": term, "fields": ["*"]}}
-            for term in must_not_terms
-        ]
-    
-    # Aggiungi filtro per fonte se specificato
+    # Filtri: fonte (se specificata) + drill-down dei facet
+    filter_clauses = list(filters or [])
     if source_filter and source_filter != 'all':
-        bool_query["bool"]["filter"] = {
-            "term": {"source": source_filter}
-        }
-    
-    body = {
-        "query": bool_query,
-        "size": size,
-        "highlight": {
-            "fields": {"*": {}},
-            "pre_tags": ["<mark>"],
-            "post_tags": ["</mark>"]
-        }
-    }
+        filter_clauses.append({"term": {"source": source_filter}})
     
     try:
-        return es.search(index=index, body=body)
+        return backend.boolean_search(index, must_terms, should_terms, must_not_terms, size,
+                                      filters=filter_clauses, aggs=aggs)
     except Exception as e:
         return {"error": str(e), "hits": {"hits": [], "total": {"value": 0}}}
 
@@ -152,75 +261,23 @@ def boolean_search(index: str, must_terms: list, should_terms: list, must_not_te
 @app.route('/')
 def home():
     """Pagina principale con form di ricerca."""
-    # Ottieni statistiche generali
+    # Statistiche generali e per fonte (arXiv vs PubMed): un'aggregazione per indice
     stats = {}
-    for index in [INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES]:
+    arxiv_stats = {'papers': 0, 'tables': 0, 'figures': 0}
+    pubmed_stats = {'papers': 0, 'tables': 0, 'figures': 0}
+    
+    for index, key in [(INDEX_PAPERS, 'papers'), (INDEX_TABLES, 'tables'), (INDEX_FIGURES, 'figures')]:
         try:
-            if es.indices.exists(index=index):
-                stats[index] = es.count(index=index)['count']
+            if backend.index_exists(index):
+                total, by_source = backend.count_by_source(index)
+                stats[index] = total
+                arxiv_stats[key] = by_source.get('arxiv', 0)
+                pubmed_stats[key] = by_source.get('pubmed', 0)
             else:
                 stats[index] = 0
         except Exception:
             stats[index] = 0
     
-    # Ottieni statistiche per fonte (arXiv vs PubMed)
-    arxiv_stats = {'papers': 0, 'tables': 0, 'figures': 0}
-    pubmed_stats = {'papers': 0, 'tables': 0, 'figures': 0}
-    
-    try:
-        if es.indices.exists(index=INDEX_PAPERS):
-            # Conta articoli arXiv
-            arxiv_count = es.count(
-                index=INDEX_PAPERS,
-                body={"query": {"term": {"source": "arxiv"}}}
-            )
-            arxiv_stats['papers'] = arxiv_count.get('count', 0)
-            
-            # Conta articoli PubMed
-            pubmed_count = es.count(
-                index=INDEX_PAPERS,
-                body={"query": {"term": {"source": "pubmed"}}}
-            )
-            pubmed_stats['papers'] = pubmed_count.get('count', 0)
-    except Exception:
-        pass
-    
-    try:
-        if es.indices.exists(index=INDEX_TABLES):
-            # Conta tabelle arXiv
-            arxiv_tables = es.count(
-                index=INDEX_TABLES,
-                body={"query": {"term": {"source": "arxiv"}}}
-            )
-            arxiv_stats['tables'] = arxiv_tables.get('count', 0)
-            
-            # Conta tabelle PubMed
-            pubmed_tables = es.count(
-                index=INDEX_TABLES,
-                body={"query": {"term": {"source": "pubmed"}}}
-            )
-            pubmed_stats['tables'] = pubmed_tables.get('count', 0)
-    except Exception:
-        pass
-    
-    try:
-        if es.indices.exists(index=INDEX_FIGURES):
-            # Conta figure arXiv
-            arxiv_figures = es.count(
-                index=INDEX_FIGURES,
-                body={"query": {"term": {"source": "arxiv"}}}
-            )
-            arxiv_stats['figures'] = arxiv_figures.get('count', 0)
-            
-            # Conta figure PubMed
-            pubmed_figures = es.count(
-                index=INDEX_FIGURES,
-                body={"query": {"term": {"source": "pubmed"}}}
-            )
-            pubmed_stats['figures'] = pubmed_figures.get('count', 0)
-    except Exception:
-        pass
-    
     return render_template(
         'index.html', 
         stats=stats, 
@@ -241,23 +298,36 @@ def search():
     if not query:
         return render_template('results.html', results=[], query='', doc_type=doc_type, source_filter=source_filter, total=0)
     
-    # Determina indice e campi
+    # Determina indice, campi e facet
     if doc_type == 'tables':
         index = INDEX_TABLES
         fields = TABLE_FIELDS
+        facets = TABLE_FACETS
     elif doc_type == 'figures':
         index = INDEX_FIGURES
         fields = FIGURE_FIELDS
+        facets = FIGURE_FACETS
     else:  # papers o tipo non valido
         index = INDEX_PAPERS
         fields = PAPER_FIELDS
+        facets = PAPER_FACETS
+    
+    # Il filtro per fonte arriva come facet "source"
+    filters, active_facets = build_facet_filters(request.args, facets)
+    
+    # Tabelle: i predicati numerici diventano filtri nested, il resto è testo
+    text_query = query
+    if doc_type == 'tables':
+        text_query, _, numeric_filters = table_query_filters(query)
+        filters.extend(numeric_filters)
     
     # Esegui ricerca
-    if search_type == 'boolean':
-        must_terms, should_terms, must_not_terms = parse_boolean_query(query)
-        results = boolean_search(index, must_terms, should_terms, must_not_terms, size, source_filter)
+    if search_type == 'boolean' and text_query:
+        must_terms, should_terms, must_not_terms = parse_boolean_query(text_query)
+        results = boolean_search(index, must_terms, should_terms, must_not_terms, size,
+                                 filters=filters, aggs=facets)
     else:
-        results = search_index(index, query, fields, size, source_filter)
+        results = search_index(index, text_query, fields, size, filters=filters, aggs=facets)
     
     # Estrai risultati
     hits = results.get('hits', {}).get('hits', [])
@@ -286,7 +356,8 @@ def search():
         doc_type=doc_type,
         search_type=search_type,
         source_filter=source_filter,
-        total=total
+        total=total,
+        facets=format_facets(extract_facets(results), active_facets)
     )
 
 
@@ -302,25 +373,38 @@ def api_search():
     if not query:
         return jsonify({'error': 'Query non specificata', 'results': [], 'total': 0})
     
-    # Determina indice e campi
+    # Determina indice, campi e facet
     if doc_type == 'papers':
         index = INDEX_PAPERS
         fields = PAPER_FIELDS
+        facets = PAPER_FACETS
     elif doc_type == 'tables':
         index = INDEX_TABLES
         fields = TABLE_FIELDS
+        facets = TABLE_FACETS
     elif doc_type == 'figures':
         index = INDEX_FIGURES
         fields = FIGURE_FIELDS
+        facets = FIGURE_FACETS
     else:
         return jsonify({'error': 'Tipo documento non valido', 'results': [], 'total': 0})
     
+    filters, active_facets = build_facet_filters(request.args, facets)
+    
+    # Tabelle: i predicati numerici diventano filtri nested, il resto è testo
+    text_query = query
+    numeric_predicates = []
+    if doc_type == 'tables':
+        text_query, numeric_predicates, numeric_filters = table_query_filters(query)
+        filters.extend(numeric_filters)
+    
     # Esegui ricerca
-    if search_type == 'boolean':
-        must_terms, should_terms, must_not_terms = parse_boolean_query(query)
-        results = boolean_search(index, must_terms, should_terms, must_not_terms, size, source_filter)
+    if search_type == 'boolean' and text_query:
+        must_terms, should_terms, must_not_terms = parse_boolean_query(text_query)
+        results = boolean_search(index, must_terms, should_terms, must_not_terms, size,
+                                 filters=filters, aggs=facets)
     else:
-        results = search_index(index, query, fields, size, source_filter)
+        results = search_index(index, text_query, fields, size, filters=filters, aggs=facets)
     
     # Estrai e restituisci risultati
     hits = results.get('hits', {}).get('hits', [])
@@ -332,7 +416,10 @@ def api_search():
         'query': query,
         'type': doc_type,
         'source': source_filter,
+        'filters': active_facets,
+        'numeric_filters': numeric_predicates,
         'total': total,
+        'facets': extract_facets(results),
         'results': [
             {
                 'id': hit['_id'],
@@ -345,14 +432,64 @@ def api_search():
     })
 
 
+def format_suggestions(doc_type: str, response: dict) -> list:
+    """Estrae il testo suggerito (titolo o caption) dalle hit."""
+    suggestions = []
+    for hit in response.get('hits', {}).get('hits', []):
+        source = hit['_source']
+        text = source.get('title') or source.get('caption', '')
+        suggestions.append({
+            'text': text[:200],
+            'type': doc_type,
+            'id': hit['_id'],
+            'paper_id': source.get('paper_id', ''),
+            'source': source.get('source', '')
+        })
+    return suggestions
+
+
+@app.route('/api/suggest')
+def api_suggest():
+    """API di autocompletamento (search-as-you-type) su titoli e caption."""
+    prefix = ' '.join(request.args.get('q', '').lower().split())
+    doc_type = request.args.get('type', 'all')
+    source_filter = request.args.get('source', 'all')
+    size = min(int(request.args.get('size', SUGGEST_MAX_RESULTS)), 20)
+    
+    if doc_type != 'all' and doc_type not in SUGGEST_TARGETS:
+        return jsonify({'error': 'Tipo documento non valido', 'suggestions': []})
+    if len(prefix) < SUGGEST_MIN_PREFIX:
+        return jsonify({'query': prefix, 'type': doc_type, 'suggestions': [], 'cached': False})
+    
+    cache_key = (doc_type, source_filter, size, prefix)
+    suggestions = suggest_cache.get(cache_key)
+    if suggestions is not None:
+        return jsonify({'query': prefix, 'type': doc_type, 'suggestions': suggestions, 'cached': True})
+    
+    types = list(SUGGEST_TARGETS) if doc_type == 'all' else [doc_type]
+    
+    try:
+        responses = backend.suggest([SUGGEST_TARGETS[t] for t in types], prefix, size, source_filter)
+    except Exception as e:
+        return jsonify({'error': str(e), 'query': prefix, 'type': doc_type, 'suggestions': []})
+    
+    suggestions = []
+    for t, response in zip(types, responses):
+        if 'error' not in response:
+            suggestions.extend(format_suggestions(t, response))
+    
+    suggest_cache.put(cache_key, suggestions)
+    return jsonify({'query': prefix, 'type': doc_type, 'suggestions': suggestions, 'cached': False})
+
+
 @app.route('/api/stats')
 def api_stats():
     """API per statistiche degli indici."""
     stats = {}
     for index in [INDEX_PAPERS, INDEX_TABLES, INDEX_FIGURES]:
         try:
-            if es.indices.exists(index=index):
-                stats[index] = es.count(index=index)['count']
+            if backend.index_exists(index):
+                stats[index] = backend.count(index)
             else:
                 stats[index] = 0
         except Exception as e:
@@ -361,12 +498,25 @@ def api_stats():
     return jsonify(stats)
 
 
+@app.route('/asset/<digest>')
+def figure_asset(digest):
+    """Immagine di una figura dall'archivio locale (asset_id / canonical_asset)."""
+    path = FigureAssetStore().find(digest)
+    if path is None or not path.endswith(IMAGE_EXTENSIONS):
+        abort(404)
+    # Contenuto indirizzato dall'hash: non cambia mai, può restare in cache
+    response = send_file(path, max_age=365 * 24 * 3600)
+    # Contenuto remoto servito dalla nostra origine: nessuno script (SVG) e tipo non reinterpretato
+    response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
 @app.route('/paper/<paper_id>')
 def view_paper(paper_id):
     """Visualizza dettagli di un articolo."""
     try:
-        result = es.get(index=INDEX_PAPERS, id=paper_id)
-        source = result['_source']
+        source = backend.get(INDEX_PAPERS, paper_id)
         
         # Estrai il vero paper_id dal source (senza prefisso arxiv_ o pubmed_)
         actual_paper_id = source.get('paper_id') or source.get('arxiv_id') or source.get('pmc_id') or source.get('pmid')
@@ -381,30 +531,17 @@ def view_paper(paper_id):
         print(f"[DEBUG] Source keys: {list(source.keys())}")
         
         # Cerca tabelle e figure associate usando il paper_id reale
-        tables_response = es.search(
-            index=INDEX_TABLES,
-            body={
-                "query": {"term": {"paper_id": actual_paper_id}}, 
-                "size": 100,
-                "_source": ["table_id", "paper_id", "caption", "body", "mentions", "context_paragraphs", "position"],
-                "sort": [{"position": {"order": "asc"}}]
-            }
+        tables = backend.find_by_paper(
+            INDEX_TABLES, actual_paper_id,
+            ["table_id", "paper_id", "caption", "body", "mentions", "context_paragraphs", "position"]
         )
         
-        figures_response = es.search(
-            index=INDEX_FIGURES,
-            body={
-                "query": {"term": {"paper_id": actual_paper_id}}, 
-                "size": 100,
-                "_source": ["figure_id", "paper_id", "caption", "url", "mentions", "context_paragraphs", "position"],
-                "sort": [{"position": {"order": "asc"}}]
-            }
+        figures = backend.find_by_paper(
+            INDEX_FIGURES, actual_paper_id,
+            ["figure_id", "paper_id", "caption", "url", "mentions", "context_paragraphs", "position",
+             "canonical_asset", "cluster_size", "panel", "media_type"]
         )
         
-        # Formatta tabelle e figure per il template
-        tables = [hit['_source'] for hit in tables_response['hits']['hits']]
-        figures = [hit['_source'] for hit in figures_response['hits']['hits']]
-        
         # Debug: aggiungi log per verificare cosa viene recuperato
         print(f"[DEBUG] Tabelle trovate: {len(tables)}")
         print(f"[DEBUG] Figure trovate: {len(figures)}")
@@ -433,7 +570,8 @@ if __name__ == '__main__':
     print("Sistema di Ricerca Articoli Scientifici - Homework 5")
     print("Ingegneria dei Dati 2025/2026")
     print("=" * 60)
-    print(f"\nElasticsearch: {ELASTICSEARCH_URL}")
+    print(f"\nBackend di ricerca: {backend.name}")
+    print(f"Elasticsearch: {ELASTICSEARCH_URL}")
     print("Server: http://localhost:5000")
     print("=" * 60)
     